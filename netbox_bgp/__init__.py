@@ -13,10 +13,26 @@ class BGPConfig(PluginConfig):
     required_settings = []
     min_version = '3.5.0'
     max_version = '3.7.99'
+    middleware = [
+        'netbox_bgp.middleware.InstrumentationMiddleware',
+        'netbox_bgp.middleware.GraphQLQueryMiddleware',
+    ]
     default_settings = {
         'device_ext_page': 'right',
         'top_level_menu' : False,
+        'graphql_max_cost': 100000,
+        'graphql_default_fan_out': 10,
+        'graphql_cache_timeout': 0,
+        'instrumentation': False,
+        'instrumentation_header': False,
+        'background_bulk_threshold': 1000,
+        'state_collectors': [],
+        'api_cache_timeout': 0,
     }
 
+    def ready(self):
+        super().ready()
+        from . import signals  # noqa: F401
+
 
 config = BGPConfig # noqa
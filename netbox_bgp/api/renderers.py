@@ -0,0 +1,57 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+
+# Types msgpack cannot pack (datetimes, decimals, UUIDs, etc.) are converted as for JSON
+_encoder = JSONEncoder()
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Render API responses as MessagePack, requested with ``Accept: application/msgpack``
+    or ``?format=msgpack``. Requires the msgpack package.
+    """
+    media_type = MSGPACK_MEDIA_TYPE
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    """Parse ``Content-Type: application/msgpack`` request bodies. Requires the msgpack package."""
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError) as e:
+            raise ParseError(f'MessagePack parse error - {e}')
+
+
+class MessagePackViewSetMixin:
+    """Accept and offer MessagePack in addition to the default formats, when msgpack is installed."""
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if msgpack is not None:
+            renderers.append(MessagePackRenderer())
+        return renderers
+
+    def get_parsers(self):
+        parsers = super().get_parsers()
+        if msgpack is not None:
+            parsers.append(MessagePackParser())
+        return parsers
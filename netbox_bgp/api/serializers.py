@@ -1,4 +1,5 @@
-from rest_framework.serializers import HyperlinkedIdentityField, ValidationError
+from django.utils.functional import cached_property
+from rest_framework.serializers import HyperlinkedIdentityField, ListSerializer, SerializerMethodField, ValidationError
 from rest_framework.relations import PrimaryKeyRelatedField
 
 from netbox.api.fields import ChoiceField
@@ -12,11 +13,51 @@ from ipam.api.field_serializers import IPNetworkField
 
 
 from netbox_bgp.models import (
-    BGPSession, RoutingPolicy, BGPPeerGroup,
+    BGPSession, BGPSessionState, RoutingPolicy, BGPPeerGroup,
     Community, RoutingPolicyRule, PrefixList, PrefixListRule,
 )
 
-from netbox_bgp.choices import CommunityStatusChoices, SessionStatusChoices
+from netbox_bgp.choices import (
+    CommunityStatusChoices, PairingStatusChoices, SessionStateChoices, SessionStatusChoices
+)
+from netbox_bgp.pairing import get_pairing, get_peer_sessions
+
+
+# Stand-in primary key used to reverse a URL template once per view name
+URL_TEMPLATE_PK = 2147483647
+
+
+class CachedHyperlinkedIdentityField(HyperlinkedIdentityField):
+    """
+    HyperlinkedIdentityField which reverses each view once per request and
+    builds subsequent URLs by substituting the lookup value into the result.
+    """
+    def get_url(self, obj, view_name, request, format):
+        if request is None or format or obj.pk in (None, ''):
+            return super().get_url(obj, view_name, request, format)
+        templates = request.__dict__.setdefault('_netbox_bgp_url_templates', {})
+        if view_name not in templates:
+            url = self.reverse(
+                view_name, kwargs={self.lookup_url_kwarg: URL_TEMPLATE_PK}, request=request, format=None
+            )
+            templates[view_name] = url.rsplit(str(URL_TEMPLATE_PK), 1)
+        prefix, suffix = templates[view_name]
+        return f'{prefix}{getattr(obj, self.lookup_field)}{suffix}'
+
+
+class SelectableFieldsMixin:
+    """
+    Serialize only the fields listed under ``requested_fields`` in the serializer
+    context, when present.
+    """
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get('requested_fields')
+        if requested:
+            fields = fields.__class__(
+                (name, field) for name, field in fields.items() if name in requested
+            )
+        return fields
 
 
 class SerializedPKRelatedField(PrimaryKeyRelatedField):
@@ -25,18 +66,23 @@ class SerializedPKRelatedField(PrimaryKeyRelatedField):
         self.pk_field = kwargs.pop('pk_field', None)
         super().__init__(**kwargs)
 
+    @cached_property
+    def nested_serializer(self):
+        # Built once per bound field rather than once per related object
+        return self.serializer(context=self.context)
+
     def to_representation(self, value):
-        return self.serializer(value, context={'request': self.context['request']}).data
+        return self.nested_serializer.to_representation(value)
 
 
-class RoutingPolicySerializer(NetBoxModelSerializer):
+class RoutingPolicySerializer(SelectableFieldsMixin, NetBoxModelSerializer):
     class Meta:
         model = RoutingPolicy        
         fields = ['id', 'name', 'description', 'tags', 'custom_fields']
 
 
 class NestedRoutingPolicySerializer(WritableNestedSerializer):
-    url = HyperlinkedIdentityField(view_name='plugins:netbox_bgp:routingpolicy')
+    url = CachedHyperlinkedIdentityField(view_name='plugins:netbox_bgp:routingpolicy')
 
     class Meta:
         model = RoutingPolicy
@@ -44,7 +90,7 @@ class NestedRoutingPolicySerializer(WritableNestedSerializer):
         validators = []
 
 
-class BGPPeerGroupSerializer(NetBoxModelSerializer):
+class BGPPeerGroupSerializer(SelectableFieldsMixin, NetBoxModelSerializer):
     import_policies = SerializedPKRelatedField(
         queryset=RoutingPolicy.objects.all(),
         serializer=NestedRoutingPolicySerializer,
@@ -66,7 +112,7 @@ class BGPPeerGroupSerializer(NetBoxModelSerializer):
 
 
 class NestedBGPPeerGroupSerializer(WritableNestedSerializer):
-    url = HyperlinkedIdentityField(view_name='plugins:netbox_bgp:bgppeergroup')
+    url = CachedHyperlinkedIdentityField(view_name='plugins:netbox_bgp:bgppeergroup')
 
     class Meta:
         model = BGPPeerGroup
@@ -74,7 +120,7 @@ class NestedBGPPeerGroupSerializer(WritableNestedSerializer):
         validators = []
 
 
-class BGPSessionSerializer(NetBoxModelSerializer):
+class BGPSessionSerializer(SelectableFieldsMixin, NetBoxModelSerializer):
     status = ChoiceField(choices=SessionStatusChoices, required=False)
     site = NestedSiteSerializer(required=False, allow_null=True)
     tenant = NestedTenantSerializer(required=False, allow_null=True)
@@ -99,6 +145,10 @@ class BGPSessionSerializer(NetBoxModelSerializer):
         many=True
     )
 
+    peer_session = SerializerMethodField(read_only=True)
+    pairing_status = SerializerMethodField(read_only=True)
+    state = SerializerMethodField(read_only=True)
+
     class Meta:
         model = BGPSession
         fields = [
@@ -107,28 +157,65 @@ class BGPSessionSerializer(NetBoxModelSerializer):
             'device', 'local_address', 'remote_address',
             'local_as', 'remote_as', 'peer_group', 'import_policies',
             'export_policies', 'created', 'last_updated',
-            'name', 'description'
+            'name', 'description', 'peer_session', 'pairing_status', 'state'
             ]
 
+    def get_peer_session(self, instance):
+        peers = self.context.setdefault('peer_sessions', {})
+        if instance.pk not in peers:
+            # Look up the reciprocal sessions of the whole page at once
+            sessions = [instance]
+            if isinstance(self.parent, ListSerializer) and self.parent.instance is not None:
+                sessions = list(self.parent.instance)
+                if instance not in sessions:
+                    sessions = [instance]
+            request = self.context.get('request')
+            found = get_peer_sessions(sessions, getattr(request, 'user', None))
+            peers.update({session.pk: found.get(session.pk) for session in sessions})
+        peer = peers.get(instance.pk)
+        if peer is None:
+            return None
+        return NestedBGPSessionSerializer(peer, context=self.context).data
+
+    def get_state(self, instance):
+        try:
+            state = instance.state
+        except BGPSessionState.DoesNotExist:
+            return None
+        return {
+            'state': {'value': state.state, 'label': dict(SessionStateChoices).get(state.state, state.state)},
+            'prefixes_received': state.prefixes_received,
+            'prefixes_sent': state.prefixes_sent,
+            'source': state.source,
+            'last_change': state.last_change,
+            'updated': state.updated,
+        }
+
+    def get_pairing_status(self, instance):
+        pairing = get_pairing(instance)
+        if pairing is None:
+            return None
+        return {'value': pairing.status, 'label': dict(PairingStatusChoices)[pairing.status]}
+
 
     def to_representation(self, instance):
         ret = super().to_representation(instance)
 
-        if instance is not None:
-            if instance.peer_group:
-                for pol in instance.peer_group.import_policies.difference(instance.import_policies.all()):
-                    ret['import_policies'].append(
-                        NestedRoutingPolicySerializer(pol, context={'request': self.context['request']}).data
-                    )
-                for pol in instance.peer_group.export_policies.difference(instance.export_policies.all()):
-                    ret['export_policies'].append(
-                        NestedRoutingPolicySerializer(pol, context={'request': self.context['request']}).data
-                    )
+        names = [name for name in ('import_policies', 'export_policies') if name in ret]
+        if instance is not None and names and instance.peer_group:
+            # add the peer group policies not assigned to the session directly
+            for name in names:
+                nested = self.fields[name].child_relation
+                assigned = {pol.pk for pol in getattr(instance, name).all()}
+                for pol in getattr(instance.peer_group, name).all():
+                    if pol.pk not in assigned:
+                        assigned.add(pol.pk)
+                        ret[name].append(nested.to_representation(pol))
         return ret
 
 
 class NestedBGPSessionSerializer(WritableNestedSerializer):
-    url = HyperlinkedIdentityField(view_name='plugins:netbox_bgp:bgpsession')
+    url = CachedHyperlinkedIdentityField(view_name='plugins:netbox_bgp:bgpsession')
 
     class Meta:
         model = BGPSession
@@ -136,7 +223,7 @@ class NestedBGPSessionSerializer(WritableNestedSerializer):
         validators = []
 
 
-class CommunitySerializer(NetBoxModelSerializer):
+class CommunitySerializer(SelectableFieldsMixin, NetBoxModelSerializer):
     status = ChoiceField(choices=CommunityStatusChoices, required=False)
     tenant = NestedTenantSerializer(required=False, allow_null=True)
 
@@ -150,7 +237,7 @@ class CommunitySerializer(NetBoxModelSerializer):
         ]
 
 class NestedCommunitySerializer(WritableNestedSerializer):
-    url = HyperlinkedIdentityField(view_name='plugins:netbox_bgp:community')
+    url = CachedHyperlinkedIdentityField(view_name='plugins:netbox_bgp:community')
 
     class Meta:
         model = Community
@@ -160,20 +247,20 @@ class NestedCommunitySerializer(WritableNestedSerializer):
 
 
 class NestedPrefixListSerializer(WritableNestedSerializer):
-    url = HyperlinkedIdentityField(view_name='plugins:netbox_bgp:prefixlist')
+    url = CachedHyperlinkedIdentityField(view_name='plugins:netbox_bgp:prefixlist')
 
     class Meta:
         model = PrefixList
         fields = ['id', 'url', 'display', 'name']
 
 
-class PrefixListSerializer(NetBoxModelSerializer):
+class PrefixListSerializer(SelectableFieldsMixin, NetBoxModelSerializer):
     class Meta:
         model = PrefixList
         fields = ['id', 'name', 'display','description', 'family', 'tags', 'custom_fields']
 
 
-class RoutingPolicyRuleSerializer(NetBoxModelSerializer):
+class RoutingPolicyRuleSerializer(SelectableFieldsMixin, NetBoxModelSerializer):
     match_ip_address = SerializedPKRelatedField(
         queryset=PrefixList.objects.all(),
         serializer=NestedPrefixListSerializer,
@@ -200,7 +287,7 @@ class RoutingPolicyRuleSerializer(NetBoxModelSerializer):
         ]
 
 
-class PrefixListRuleSerializer(NetBoxModelSerializer):
+class PrefixListRuleSerializer(SelectableFieldsMixin, NetBoxModelSerializer):
     prefix_list = NestedPrefixListSerializer()  
     prefix = NestedPrefixSerializer(required=False, allow_null=True)
     prefix_custom = IPNetworkField(required=False, allow_null=True)
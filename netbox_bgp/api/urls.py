@@ -2,7 +2,8 @@ from rest_framework import routers
 
 from .views import (
     BGPSessionViewSet, RoutingPolicyViewSet, BGPPeerGroupViewSet, CommunityViewSet,
-    PrefixListViewSet, PrefixListRuleViewSet, RoutingPolicyRuleViewSet
+    PrefixListViewSet, PrefixListRuleViewSet, RoutingPolicyRuleViewSet, SessionSummaryViewSet,
+    TopologyViewSet, DriftViewSet, DeviceSnapshotViewSet, ExportViewSet
 )
 
 router = routers.DefaultRouter()
@@ -15,6 +16,11 @@ router.register('bgppeergroup', BGPPeerGroupViewSet, 'bgppeergroup')
 router.register('community', CommunityViewSet)
 router.register('prefix-list', PrefixListViewSet)
 router.register('prefix-list-rule', PrefixListRuleViewSet)
+router.register('session-summary', SessionSummaryViewSet, 'session-summary')
+router.register('topology', TopologyViewSet, 'topology')
+router.register('drift', DriftViewSet, 'drift')
+router.register('device-snapshot', DeviceSnapshotViewSet, 'device-snapshot')
+router.register('export', ExportViewSet, 'export')
 
 
 urlpatterns = router.urls
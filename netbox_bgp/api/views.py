@@ -1,53 +1,441 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.functional import cached_property
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.viewsets import ViewSet
+
+from dcim.api.nested_serializers import NestedDeviceSerializer
+from dcim.models import Device
+from netbox.api.exceptions import ServiceUnavailable
 from netbox.api.viewsets import NetBoxModelViewSet
 
+from .renderers import MessagePackViewSetMixin
 from .serializers import (
     BGPSessionSerializer, RoutingPolicySerializer, BGPPeerGroupSerializer,
     CommunitySerializer, PrefixListSerializer, PrefixListRuleSerializer, RoutingPolicyRuleSerializer
 )
 from netbox_bgp.models import BGPSession, RoutingPolicy, BGPPeerGroup, Community, PrefixList, PrefixListRule, RoutingPolicyRule
+from netbox_bgp.choices import DriftKindChoices
+from netbox_bgp.drift import get_drift_report
+from netbox_bgp.export import EXPORT_FORMATS, EXPORT_TABLES, pyarrow, stream_export
 from netbox_bgp.filters import (
     BGPSessionFilterSet, RoutingPolicyFilterSet, BGPPeerGroupFilterSet,
     CommunityFilterSet, PrefixListFilterSet, PrefixListRuleFilterSet, RoutingPolicyRuleFilterSet
 )
+from netbox_bgp.instrumentation import InstrumentedViewSetMixin
+from netbox_bgp.signals import PERMISSIONS_VERSION, model_version
+from netbox_bgp.snapshot import SESSION_EXCLUDED_FIELDS, get_device_etag, get_device_snapshot
+from netbox_bgp.summary import get_session_summary, get_top
+from netbox_bgp.topology import NODE_KINDS, get_topology
+from netbox_bgp.utils import join_related
+from netbox_bgp.version import __version__
+from netbox_bgp.versioning import get_last_modified, get_versions
+
+
+API_PAGE_KEY = 'netbox_bgp:api_page:{}'
+
+
+class SelectableFieldsViewSetMixin:
+    """
+    Accept a ``fields`` query parameter (comma-separated) on read requests which limits
+    the serialized fields. ``related_fields`` maps serializer fields to the related
+    lookups they need; only the lookups of requested fields are joined.
+    """
+    related_fields = {}
+
+    @cached_property
+    def requested_fields(self):
+        if self.request.method not in SAFE_METHODS or getattr(self, 'brief', False):
+            return None
+        value = ','.join(self.request.query_params.getlist('fields'))
+        return {name.strip() for name in value.split(',') if name.strip()} or None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, 'brief', False):
+            return queryset
+        lookups = []
+        for name, field_lookups in self.related_fields.items():
+            if self.requested_fields is None or name in self.requested_fields:
+                lookups.extend(field_lookups)
+        return join_related(queryset, lookups)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.requested_fields:
+            context['requested_fields'] = self.requested_fields
+        return context
+
+
+class ConditionalListViewSetMixin:
+    """
+    Answer list requests conditionally. Responses carry an ETag and a Last-Modified date
+    derived from the change counters of the viewset's model, of the models listed in
+    ``version_models`` and of the users' permissions, which the signal handlers bump on
+    every write; requests whose If-None-Match or If-Modified-Since match are answered
+    with 304 Not Modified. When the ``api_cache_timeout`` setting is set, serialized pages
+    are cached by URL and ETag.
+    """
+    version_models = ()
 
+    def get_version_names(self):
+        return [
+            PERMISSIONS_VERSION,
+            *(model_version(label) for label in (self.queryset.model._meta.label_lower, *self.version_models)),
+        ]
 
-class BGPSessionViewSet(NetBoxModelViewSet):
+    def get_list_etag(self, request, versions):
+        scope = 'all' if request.user.is_superuser else f'user:{request.user.pk}'
+        value = ':'.join([
+            __version__, scope, request.accepted_renderer.format,
+            *(f'{name}={versions[name]}' for name in sorted(versions))
+        ])
+        return '"{}"'.format(hashlib.sha256(value.encode()).hexdigest()[:32])
+
+    def list(self, request, *args, **kwargs):
+        names = self.get_version_names()
+        # Read the versions before the data: a concurrent write then yields a stale ETag,
+        # which only costs the client a refetch, never a stale page
+        etag = self.get_list_etag(request, get_versions(names))
+        last_modified = get_last_modified(names).timestamp()
+        response = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+        if response is None:
+            response = self.get_cached_list(request, etag, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_cached_list(self, request, etag, *args, **kwargs):
+        timeout = settings.PLUGINS_CONFIG.get('netbox_bgp', {}).get('api_cache_timeout')
+        if not timeout:
+            return super().list(request, *args, **kwargs)
+        key = API_PAGE_KEY.format(hashlib.sha256(f'{etag}:{request.build_absolute_uri()}'.encode()).hexdigest())
+        data = cache.get(key)
+        if data is not None:
+            response = Response(data)
+            response['X-BGP-Cache'] = 'HIT'
+            return response
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout)
+        response['X-BGP-Cache'] = 'MISS'
+        return response
+
+
+class BGPSessionViewSet(
+    ConditionalListViewSetMixin, MessagePackViewSetMixin, InstrumentedViewSetMixin, SelectableFieldsViewSetMixin,
+    NetBoxModelViewSet
+):
     queryset = BGPSession.objects.all()
     serializer_class = BGPSessionSerializer
     filterset_class = BGPSessionFilterSet
+    version_models = (
+        'netbox_bgp.bgppeergroup', 'netbox_bgp.routingpolicy', 'netbox_bgp.bgpsessionstate',
+        'dcim.device', 'dcim.site', 'tenancy.tenant', 'ipam.ipaddress', 'ipam.asn', 'extras.tag',
+    )
+    related_fields = {
+        'display': ('device',),
+        'site': ('site',),
+        'tenant': ('tenant',),
+        'device': ('device',),
+        'local_address': ('local_address',),
+        'remote_address': ('remote_address',),
+        'local_as': ('local_as',),
+        'remote_as': ('remote_as',),
+        'peer_group': ('peer_group',),
+        'import_policies': ('import_policies', 'peer_group__import_policies'),
+        'export_policies': ('export_policies', 'peer_group__export_policies'),
+        'tags': ('tags',),
+        'state': ('state',),
+        'peer_session': ('pairing',),
+        'pairing_status': ('pairing',),
+    }
 
 
-class RoutingPolicyViewSet(NetBoxModelViewSet):
+class RoutingPolicyViewSet(
+    ConditionalListViewSetMixin, MessagePackViewSetMixin, InstrumentedViewSetMixin, SelectableFieldsViewSetMixin,
+    NetBoxModelViewSet
+):
     queryset = RoutingPolicy.objects.all()
     serializer_class = RoutingPolicySerializer
     filterset_class = RoutingPolicyFilterSet
+    version_models = ('extras.tag',)
+    related_fields = {
+        'tags': ('tags',),
+    }
 
 
-class RoutingPolicyRuleViewSet(NetBoxModelViewSet):
+class RoutingPolicyRuleViewSet(
+    ConditionalListViewSetMixin, MessagePackViewSetMixin, InstrumentedViewSetMixin, SelectableFieldsViewSetMixin,
+    NetBoxModelViewSet
+):
     queryset = RoutingPolicyRule.objects.all()
     serializer_class = RoutingPolicyRuleSerializer
     filterset_class = RoutingPolicyRuleFilterSet
+    version_models = (
+        'netbox_bgp.routingpolicy', 'netbox_bgp.community', 'netbox_bgp.prefixlist', 'extras.tag',
+    )
+    related_fields = {
+        'display': ('routing_policy',),
+        'routing_policy': ('routing_policy',),
+        'match_community': ('match_community',),
+        'match_ip_address': ('match_ip_address',),
+        'match_ipv6_address': ('match_ipv6_address',),
+        'tags': ('tags',),
+    }
 
 
-class BGPPeerGroupViewSet(NetBoxModelViewSet):
+class BGPPeerGroupViewSet(
+    ConditionalListViewSetMixin, MessagePackViewSetMixin, InstrumentedViewSetMixin, SelectableFieldsViewSetMixin,
+    NetBoxModelViewSet
+):
     queryset = BGPPeerGroup.objects.all()
     serializer_class = BGPPeerGroupSerializer
     filterset_class = BGPPeerGroupFilterSet
+    version_models = ('netbox_bgp.routingpolicy', 'extras.tag')
+    related_fields = {
+        'import_policies': ('import_policies',),
+        'export_policies': ('export_policies',),
+    }
 
 
-class CommunityViewSet(NetBoxModelViewSet):
+class CommunityViewSet(
+    ConditionalListViewSetMixin, MessagePackViewSetMixin, InstrumentedViewSetMixin, SelectableFieldsViewSetMixin,
+    NetBoxModelViewSet
+):
     queryset = Community.objects.all()
     serializer_class = CommunitySerializer
     filterset_class = CommunityFilterSet
+    version_models = ('tenancy.tenant', 'extras.tag')
+    related_fields = {
+        'tenant': ('tenant',),
+        'tags': ('tags',),
+    }
 
 
-class PrefixListViewSet(NetBoxModelViewSet):
+class PrefixListViewSet(
+    ConditionalListViewSetMixin, MessagePackViewSetMixin, InstrumentedViewSetMixin, SelectableFieldsViewSetMixin,
+    NetBoxModelViewSet
+):
     queryset = PrefixList.objects.all()
     serializer_class = PrefixListSerializer
     filterset_class = PrefixListFilterSet
+    version_models = ('extras.tag',)
+    related_fields = {
+        'tags': ('tags',),
+    }
+
 
-class PrefixListRuleViewSet(NetBoxModelViewSet):
-  
+class PrefixListRuleViewSet(
+    ConditionalListViewSetMixin, MessagePackViewSetMixin, InstrumentedViewSetMixin, SelectableFieldsViewSetMixin,
+    NetBoxModelViewSet
+):
     queryset = PrefixListRule.objects.all()
     serializer_class = PrefixListRuleSerializer
     filterset_class = PrefixListRuleFilterSet
+    version_models = ('netbox_bgp.prefixlist', 'ipam.prefix', 'extras.tag')
+    related_fields = {
+        'display': ('prefix_list',),
+        'prefix_list': ('prefix_list',),
+        'prefix': ('prefix',),
+        'tags': ('tags',),
+    }
+
+
+class TopologyViewSet(MessagePackViewSetMixin, ViewSet):
+    """
+    Graph of devices, ASNs and peer groups linked by BGP sessions, as JSON or, with
+    ``?export=graphml``, as GraphML.
+    """
+    # Used by the permission checks: the graph requires the view permission of sessions
+    queryset = BGPSession.objects.all()
+
+    def get_view_name(self):
+        return 'BGP Topology'
+
+    def list(self, request):
+        graph = get_topology(request.user)
+        if request.query_params.get('export') == 'graphml':
+            response = StreamingHttpResponse(graph.iter_graphml(), content_type='application/graphml+xml')
+            response['Content-Disposition'] = 'attachment; filename="bgp-topology.graphml"'
+            return response
+        return Response(graph.as_dict())
+
+    @action(detail=False)
+    def neighbors(self, request):
+        """Neighbors of the node given by ``kind`` (device, asn or peer_group) and ``id``."""
+        kind = request.query_params.get('kind')
+        object_id = request.query_params.get('id', '')
+        if kind not in NODE_KINDS or not object_id.isdigit():
+            raise ValidationError(f'kind ({", ".join(NODE_KINDS)}) and a numeric id are required')
+        graph = get_topology(request.user)
+        node = graph.get_node(kind, int(object_id))
+        if node is None:
+            raise NotFound(f'No {kind} {object_id} in the BGP topology')
+        return Response({
+            'node': graph.node_data(node),
+            'neighbors': [
+                dict(graph.node_data(neighbor), sessions=sessions) for neighbor, sessions in graph.neighbors(node)
+            ],
+        })
+
+
+class SessionSummaryViewSet(MessagePackViewSetMixin, ViewSet):
+    """
+    Session counts in total, by status and by site, tenant, remote AS and peer group.
+    Accepts the session filters and ``top``, the number of entries per group.
+    """
+    queryset = BGPSession.objects.all()
+
+    def get_view_name(self):
+        return 'BGP Session Summary'
+
+    def list(self, request):
+        try:
+            summary = get_session_summary(
+                request.user, request.query_params, top=get_top(request.query_params.get('top'))
+            )
+        except ValueError as e:
+            raise ValidationError(e.args[0])
+        return Response(summary)
+
+
+class DriftViewSet(MessagePackViewSetMixin, ViewSet):
+    """
+    Drift between the BGP sessions and the neighbors observed on devices: counts by kind
+    and the entries, filtered by ``device_id`` and ``kind`` and paged by ``offset`` and
+    ``limit``.
+    """
+    queryset = BGPSession.objects.all()
+
+    def get_view_name(self):
+        return 'BGP Drift'
+
+    def list(self, request):
+        params = request.query_params
+        kinds = params.getlist('kind')
+        invalid = set(kinds) - set(DriftKindChoices.values())
+        device_ids = params.getlist('device_id')
+        if invalid or not all(device_id.isdigit() for device_id in device_ids):
+            raise ValidationError(
+                f'kind must be one of {", ".join(DriftKindChoices.values())} and device_id numeric'
+            )
+        devices = Device.objects.restrict(request.user, 'view')
+        if device_ids:
+            devices = devices.filter(pk__in=device_ids)
+        offset = params.get('offset', '')
+        return Response(get_drift_report(
+            devices=devices,
+            kinds=kinds,
+            offset=int(offset) if offset.isdigit() else 0,
+            limit=get_top(params.get('limit')),
+        ))
+
+
+class DeviceSnapshotViewSet(MessagePackViewSetMixin, ViewSet):
+    """
+    Everything BGP-related for the device of the given id: its sessions, peer groups,
+    routing policies and rules, prefix lists and rules and communities. Responses carry a
+    strong ETag which changes with the device's BGP data; requests with a matching
+    If-None-Match header are answered with 304 Not Modified.
+    """
+    queryset = BGPSession.objects.all()
+
+    def get_view_name(self):
+        return 'BGP Device Snapshot'
+
+    def get_serializers(self):
+        # Serializer class and related lookups of each part of the snapshot
+        return {
+            'sessions': (BGPSessionSerializer, BGPSessionViewSet.related_fields),
+            'peer_groups': (BGPPeerGroupSerializer, BGPPeerGroupViewSet.related_fields),
+            'routing_policies': (RoutingPolicySerializer, RoutingPolicyViewSet.related_fields),
+            'routing_policy_rules': (RoutingPolicyRuleSerializer, RoutingPolicyRuleViewSet.related_fields),
+            'prefix_lists': (PrefixListSerializer, PrefixListViewSet.related_fields),
+            'prefix_list_rules': (PrefixListRuleSerializer, PrefixListRuleViewSet.related_fields),
+            'communities': (CommunitySerializer, CommunityViewSet.related_fields),
+        }
+
+    def retrieve(self, request, pk):
+        if not pk.isdigit():
+            raise NotFound()
+        # Read the versions before the data: a concurrent write then yields a stale ETag,
+        # which only costs the client a refetch, never a stale snapshot
+        etag = get_device_etag(int(pk), request.user, request.accepted_renderer.format)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')) or \
+                request.headers.get('If-None-Match') == '*':
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            device = get_object_or_404(Device.objects.restrict(request.user, 'view'), pk=pk)
+            snapshot = get_device_snapshot(device, request.user)
+            data = {'device': NestedDeviceSerializer(device, context={'request': request}).data}
+            for name, (serializer_class, related_fields) in self.get_serializers().items():
+                context = {'request': request}
+                if name == 'sessions':
+                    context['requested_fields'] = set(serializer_class.Meta.fields) - set(SESSION_EXCLUDED_FIELDS)
+                queryset = join_related(snapshot[name], [
+                    lookup for field, lookups in related_fields.items()
+                    if field in context.get('requested_fields', related_fields)
+                    for lookup in lookups
+                ])
+                data[name] = serializer_class(queryset, many=True, context=context).data
+            response = Response(data)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        # The representation, and so the ETag, depends on the negotiated format
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+
+class ExportViewSet(MessagePackViewSetMixin, ViewSet):
+    """
+    Columnar export of sessions, communities and routing policy and prefix list rules,
+    with foreign keys as id columns. The list gives the tables and their columns; a table
+    is streamed as Parquet or, with ``?type=arrow``, as an Arrow IPC stream. Requires
+    pyarrow.
+    """
+    # Used by the permission checks; the exported rows are restricted per table
+    queryset = BGPSession.objects.all()
+
+    def get_view_name(self):
+        return 'BGP Export'
+
+    def list(self, request):
+        return Response({
+            name: {
+                'url': request.build_absolute_uri(f'{name}/'),
+                'columns': [column.name for column in columns],
+            }
+            for name, (model, columns) in EXPORT_TABLES.items()
+        })
+
+    def retrieve(self, request, pk):
+        if pk not in EXPORT_TABLES:
+            raise NotFound(f'Unknown table, expected one of: {", ".join(EXPORT_TABLES)}')
+        export_format = request.query_params.get('type', 'parquet')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(f'type must be one of: {", ".join(EXPORT_FORMATS)}')
+        if pyarrow is None:
+            raise ServiceUnavailable('pyarrow is not installed')
+        model, _ = EXPORT_TABLES[pk]
+        if not request.user.has_perm(f'{model._meta.app_label}.view_{model._meta.model_name}'):
+            raise PermissionDenied()
+        queryset = model.objects.restrict(request.user, 'view')
+        if export_format == 'parquet':
+            content_type, filename = 'application/vnd.apache.parquet', f'bgp-{pk}.parquet'
+        else:
+            content_type, filename = 'application/vnd.apache.arrow.stream', f'bgp-{pk}.arrows'
+        response = StreamingHttpResponse(stream_export(pk, export_format, queryset), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -0,0 +1,216 @@
+import uuid
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+
+from extras.choices import ObjectChangeActionChoices
+from extras.models import TaggedItem
+
+from .jobs import JobProgress
+from .pairing import deferred_pairing, update_pairing
+from .signals import get_changed_versions
+from .utils import bulk_log_changes, get_change_data, get_many_to_many_data, join_related, set_many_to_many
+from .versioning import bump_data_version, bump_versions, deferred_bumps
+
+
+CHUNK_SIZE = 1000
+
+# Relations rendered by the models' __str__(), used for change log representations
+DISPLAY_RELATIONS = {
+    'netbox_bgp.bgpsession': ('device',),
+    'netbox_bgp.prefixlistrule': ('prefix_list',),
+    'netbox_bgp.routingpolicyrule': ('routing_policy',),
+}
+
+# Session fields which decide the pairing of sessions
+PAIRING_FIELDS = {'local_address', 'remote_address', 'local_as', 'remote_as'}
+
+
+def get_bulk_edit_changes(model, form, nullified_fields):
+    """
+    Serialize the changes of a valid bulk edit form so they can be passed to a background
+    job: model instances become primary keys and custom fields are serialized. Nullified
+    fields which do not accept NULL are emptied instead, as BulkEditView does.
+    """
+    changes, custom_fields = {}, {}
+    form_custom_fields = getattr(form, 'custom_fields', {})
+    for name in form.fields:
+        if name in ('pk', 'add_tags', 'remove_tags'):
+            continue
+        value = form.cleaned_data.get(name)
+        if name in form_custom_fields:
+            customfield = form_custom_fields[name]
+            if name in nullified_fields:
+                custom_fields[customfield.name] = None
+            elif value not in (None, '', []):
+                custom_fields[customfield.name] = customfield.serialize(value)
+            continue
+        if name in nullified_fields:
+            field = model._meta.get_field(name)
+            changes[name] = None if field.null or field.many_to_many else ''
+        elif isinstance(value, models.Model):
+            changes[name] = value.pk
+        elif isinstance(value, models.QuerySet):
+            if value.exists():
+                changes[name] = list(value.values_list('pk', flat=True))
+        elif value not in (None, '', []):
+            changes[name] = value
+    return {
+        'fields': changes,
+        'custom_fields': custom_fields,
+        'add_tags': [tag.pk for tag in form.cleaned_data.get('add_tags') or []],
+        'remove_tags': [tag.pk for tag in form.cleaned_data.get('remove_tags') or []],
+    }
+
+
+def _chunks(pks):
+    for start in range(0, len(pks), CHUNK_SIZE):
+        yield pks[start:start + CHUNK_SIZE]
+
+
+def bulk_delete(job_id, user_id, model_label, pks):
+    """
+    Background job: delete objects in chunks of CHUNK_SIZE, each in its own transaction,
+    logging the deletions with bulk-created change records.
+    """
+    progress = JobProgress.get(job_id)
+    user = get_user_model().objects.get(pk=user_id)
+    model = apps.get_model(model_label)
+    queryset = model.objects.restrict(user, 'delete')
+    # Tags are prefetched for the change records
+    display_relations = (*DISPLAY_RELATIONS.get(model._meta.label_lower, ()), 'tags')
+    request_id = uuid.uuid4()
+    progress.start(total=len(pks))
+    deleted = 0
+    try:
+        with deferred_bumps(), deferred_pairing():
+            for chunk in _chunks(pks):
+                with transaction.atomic():
+                    instances = list(join_related(queryset.filter(pk__in=chunk), display_relations))
+                    m2m_data = get_many_to_many_data(model, [instance.pk for instance in instances])
+                    prechange = {
+                        instance.pk: get_change_data(instance, extra=m2m_data[instance.pk]) for instance in instances
+                    }
+                    # Log before deleting, while the instances still have their primary keys
+                    bulk_log_changes(
+                        instances, ObjectChangeActionChoices.ACTION_DELETE, user, request_id, prechange=prechange
+                    )
+                    queryset.filter(pk__in=chunk).delete()
+                    bump_data_version()
+                    bump_versions(get_changed_versions(model, instances))
+                deleted += len(instances)
+                progress.advance(len(chunk))
+    except models.ProtectedError as e:
+        progress.fail(
+            f'Deleted {deleted} {model._meta.verbose_name_plural}; the rest are protected by dependent objects',
+            errors=[str(obj) for obj in list(e.protected_objects)[:100]]
+        )
+        return
+    except Exception as e:
+        progress.fail(f'Deleted {deleted} {model._meta.verbose_name_plural} before failing: {e}')
+        raise
+    progress.complete(f'Deleted {deleted} {model._meta.verbose_name_plural}')
+
+
+def bulk_edit(job_id, user_id, model_label, pks, changes):
+    """
+    Background job: apply the changes serialized by get_bulk_edit_changes() in chunked
+    transactions with bulk_update(), logging them with bulk-created change records.
+    """
+    progress = JobProgress.get(job_id)
+    user = get_user_model().objects.get(pk=user_id)
+    model = apps.get_model(model_label)
+    queryset = model.objects.restrict(user, 'change')
+    display_relations = (*DISPLAY_RELATIONS.get(model._meta.label_lower, ()), 'tags')
+    content_type = ContentType.objects.get_for_model(model)
+    request_id = uuid.uuid4()
+
+    fields = [model._meta.get_field(name) for name in changes['fields']]
+    concrete_fields = [field for field in fields if field.concrete and not field.many_to_many]
+    m2m_fields = [field for field in fields if field.many_to_many]
+    update_fields = [field.name for field in concrete_fields] + ['last_updated']
+    if changes['custom_fields']:
+        update_fields.append('custom_field_data')
+    exclude = [field.name for field in model._meta.concrete_fields if field.name not in changes['fields']]
+
+    progress.start(total=len(pks))
+    updated = 0
+    errors = []
+    try:
+        with deferred_bumps(), deferred_pairing():
+            for chunk in _chunks(pks):
+                with transaction.atomic():
+                    instances = list(join_related(queryset.filter(pk__in=chunk), display_relations))
+                    pks = [instance.pk for instance in instances]
+                    m2m_data = get_many_to_many_data(model, pks)
+                    prechange = {
+                        instance.pk: get_change_data(instance, extra=m2m_data[instance.pk]) for instance in instances
+                    }
+                    versions = get_changed_versions(model, instances)
+                    now = timezone.now()
+                    for instance in instances:
+                        for field in concrete_fields:
+                            setattr(instance, field.attname, changes['fields'][field.name])
+                        instance.custom_field_data.update(changes['custom_fields'])
+                        instance.last_updated = now
+                        try:
+                            # Like BulkEditView; unchanged fields are left out of the field
+                            # and uniqueness checks
+                            instance.full_clean(exclude=exclude)
+                        except ValidationError as e:
+                            errors.extend(f'{instance}: {field}: {" ".join(messages)}'
+                                          for field, messages in e.message_dict.items())
+                    if errors:
+                        raise ValidationError(errors)
+                    model.objects.bulk_update(instances, update_fields)
+                    for field in m2m_fields:
+                        values = sorted(changes['fields'][field.name] or [])
+                        set_many_to_many(field, pks, values)
+                        for instance_data in m2m_data.values():
+                            instance_data[field.name] = values
+                    if changes['remove_tags']:
+                        TaggedItem.objects.filter(
+                            content_type=content_type, object_id__in=chunk, tag_id__in=changes['remove_tags']
+                        ).delete()
+                    if changes['add_tags']:
+                        tagged = set(TaggedItem.objects.filter(
+                            content_type=content_type, object_id__in=chunk, tag_id__in=changes['add_tags']
+                        ).values_list('object_id', 'tag_id'))
+                        TaggedItem.objects.bulk_create([
+                            TaggedItem(content_type=content_type, object_id=instance.pk, tag_id=tag)
+                            for instance in instances for tag in changes['add_tags']
+                            if (instance.pk, tag) not in tagged
+                        ])
+                    if changes['add_tags'] or changes['remove_tags']:
+                        for instance in instances:
+                            instance._prefetched_objects_cache.pop('tags', None)
+                        prefetch_related_objects(instances, 'tags')
+                    bulk_log_changes(
+                        instances, ObjectChangeActionChoices.ACTION_UPDATE, user, request_id,
+                        prechange=prechange,
+                        postchange={
+                            instance.pk: get_change_data(instance, extra=m2m_data[instance.pk]) for instance in instances
+                        }
+                    )
+                    # bulk_update() sends no signals
+                    if model._meta.label_lower == 'netbox_bgp.bgpsession' and PAIRING_FIELDS & set(changes['fields']):
+                        update_pairing(chunk)
+                    bump_data_version()
+                    bump_versions(versions | get_changed_versions(model, instances))
+                updated += len(instances)
+                progress.advance(len(chunk))
+    except ValidationError:
+        progress.fail(
+            f'Updated {updated} {model._meta.verbose_name_plural}; validation failed for the next chunk',
+            errors=errors[:100]
+        )
+        return
+    except Exception as e:
+        progress.fail(f'Updated {updated} {model._meta.verbose_name_plural} before failing: {e}')
+        raise
+    progress.complete(f'Updated {updated} {model._meta.verbose_name_plural}')
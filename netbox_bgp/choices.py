@@ -29,6 +29,53 @@ class SessionStatusChoices(ChoiceSet):
     )
 
 
+class SessionStateChoices(ChoiceSet):
+
+    STATE_IDLE = 'idle'
+    STATE_CONNECT = 'connect'
+    STATE_ACTIVE = 'active'
+    STATE_OPENSENT = 'opensent'
+    STATE_OPENCONFIRM = 'openconfirm'
+    STATE_ESTABLISHED = 'established'
+
+    CHOICES = (
+        (STATE_IDLE, 'Idle', 'red'),
+        (STATE_CONNECT, 'Connect', 'orange'),
+        (STATE_ACTIVE, 'Active', 'orange'),
+        (STATE_OPENSENT, 'OpenSent', 'yellow'),
+        (STATE_OPENCONFIRM, 'OpenConfirm', 'yellow'),
+        (STATE_ESTABLISHED, 'Established', 'green'),
+    )
+
+
+class DriftKindChoices(ChoiceSet):
+
+    KIND_MISSING = 'missing'
+    KIND_UNEXPECTED = 'unexpected'
+    KIND_MISMATCHED = 'mismatched'
+
+    CHOICES = (
+        (KIND_MISSING, 'Missing', 'red'),
+        (KIND_UNEXPECTED, 'Unexpected', 'orange'),
+        (KIND_MISMATCHED, 'Mismatched', 'yellow'),
+    )
+
+
+class PairingStatusChoices(ChoiceSet):
+
+    STATUS_PAIRED = 'paired'
+    STATUS_MISMATCHED = 'mismatched'
+    STATUS_AMBIGUOUS = 'ambiguous'
+    STATUS_UNPAIRED = 'unpaired'
+
+    CHOICES = (
+        (STATUS_PAIRED, 'Paired', 'green'),
+        (STATUS_MISMATCHED, 'Mismatched', 'red'),
+        (STATUS_AMBIGUOUS, 'Ambiguous', 'orange'),
+        (STATUS_UNPAIRED, 'Unpaired', 'gray'),
+    )
+
+
 class ActionChoices(ChoiceSet):
 
     CHOICES = [
@@ -83,3 +130,16 @@ class IPAddressFamilyChoices(ChoiceSet):
         (FAMILY_4, 'IPv4'),
         (FAMILY_6, 'IPv6'),
     )
+
+
+class ImportFormatChoices(ChoiceSet):
+
+    CSV = 'csv'
+    JSON = 'json'
+    YAML = 'yaml'
+
+    CHOICES = (
+        (CSV, 'CSV'),
+        (JSON, 'JSON'),
+        (YAML, 'YAML'),
+    )
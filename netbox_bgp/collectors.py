@@ -0,0 +1,273 @@
+import asyncio
+import glob
+import json
+import os
+from collections import namedtuple
+
+import netaddr
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .choices import SessionStateChoices
+from .models import BGPSession, BGPSessionState
+from .signals import model_version
+from .versioning import bump_versions
+
+
+STORE_BATCH_SIZE = 5000
+
+# Operational state of one session; sessions are identified either by session_id or by
+# the name of their device and their remote address. remote_as, local_address and
+# peer_group are the observed configuration, when the source reports it.
+StateRecord = namedtuple(
+    'StateRecord',
+    (
+        'session_id', 'device', 'remote_address', 'state', 'prefixes_received', 'prefixes_sent',
+        'remote_as', 'local_address', 'peer_group',
+    ),
+    defaults=(None,) * 9
+)
+
+
+def parse_state(data):
+    """Return a StateRecord for a dict reported by a collector, or raise ValueError."""
+    state = str(data.get('state', '')).lower()
+    if state not in SessionStateChoices.values():
+        raise ValueError(f'Invalid state "{data.get("state")}"')
+    if data.get('session_id') is None and not (data.get('device') and data.get('remote_address')):
+        raise ValueError('Either session_id or device and remote_address are required')
+    counters = []
+    for field in ('prefixes_received', 'prefixes_sent', 'remote_as'):
+        value = data.get(field)
+        counters.append(None if value in (None, '') else int(value))
+    return StateRecord(
+        session_id=None if data.get('session_id') is None else int(data['session_id']),
+        device=data.get('device'),
+        remote_address=data.get('remote_address'),
+        state=state,
+        prefixes_received=counters[0],
+        prefixes_sent=counters[1],
+        remote_as=counters[2],
+        local_address=data.get('local_address') or None,
+        peer_group=data.get('peer_group') or None,
+    )
+
+
+def parse_states(items, errors):
+    """Parse a list of dicts (or a dict with a ``sessions`` list), collecting errors."""
+    if isinstance(items, dict):
+        items = items.get('sessions', [items])
+    records = []
+    for item in items:
+        try:
+            records.append(parse_state(item))
+        except (AttributeError, TypeError, ValueError) as e:
+            errors.append(f'{item!r}: {e}')
+    return records
+
+
+class SessionIndex:
+    """
+    Resolve StateRecords to session ids with dictionaries built by a single query:
+    ``(device name, remote address)`` to session id, addresses compared without mask length.
+    """
+    def __init__(self, queryset=None):
+        queryset = BGPSession.objects.all() if queryset is None else queryset
+        self.ids = set()
+        self.by_peer = {}
+        for pk, device, remote_address in queryset.order_by().values_list(
+            'pk', 'device__name', 'remote_address__address'
+        ).iterator(chunk_size=10000):
+            self.ids.add(pk)
+            if device is not None:
+                self.by_peer[(device, str(remote_address.ip))] = pk
+
+    def resolve(self, record):
+        if record.session_id is not None:
+            return record.session_id if record.session_id in self.ids else None
+        try:
+            host = str(netaddr.IPNetwork(str(record.remote_address)).ip)
+        except (netaddr.AddrFormatError, ValueError):
+            return None
+        return self.by_peer.get((record.device, host))
+
+
+class StateCollector:
+    """
+    Source of operational BGP state. Subclasses implement collect(), a coroutine returning
+    a list of StateRecords; errors which do not abort the collection are appended to
+    ``self.errors``.
+    """
+    name = None
+
+    def __init__(self, **kwargs):
+        self.errors = []
+
+    async def collect(self):
+        raise NotImplementedError
+
+    def __str__(self):
+        return self.name or self.__class__.__name__
+
+
+class FileCollector(StateCollector):
+    """
+    Read state from JSON files dropped in a directory, each holding a list of session
+    states. Files are removed once read when ``remove`` is set.
+    """
+    name = 'file'
+
+    def __init__(self, path, pattern='*.json', remove=False, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.pattern = pattern
+        self.remove = remove
+
+    def _read(self, filename):
+        with open(filename) as f:
+            data = json.load(f)
+        if self.remove:
+            os.remove(filename)
+        return data
+
+    async def collect(self):
+        loop = asyncio.get_running_loop()
+        filenames = sorted(glob.glob(os.path.join(self.path, self.pattern)))
+        # File I/O blocks, so read the files concurrently in the default executor
+        results = await asyncio.gather(
+            *(loop.run_in_executor(None, self._read, filename) for filename in filenames),
+            return_exceptions=True
+        )
+        records = []
+        for filename, result in zip(filenames, results):
+            if isinstance(result, Exception):
+                self.errors.append(f'{filename}: {result}')
+            else:
+                records.extend(parse_states(result, self.errors))
+        return records
+
+
+class JSONFeedCollector(StateCollector):
+    """
+    Read state from a feed of newline-delimited JSON objects served over TCP, such as a
+    BMP station exporting session state, until the feed closes the connection.
+    """
+    name = 'json-feed'
+
+    def __init__(self, host, port, timeout=30, **kwargs):
+        super().__init__(**kwargs)
+        self.host = host
+        self.port = int(port)
+        self.timeout = timeout
+
+    async def _read(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        records = []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    try:
+                        records.extend(parse_states(json.loads(line), self.errors))
+                    except json.JSONDecodeError as e:
+                        self.errors.append(f'{self.host}:{self.port}: {e}')
+        finally:
+            writer.close()
+        return records
+
+    async def collect(self):
+        return await asyncio.wait_for(self._read(), self.timeout)
+
+
+def get_collectors():
+    """
+    Instantiate the collectors listed in the ``state_collectors`` setting, each a dict with
+    the dotted path of its class under ``class`` and its keyword arguments.
+    """
+    config = settings.PLUGINS_CONFIG.get('netbox_bgp', {}).get('state_collectors') or []
+    collectors = []
+    for options in config:
+        options = dict(options)
+        collectors.append(import_string(options.pop('class'))(**options))
+    return collectors
+
+
+async def acollect_states(collectors):
+    """
+    Run the collectors concurrently. Returns the StateRecords of each collector (by name)
+    and the errors reported.
+    """
+    for collector in collectors:
+        collector.errors = []
+    results = await asyncio.gather(*(collector.collect() for collector in collectors), return_exceptions=True)
+    records, errors = {}, []
+    for collector, result in zip(collectors, results):
+        if isinstance(result, Exception):
+            errors.append(f'{collector}: {result!r}')
+            continue
+        records.setdefault(str(collector), []).extend(result)
+        errors.extend(f'{collector}: {error}' for error in collector.errors)
+    return records, errors
+
+
+def collect_states(collectors):
+    """Synchronous acollect_states(), running the collectors in a new event loop."""
+    return asyncio.run(acollect_states(collectors))
+
+
+def store_states(records, source='', index=None, now=None):
+    """
+    Write StateRecords to BGPSessionState with bulk upserts of STORE_BATCH_SIZE rows.
+    Returns the ids of the sessions whose state changed and the unresolved records.
+    """
+    index = SessionIndex() if index is None else index
+    now = now or timezone.now()
+    states = {}
+    unresolved = []
+    for record in records:
+        session_id = index.resolve(record)
+        if session_id is None:
+            unresolved.append(record)
+        else:
+            # The last report of a session wins
+            states[session_id] = record
+
+    changed = set()
+    session_ids = list(states)
+    for start in range(0, len(session_ids), STORE_BATCH_SIZE):
+        batch = session_ids[start:start + STORE_BATCH_SIZE]
+        previous = {
+            session_id: (state, last_change)
+            for session_id, state, last_change in BGPSessionState.objects.filter(
+                session_id__in=batch
+            ).values_list('session_id', 'state', 'last_change')
+        }
+        objects = []
+        for session_id in batch:
+            record = states[session_id]
+            previous_state, last_change = previous.get(session_id, (None, None))
+            if record.state != previous_state:
+                changed.add(session_id)
+                last_change = now
+            objects.append(BGPSessionState(
+                session_id=session_id,
+                state=record.state,
+                prefixes_received=record.prefixes_received,
+                prefixes_sent=record.prefixes_sent,
+                source=source,
+                last_change=last_change,
+                updated=now,
+            ))
+        BGPSessionState.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=['session'],
+            update_fields=['state', 'prefixes_received', 'prefixes_sent', 'source', 'last_change', 'updated'],
+        )
+    if states:
+        # Rendered in the session list, whose conditional responses depend on it
+        bump_versions([model_version(BGPSessionState._meta.label_lower)])
+    return changed, unresolved
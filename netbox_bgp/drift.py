@@ -0,0 +1,236 @@
+import hashlib
+import json
+
+import netaddr
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from dcim.models import Device
+
+from .choices import DriftKindChoices, SessionStateChoices, SessionStatusChoices
+from .models import BGPDeviceState, BGPDrift, BGPSession
+from .signals import device_version
+from .versioning import get_versions
+
+
+DRIFT_VERSIONS_KEY = 'netbox_bgp:drift:versions'
+DRIFT_BATCH_SIZE = 5000
+
+# Observed neighbor fields compared with the intended sessions. Prefix counts change on
+# every poll and are left out, so that only configuration and state changes mark a
+# device for recomputation.
+NEIGHBOR_FIELDS = ('remote_address', 'state', 'remote_as', 'local_address', 'peer_group')
+
+
+def _host(address):
+    try:
+        return str(netaddr.IPNetwork(str(address)).ip)
+    except (netaddr.AddrFormatError, ValueError):
+        return None
+
+
+def record_observations(records, now=None):
+    """
+    Store the neighbors observed on each device by StateRecords identifying their device.
+    A device's neighbors are replaced by those of the latest records; devices absent from
+    the records are left as they were. Returns the ids of the devices whose neighbors
+    changed.
+    """
+    now = now or timezone.now()
+    observed = {}
+    for record in records:
+        host = _host(record.remote_address) if record.device else None
+        if host is None:
+            continue
+        observed.setdefault(record.device, {})[host] = {
+            'remote_address': host,
+            'state': record.state,
+            'remote_as': record.remote_as,
+            'local_address': _host(record.local_address) if record.local_address else None,
+            'peer_group': record.peer_group,
+        }
+    if not observed:
+        return set()
+
+    devices = dict(Device.objects.filter(name__in=observed).values_list('name', 'pk'))
+    neighbors = {
+        devices[name]: [hosts[host] for host in sorted(hosts)]
+        for name, hosts in observed.items() if name in devices
+    }
+    previous = dict(
+        BGPDeviceState.objects.filter(device_id__in=neighbors).values_list('device_id', 'fingerprint')
+    )
+    changed = {}
+    for device_id, device_neighbors in neighbors.items():
+        fingerprint = hashlib.sha256(json.dumps(device_neighbors, sort_keys=True).encode()).hexdigest()
+        if previous.get(device_id) != fingerprint:
+            changed[device_id] = BGPDeviceState(
+                device_id=device_id, neighbors=device_neighbors, fingerprint=fingerprint, updated=now
+            )
+    BGPDeviceState.objects.bulk_create(
+        changed.values(),
+        batch_size=DRIFT_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['device'],
+        update_fields=['neighbors', 'fingerprint', 'updated'],
+    )
+    return set(changed)
+
+
+def compare_session(session, neighbor):
+    """Return the differences between an intended session and its observed neighbor."""
+    status, remote_as, local_address, peer_group = session
+    details = {}
+    if status == SessionStatusChoices.STATUS_ACTIVE:
+        if neighbor['state'] != SessionStateChoices.STATE_ESTABLISHED:
+            details['state'] = {'intended': SessionStateChoices.STATE_ESTABLISHED, 'observed': neighbor['state']}
+    elif neighbor['state'] == SessionStateChoices.STATE_ESTABLISHED:
+        details['state'] = {'intended': status, 'observed': neighbor['state']}
+    if neighbor['remote_as'] is not None and neighbor['remote_as'] != remote_as:
+        details['remote_as'] = {'intended': remote_as, 'observed': neighbor['remote_as']}
+    if neighbor['local_address'] is not None and neighbor['local_address'] != local_address:
+        details['local_address'] = {'intended': local_address, 'observed': neighbor['local_address']}
+    if neighbor['peer_group'] is not None and neighbor['peer_group'] != peer_group:
+        details['peer_group'] = {'intended': peer_group, 'observed': neighbor['peer_group']}
+    return details
+
+
+def compute_drift(device_ids, now=None):
+    """
+    Recompute the drift of the given devices having observed neighbors, replacing their
+    BGPDrift rows. Intended sessions and observed neighbors are loaded in bulk and joined
+    in memory on (device, remote address):
+
+    * missing: an active session not observed on its device;
+    * unexpected: an observed neighbor without a session;
+    * mismatched: a session whose state, remote AS, local address or peer group differs
+      from its neighbor's.
+
+    Drift still present keeps the time it was first detected. Returns the number of
+    devices recomputed.
+    """
+    now = now or timezone.now()
+    observed = {}
+    device_ids = list(device_ids)
+    for start in range(0, len(device_ids), DRIFT_BATCH_SIZE):
+        batch = device_ids[start:start + DRIFT_BATCH_SIZE]
+        for device_id, neighbors in BGPDeviceState.objects.filter(device_id__in=batch).values_list(
+            'device_id', 'neighbors'
+        ):
+            observed[device_id] = {neighbor['remote_address']: neighbor for neighbor in neighbors}
+    if not observed:
+        return 0
+
+    intended = {}
+    for pk, device_id, remote_address, status, remote_as, local_address, peer_group in BGPSession.objects.filter(
+        device_id__in=observed
+    ).order_by('pk').values_list(
+        'pk', 'device_id', 'remote_address__address', 'status', 'remote_as__asn', 'local_address__address',
+        'peer_group__name'
+    ).iterator(chunk_size=10000):
+        # The first of several sessions with the same peer wins
+        intended.setdefault(device_id, {}).setdefault(
+            str(remote_address.ip),
+            (pk, (status, remote_as, str(local_address.ip) if local_address else None, peer_group))
+        )
+
+    detected = {
+        (device_id, remote_address, kind): first
+        for device_id, remote_address, kind, first in BGPDrift.objects.filter(device_id__in=observed).values_list(
+            'device_id', 'remote_address', 'kind', 'detected'
+        )
+    }
+
+    def drift(device_id, remote_address, kind, session_id=None, details=None):
+        return BGPDrift(
+            device_id=device_id,
+            session_id=session_id,
+            kind=kind,
+            remote_address=remote_address,
+            details=details or {},
+            detected=detected.get((device_id, remote_address, kind), now),
+        )
+
+    entries = []
+    for device_id, neighbors in observed.items():
+        sessions = intended.get(device_id, {})
+        for remote_address in sessions.keys() - neighbors.keys():
+            session_id, session = sessions[remote_address]
+            if session[0] == SessionStatusChoices.STATUS_ACTIVE:
+                entries.append(drift(device_id, remote_address, DriftKindChoices.KIND_MISSING, session_id))
+        for remote_address in neighbors.keys() - sessions.keys():
+            neighbor = neighbors[remote_address]
+            entries.append(drift(device_id, remote_address, DriftKindChoices.KIND_UNEXPECTED, details={
+                field: neighbor[field] for field in NEIGHBOR_FIELDS[1:] if neighbor[field] is not None
+            }))
+        for remote_address in sessions.keys() & neighbors.keys():
+            session_id, session = sessions[remote_address]
+            details = compare_session(session, neighbors[remote_address])
+            if details:
+                entries.append(drift(
+                    device_id, remote_address, DriftKindChoices.KIND_MISMATCHED, session_id, details
+                ))
+
+    with transaction.atomic():
+        BGPDrift.objects.filter(device_id__in=observed).delete()
+        BGPDrift.objects.bulk_create(entries, batch_size=DRIFT_BATCH_SIZE)
+    return len(observed)
+
+
+def update_drift(changed_devices=(), full=False):
+    """
+    Recompute the drift incrementally: only devices whose observed neighbors changed
+    (``changed_devices``, as returned by record_observations()) or whose device version
+    changed since the previous run, which writes to the device, its sessions (deletions
+    included) and their addresses, ASNs and peer groups bump. Everything is recomputed
+    on the first run or when ``full`` is set. Returns the number of devices recomputed.
+    """
+    now = timezone.now()
+    device_ids = list(BGPDeviceState.objects.values_list('device_id', flat=True))
+    # Read the versions before the sessions: a concurrent write is caught by the next run
+    versions = get_versions([device_version(device_id) for device_id in device_ids])
+    versions = {device_id: versions[device_version(device_id)] for device_id in device_ids}
+    previous = None if full else cache.get(DRIFT_VERSIONS_KEY)
+    if previous is not None:
+        changed_devices = set(changed_devices)
+        device_ids = [
+            device_id for device_id in device_ids
+            if device_id in changed_devices or previous.get(device_id) != versions[device_id]
+        ]
+    count = compute_drift(device_ids, now)
+    cache.set(DRIFT_VERSIONS_KEY, versions, None)
+    return count
+
+
+def get_drift_report(queryset=None, devices=None, kinds=None, offset=0, limit=None):
+    """
+    Return the drift of the devices in ``devices`` (a queryset or ids; all by default) as
+    counts by kind and the matching entries.
+    """
+    queryset = BGPDrift.objects.all() if queryset is None else queryset
+    if devices is not None:
+        queryset = queryset.filter(device__in=devices)
+    counts = dict(queryset.order_by().values_list('kind').annotate(count=Count('pk')))
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+    rows = queryset.order_by('device__name', 'remote_address', 'kind').values(
+        'device_id', 'device__name', 'session_id', 'kind', 'remote_address', 'details', 'detected'
+    )
+    rows = rows[offset:offset + limit] if limit is not None else rows[offset:]
+    return {
+        'count': sum(counts.get(kind, 0) for kind in (kinds or DriftKindChoices.values())),
+        'kinds': {kind: counts.get(kind, 0) for kind in DriftKindChoices.values()},
+        'entries': [
+            {
+                'device': {'id': row['device_id'], 'name': row['device__name']},
+                'session': row['session_id'],
+                'kind': row['kind'],
+                'remote_address': row['remote_address'],
+                'details': row['details'],
+                'detected': row['detected'],
+            }
+            for row in rows
+        ],
+    }
@@ -0,0 +1,184 @@
+import io
+import json
+from collections import namedtuple
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from .models import BGPSession, Community, PrefixListRule, RoutingPolicyRule
+
+
+DEFAULT_BATCH_SIZE = 50000
+EXPORT_FORMATS = ('parquet', 'arrow')
+
+# Exported column: its name, the looked up field, its Arrow type name and an optional
+# conversion of the looked up values
+Column = namedtuple('Column', ('name', 'lookup', 'type', 'convert'), defaults=(None,))
+
+
+def _str(value):
+    return None if value is None else str(value)
+
+
+def _json(value):
+    return None if value is None else json.dumps(value)
+
+
+# Foreign keys are exported as flat id columns
+EXPORT_TABLES = {
+    'session': (BGPSession, (
+        Column('id', 'pk', 'int64'),
+        Column('name', 'name', 'string'),
+        Column('description', 'description', 'string'),
+        Column('status', 'status', 'string'),
+        Column('site_id', 'site_id', 'int64'),
+        Column('tenant_id', 'tenant_id', 'int64'),
+        Column('device_id', 'device_id', 'int64'),
+        Column('local_address_id', 'local_address_id', 'int64'),
+        Column('remote_address_id', 'remote_address_id', 'int64'),
+        Column('local_as_id', 'local_as_id', 'int64'),
+        Column('remote_as_id', 'remote_as_id', 'int64'),
+        Column('peer_group_id', 'peer_group_id', 'int64'),
+        Column('created', 'created', 'timestamp'),
+        Column('last_updated', 'last_updated', 'timestamp'),
+    )),
+    'community': (Community, (
+        Column('id', 'pk', 'int64'),
+        Column('value', 'value', 'string'),
+        Column('status', 'status', 'string'),
+        Column('description', 'description', 'string'),
+        Column('site_id', 'site_id', 'int64'),
+        Column('tenant_id', 'tenant_id', 'int64'),
+        Column('role_id', 'role_id', 'int64'),
+        Column('created', 'created', 'timestamp'),
+        Column('last_updated', 'last_updated', 'timestamp'),
+    )),
+    'prefix_list_rule': (PrefixListRule, (
+        Column('id', 'pk', 'int64'),
+        Column('prefix_list_id', 'prefix_list_id', 'int64'),
+        Column('index', 'index', 'int64'),
+        Column('action', 'action', 'string'),
+        Column('prefix_id', 'prefix_id', 'int64'),
+        Column('prefix_custom', 'prefix_custom', 'string', _str),
+        Column('ge', 'ge', 'int32'),
+        Column('le', 'le', 'int32'),
+        Column('created', 'created', 'timestamp'),
+        Column('last_updated', 'last_updated', 'timestamp'),
+    )),
+    'routing_policy_rule': (RoutingPolicyRule, (
+        Column('id', 'pk', 'int64'),
+        Column('routing_policy_id', 'routing_policy_id', 'int64'),
+        Column('index', 'index', 'int64'),
+        Column('action', 'action', 'string'),
+        Column('description', 'description', 'string'),
+        Column('continue_entry', 'continue_entry', 'int64'),
+        Column('match_custom', 'match_custom', 'string', _json),
+        Column('set_actions', 'set_actions', 'string', _json),
+        Column('created', 'created', 'timestamp'),
+        Column('last_updated', 'last_updated', 'timestamp'),
+    )),
+}
+
+
+def _arrow_type(name):
+    if name == 'timestamp':
+        return pyarrow.timestamp('us', tz='UTC')
+    return getattr(pyarrow, name)()
+
+
+def get_schema(table):
+    _, columns = EXPORT_TABLES[table]
+    return pyarrow.schema([pyarrow.field(column.name, _arrow_type(column.type)) for column in columns])
+
+
+def iter_batches(table, queryset=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yield the rows of an export table as Arrow record batches of up to ``batch_size``
+    rows. Rows are read as tuples through a server-side cursor (on PostgreSQL), so memory
+    use is bounded by the batch size whatever the table size.
+    """
+    model, columns = EXPORT_TABLES[table]
+    queryset = model.objects.all() if queryset is None else queryset
+    schema = get_schema(table)
+    rows = queryset.order_by().values_list(*(column.lookup for column in columns)).iterator(chunk_size=batch_size)
+    while True:
+        batch = [row for _, row in zip(range(batch_size), rows)]
+        if not batch:
+            break
+        arrays = []
+        for i, (column, values) in enumerate(zip(columns, zip(*batch))):
+            if column.convert is not None:
+                values = [column.convert(value) for value in values]
+            arrays.append(pyarrow.array(values, type=schema.field(i).type))
+        yield pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+        if len(batch) < batch_size:
+            break
+
+
+def _open_writer(format, sink, schema, stream=False):
+    if format == 'parquet':
+        return pyarrow.parquet.ParquetWriter(sink, schema)
+    if stream:
+        return pyarrow.ipc.new_stream(sink, schema)
+    return pyarrow.ipc.new_file(sink, schema)
+
+
+def write_export(table, sink, format='parquet', queryset=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Write an export table to ``sink`` (a path or a file object) as a Parquet file, with a
+    row group per batch, or an Arrow IPC file. Returns the number of rows written.
+    """
+    rows = 0
+    writer = _open_writer(format, sink, get_schema(table))
+    try:
+        for batch in iter_batches(table, queryset, batch_size):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        writer.close()
+    return rows
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose content is collected and emptied with drain()."""
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_export(table, format='parquet', queryset=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yield an export table as chunks of a Parquet file or of an Arrow IPC stream, one
+    chunk per batch, for streaming HTTP responses.
+    """
+    sink = _ChunkSink()
+    writer = _open_writer(format, sink, get_schema(table), stream=True)
+    try:
+        for batch in iter_batches(table, queryset, batch_size):
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -5,11 +5,15 @@ from netaddr.core import AddrFormatError
 from extras.filters import TagFilter
 from netbox.filtersets import NetBoxModelFilterSet
 
+from .choices import ActionChoices, PairingStatusChoices
 from .models import Community, BGPSession, RoutingPolicy, RoutingPolicyRule, BGPPeerGroup, PrefixList, PrefixListRule
 from ipam.models import IPAddress, ASN
 from dcim.models import Device, Site
 
 
+# Upper bound of an integer column
+MAX_INTEGER = 2147483647
+
 class CommunityFilterSet(NetBoxModelFilterSet):
 
     class Meta:
@@ -118,6 +122,11 @@ class BGPSessionFilterSet(NetBoxModelFilterSet):
         method='search_by_local_ip',
         label='Local Address',
     )
+    pairing_status = django_filters.MultipleChoiceFilter(
+        choices=PairingStatusChoices,
+        method='filter_pairing_status',
+        label='Pairing status',
+    )
 
     class Meta:
         model = BGPSession
@@ -135,6 +144,11 @@ class BGPSessionFilterSet(NetBoxModelFilterSet):
         )
         return queryset.filter(qs_filter)
 
+    def filter_pairing_status(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(pairing__status__in=value)
+
     def search_by_remote_ip(self, queryset, name, value):
         if not value.strip():
             return queryset
@@ -172,10 +186,46 @@ class RoutingPolicyFilterSet(NetBoxModelFilterSet):
 
 
 class RoutingPolicyRuleFilterSet(NetBoxModelFilterSet):
+    routing_policy_id = django_filters.ModelMultipleChoiceFilter(
+        field_name='routing_policy__id',
+        queryset=RoutingPolicy.objects.all(),
+        to_field_name='id',
+        label='Routing Policy (ID)',
+    )
+    routing_policy = django_filters.ModelMultipleChoiceFilter(
+        field_name='routing_policy__name',
+        queryset=RoutingPolicy.objects.all(),
+        to_field_name='name',
+        label='Routing Policy (name)',
+    )
+    action = django_filters.MultipleChoiceFilter(
+        choices=ActionChoices,
+    )
+    match_community_id = django_filters.ModelMultipleChoiceFilter(
+        field_name='match_community',
+        queryset=Community.objects.all(),
+        label='Matched Community (ID)',
+    )
+    match_community = django_filters.ModelMultipleChoiceFilter(
+        field_name='match_community__value',
+        queryset=Community.objects.all(),
+        to_field_name='value',
+        label='Matched Community (value)',
+    )
+    match_ip_address_id = django_filters.ModelMultipleChoiceFilter(
+        field_name='match_ip_address',
+        queryset=PrefixList.objects.all(),
+        label='Matched IP Prefix List (ID)',
+    )
+    match_ipv6_address_id = django_filters.ModelMultipleChoiceFilter(
+        field_name='match_ipv6_address',
+        queryset=PrefixList.objects.all(),
+        label='Matched IPv6 Prefix List (ID)',
+    )
 
     class Meta:
         model = RoutingPolicyRule
-        fields = ['id', 'index', 'action', 'description', 'routing_policy_id', 'continue_entry']
+        fields = ['id', 'index', 'description', 'continue_entry']
 
     def search(self, queryset, name, value):
         """Perform the filtered search."""
@@ -225,23 +275,80 @@ class PrefixListFilterSet(NetBoxModelFilterSet):
         return queryset.filter(qs_filter)
 
 class PrefixListRuleFilterSet(NetBoxModelFilterSet):
+    prefix_list_id = django_filters.ModelMultipleChoiceFilter(
+        field_name='prefix_list__id',
+        queryset=PrefixList.objects.all(),
+        to_field_name='id',
+        label='Prefix List (ID)',
+    )
+    prefix_list = django_filters.ModelMultipleChoiceFilter(
+        field_name='prefix_list__name',
+        queryset=PrefixList.objects.all(),
+        to_field_name='name',
+        label='Prefix List (name)',
+    )
+    action = django_filters.MultipleChoiceFilter(
+        choices=ActionChoices,
+    )
+    contains = django_filters.CharFilter(
+        method='search_contains',
+        label='Prefixes which contain this prefix or IP',
+    )
+    within_include = django_filters.CharFilter(
+        method='search_within_include',
+        label='Within and including prefix',
+    )
 
     class Meta:
         model = PrefixListRule
-        #fields = ['index', 'action', 'prefix_custom', 'ge', 'le', 'prefix_list', 'prefix_list_id']
-        fields = ['id', 'index', 'action', 'ge', 'le', 'prefix_list', 'prefix_list_id']
+        fields = ['id', 'index', 'ge', 'le']
 
     def search(self, queryset, name, value):
         """Perform the filtered search."""
+        value = value.strip()
+        if not value:
+            return queryset
+        if value.isdecimal():
+            # Integers only match the (indexed) rule index; isdigit() would accept
+            # digits such as '²' that int() rejects
+            if int(value) > MAX_INTEGER:
+                return queryset.none()
+            qs_filter = Q(index=int(value))
+        else:
+            try:
+                query = str(netaddr.IPNetwork(value).cidr)
+            except (AddrFormatError, ValueError):
+                # Plain words match the action or the prefix list name (trigram indexed)
+                qs_filter = Q(prefix_list__name__icontains=value)
+                if value.lower() in ActionChoices.values():
+                    qs_filter |= Q(action=value.lower())
+            else:
+                qs_filter = (
+                    Q(prefix_custom__net_contains_or_equals=query)
+                    | Q(prefix__prefix__net_contains_or_equals=query)
+                )
+        return queryset.filter(qs_filter)
+
+    def search_contains(self, queryset, name, value):
         if not value.strip():
             return queryset
-        qs_filter = (
-                Q(index__icontains=value)
-                | Q(action__icontains=value)
-                #| Q(prefix_custom__icontains=value)
-                | Q(ge__icontains=value)
-                | Q(le__icontains=value)
-                | Q(prefix_list__icontains=value)
-                | Q(prefix_list_id__icontains=value)
+        try:
+            query = str(netaddr.IPNetwork(value.strip()).cidr)
+        except (AddrFormatError, ValueError):
+            return queryset.none()
+        return queryset.filter(
+            Q(prefix_custom__net_contains_or_equals=query)
+            | Q(prefix__prefix__net_contains_or_equals=query)
+        )
+
+    def search_within_include(self, queryset, name, value):
+        if not value.strip():
+            return queryset
+        try:
+            query = str(netaddr.IPNetwork(value.strip()).cidr)
+        except (AddrFormatError, ValueError):
+            return queryset.none()
+        return queryset.filter(
+            Q(prefix_custom__net_contained_or_equal=query)
+            | Q(prefix__prefix__net_contained_or_equal=query)
         )
-        return queryset.filter(qs_filter)
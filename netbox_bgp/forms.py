@@ -20,7 +20,9 @@ from .models import (
     RoutingPolicyRule, PrefixList, PrefixListRule
 )
 
-from .choices import SessionStatusChoices, CommunityStatusChoices
+from .choices import (
+    SessionStatusChoices, CommunityStatusChoices, ActionChoices, ImportFormatChoices, PairingStatusChoices
+)
 
 
 class CommunityForm(NetBoxModelForm):
@@ -198,6 +200,33 @@ class BGPSessionAddForm(BGPSessionForm):
         return self.cleaned_data['remote_address']
 
 
+class BGPSessionBulkImportForm(forms.Form):
+    data = forms.CharField(
+        required=False,
+        widget=forms.Textarea(attrs={'class': 'font-monospace'}),
+        help_text='Enter CSV, JSON or YAML data'
+    )
+    upload_file = forms.FileField(
+        required=False,
+        label='Data file'
+    )
+    format = forms.ChoiceField(
+        choices=ImportFormatChoices,
+        initial=ImportFormatChoices.CSV
+    )
+
+    def clean(self):
+        super().clean()
+        if self.cleaned_data.get('upload_file'):
+            try:
+                self.cleaned_data['data'] = self.cleaned_data['upload_file'].read().decode('utf-8-sig')
+            except UnicodeDecodeError:
+                raise ValidationError({'upload_file': 'The file must be UTF-8 encoded'})
+        if not self.cleaned_data.get('data'):
+            raise ValidationError('Enter import data or upload a file')
+        return self.cleaned_data
+
+
 class BGPSessionFilterForm(NetBoxModelFilterSetForm):
     model = BGPSession
     q = forms.CharField(
@@ -236,6 +265,11 @@ class BGPSessionFilterForm(NetBoxModelFilterSetForm):
         choices=SessionStatusChoices,
         required=False,
     )
+    pairing_status = forms.MultipleChoiceField(
+        choices=PairingStatusChoices,
+        required=False,
+        label='Pairing status'
+    )
     peer_group = DynamicModelMultipleChoiceField(
         queryset=BGPPeerGroup.objects.all(),
         required=False,
@@ -353,6 +387,52 @@ class RoutingPolicyRuleForm(NetBoxModelForm):
         ]
 
 
+class RoutingPolicyRuleFilterForm(NetBoxModelFilterSetForm):
+    model = RoutingPolicyRule
+    q = forms.CharField(
+        required=False,
+        label='Search'
+    )
+    routing_policy_id = DynamicModelMultipleChoiceField(
+        queryset=RoutingPolicy.objects.all(),
+        required=False,
+        label=_('Routing Policy'),
+        widget=APISelectMultiple(
+            api_url='/api/plugins/bgp/routing-policy/'
+        )
+    )
+    action = forms.MultipleChoiceField(
+        choices=ActionChoices,
+        required=False,
+    )
+    match_community_id = DynamicModelMultipleChoiceField(
+        queryset=Community.objects.all(),
+        required=False,
+        label=_('Match Community'),
+        widget=APISelectMultiple(
+            api_url='/api/plugins/bgp/community/'
+        )
+    )
+    match_ip_address_id = DynamicModelMultipleChoiceField(
+        queryset=PrefixList.objects.all(),
+        required=False,
+        label=_('Match IP address Prefix lists'),
+        widget=APISelectMultiple(
+            api_url='/api/plugins/bgp/prefix-list/'
+        )
+    )
+    match_ipv6_address_id = DynamicModelMultipleChoiceField(
+        queryset=PrefixList.objects.all(),
+        required=False,
+        label=_('Match IPv6 address Prefix lists'),
+        widget=APISelectMultiple(
+            api_url='/api/plugins/bgp/prefix-list/'
+        )
+    )
+
+    tag = TagFilterField(model)
+
+
 class PrefixListFilterForm(NetBoxModelFilterSetForm):
     model = PrefixList
     q = forms.CharField(
@@ -397,3 +477,33 @@ class PrefixListRuleForm(NetBoxModelForm):
             'action', 'prefix', 'prefix_custom',
             'ge', 'le', 'tags'
         ]
+
+
+class PrefixListRuleFilterForm(NetBoxModelFilterSetForm):
+    model = PrefixListRule
+    q = forms.CharField(
+        required=False,
+        label='Search'
+    )
+    prefix_list_id = DynamicModelMultipleChoiceField(
+        queryset=PrefixList.objects.all(),
+        required=False,
+        label=_('Prefix List'),
+        widget=APISelectMultiple(
+            api_url='/api/plugins/bgp/prefix-list/'
+        )
+    )
+    action = forms.MultipleChoiceField(
+        choices=ActionChoices,
+        required=False,
+    )
+    contains = forms.CharField(
+        required=False,
+        label='Contains prefix or IP'
+    )
+    within_include = forms.CharField(
+        required=False,
+        label='Within and including prefix'
+    )
+
+    tag = TagFilterField(model)
@@ -0,0 +1,35 @@
+from graphene import ObjectType
+
+from netbox.graphql.fields import ObjectField
+
+from .fields import BatchedObjectListField
+from .types import (
+    CommunityType, BgpSessionType, PeerGroupType, RoutingPolicyType,
+    RoutingPolicyRuleType, PrefixListType, PrefixListRuleType,
+)
+
+
+class BGPQuery(ObjectType):
+    community = ObjectField(CommunityType)
+    community_list = BatchedObjectListField(CommunityType)
+
+    bgp_session = ObjectField(BgpSessionType)
+    bgp_session_list = BatchedObjectListField(BgpSessionType)
+
+    peer_group = ObjectField(PeerGroupType)
+    peer_group_list = BatchedObjectListField(PeerGroupType)
+
+    routing_policy = ObjectField(RoutingPolicyType)
+    routing_policy_list = BatchedObjectListField(RoutingPolicyType)
+
+    routing_policy_rule = ObjectField(RoutingPolicyRuleType)
+    routing_policy_rule_list = BatchedObjectListField(RoutingPolicyRuleType)
+
+    prefix_list = ObjectField(PrefixListType)
+    prefix_list_list = BatchedObjectListField(PrefixListType)
+
+    prefix_list_rule = ObjectField(PrefixListRuleType)
+    prefix_list_rule_list = BatchedObjectListField(PrefixListRuleType)
+
+
+schema = BGPQuery
@@ -0,0 +1,200 @@
+import json
+import time
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from graphql import (
+    FieldNode, FragmentDefinitionNode, FragmentSpreadNode, GraphQLList, GraphQLNonNull,
+    InlineFragmentNode, OperationDefinitionNode,
+)
+
+# Seconds a table size estimate is reused before the catalog is consulted again
+ESTIMATE_TTL = 300
+
+
+class TableSizeEstimator:
+    """
+    Cheap row count estimates taken from the PostgreSQL statistics catalog.
+    """
+    def __init__(self, ttl=ESTIMATE_TTL):
+        self.ttl = ttl
+        self._estimates = {}
+
+    def rows(self, model):
+        table = model._meta.db_table
+        estimate, timestamp = self._estimates.get(table, (None, 0))
+        if estimate is None or time.monotonic() - timestamp > self.ttl:
+            estimate = self._estimate(model)
+            self._estimates[table] = (estimate, time.monotonic())
+        return estimate
+
+    @staticmethod
+    def _estimate(model):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [model._meta.db_table])
+            row = cursor.fetchone()
+        if row is None or row[0] <= 0:
+            # Table has never been analyzed (or is empty, which is cheap to count)
+            return model.objects.count()
+        return int(row[0])
+
+    @staticmethod
+    def filtered_rows(queryset):
+        """Return the planner's row estimate for a filtered queryset without executing it."""
+        plan = json.loads(queryset.explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+table_sizes = TableSizeEstimator()
+
+
+class QueryCostAnalyzer:
+    """
+    Estimate the number of objects a GraphQL document resolves from the plugin's
+    root fields, following list fields with their expected fan-out.
+
+    Root lists are sized from table statistics (or the planner's estimate when
+    filters are applied). Nested lists backed by plugin models use the ratio of
+    related rows to parent rows; other nested lists use ``default_fan_out``.
+    """
+    def __init__(self, schema, root_fields, request, default_fan_out=10):
+        self.schema = schema
+        self.root_fields = root_fields
+        self.request = request
+        self.default_fan_out = default_fan_out
+
+    def estimate(self, document, variables=None):
+        self.variables = variables or {}
+        self.fragments = {
+            d.name.value: d for d in document.definitions if isinstance(d, FragmentDefinitionNode)
+        }
+        cost = 0
+        for definition in document.definitions:
+            if isinstance(definition, OperationDefinitionNode) and definition.operation.value == 'query':
+                for node in self._fields(definition.selection_set):
+                    if node.name.value in self.root_fields:
+                        cost += self._root_cost(node)
+        return cost
+
+    def _fields(self, selection_set):
+        if selection_set is None:
+            return
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                yield selection
+            elif isinstance(selection, InlineFragmentNode):
+                yield from self._fields(selection.selection_set)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = self.fragments.get(selection.name.value)
+                if fragment is not None:
+                    yield from self._fields(fragment.selection_set)
+
+    def _root_cost(self, node):
+        field = self.schema.query_type.fields[node.name.value]
+        is_list, gql_type = self._unwrap(field.type)
+        model = self._get_model(gql_type)
+        count = 1
+        if is_list and model is not None:
+            count = self._root_rows(gql_type, model, node)
+        return count + self._selection_cost(node, gql_type, model, count)
+
+    def _root_rows(self, gql_type, model, node):
+        args = {arg.name.value: self._argument_value(arg.value) for arg in node.arguments}
+        args = {k: v for k, v in args.items() if v is not None}
+        if not args:
+            return table_sizes.rows(model)
+        filterset_class = getattr(gql_type.graphene_type._meta, 'filterset_class', None)
+        if filterset_class is None:
+            return table_sizes.rows(model)
+        filterset = filterset_class(data=args, queryset=model.objects.all(), request=self.request)
+        if not filterset.is_valid():
+            return 0
+        return table_sizes.filtered_rows(filterset.qs)
+
+    def _selection_cost(self, node, gql_type, model, count):
+        cost = 0
+        fields = getattr(gql_type, 'fields', {})
+        for child in self._fields(node.selection_set):
+            if child.selection_set is None or child.name.value not in fields:
+                continue
+            is_list, child_type = self._unwrap(fields[child.name.value].type)
+            child_model = self._get_model(child_type)
+            child_count = count
+            if is_list:
+                child_count = count * self._fan_out(model, child.name.value)
+            cost += child_count + self._selection_cost(child, child_type, child_model, child_count)
+        return cost
+
+    def _fan_out(self, model, name):
+        if model is None or model._meta.app_label != 'netbox_bgp':
+            return self.default_fan_out
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return self.default_fan_out
+        if field.many_to_many:
+            through = getattr(field, 'through', None) or field.remote_field.through
+            related_rows = table_sizes.rows(through)
+        elif field.one_to_many:
+            related_rows = table_sizes.rows(field.related_model)
+        else:
+            return self.default_fan_out
+        return max(1, -(-related_rows // max(1, table_sizes.rows(model))))
+
+    def _argument_value(self, value):
+        if value.kind == 'variable':
+            return self.variables.get(value.name.value)
+        if value.kind == 'list_value':
+            return [self._argument_value(v) for v in value.values]
+        if value.kind in ('null_value', 'object_value'):
+            return None
+        return value.value
+
+    @staticmethod
+    def _unwrap(gql_type):
+        is_list = False
+        while isinstance(gql_type, (GraphQLNonNull, GraphQLList)):
+            if isinstance(gql_type, GraphQLList):
+                is_list = True
+            gql_type = gql_type.of_type
+        return is_list, gql_type
+
+    @staticmethod
+    def _get_model(gql_type):
+        graphene_type = getattr(gql_type, 'graphene_type', None)
+        return getattr(getattr(graphene_type, '_meta', None), 'model', None)
+
+
+def get_selected_models(schema, document, root_fields, variables=None):
+    """
+    Return the models of the object types a GraphQL document selects below the given
+    root fields, or None if it selects an object type not backed by a model (e.g. a
+    generic relation), whose data cannot be tracked.
+    """
+    walker = QueryCostAnalyzer(schema, root_fields, request=None)
+    walker.variables = variables or {}
+    walker.fragments = {
+        d.name.value: d for d in document.definitions if isinstance(d, FragmentDefinitionNode)
+    }
+    models = set()
+
+    def walk(node, gql_type):
+        _, gql_type = walker._unwrap(gql_type)
+        fields = getattr(gql_type, 'fields', None)
+        if node.selection_set is None or fields is None:
+            return True
+        model = walker._get_model(gql_type)
+        if model is None:
+            return False
+        models.add(model)
+        return all(
+            walk(child, fields[child.name.value].type)
+            for child in walker._fields(node.selection_set) if child.name.value in fields
+        )
+
+    for definition in document.definitions:
+        if isinstance(definition, OperationDefinitionNode):
+            for node in walker._fields(definition.selection_set):
+                if node.name.value in root_fields and not walk(node, schema.query_type.fields[node.name.value].type):
+                    return None
+    return models
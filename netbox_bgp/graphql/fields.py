@@ -0,0 +1,16 @@
+from netbox.graphql.fields import ObjectListField
+
+from .loaders import get_loader
+
+
+class BatchedObjectListField(ObjectListField):
+    """
+    ObjectListField which registers its results with the request's RelationLoader,
+    so relations selected on the returned objects are fetched in batches.
+    """
+    @staticmethod
+    def list_resolver(django_object_type, resolver, default_manager, root, info, **args):
+        queryset = ObjectListField.list_resolver(
+            django_object_type, resolver, default_manager, root, info, **args
+        )
+        return get_loader(info).register(queryset)
@@ -0,0 +1,76 @@
+from django.db.models import Prefetch, prefetch_related_objects
+
+
+class RelationLoader:
+    """
+    Request-scoped batch loader for model relations.
+
+    Every object handed out by the schema is registered with the loader. The first
+    time a relation is requested for an object, it is fetched with a single query
+    for all registered objects of the same model which have not loaded it yet, so
+    nested selections cost one query per relation instead of one per object.
+    """
+    def __init__(self, user):
+        self.user = user
+        self._instances = {}
+        self._seen = set()
+        self._loaded = {}
+
+    def register(self, instances):
+        instances = list(instances)
+        for instance in instances:
+            if id(instance) not in self._seen:
+                self._seen.add(id(instance))
+                self._instances.setdefault(type(instance), []).append(instance)
+        return instances
+
+    def load(self, instance, name):
+        if id(instance) not in self._seen:
+            self.register([instance])
+        if not self._is_cached(instance, name):
+            self._fetch(type(instance), name)
+
+        field = instance._meta.get_field(name)
+        related = getattr(instance, name)
+        if field.many_to_many or field.one_to_many:
+            return self.register(related.all())
+        if related is not None:
+            self.register([related])
+        return related
+
+    def _fetch(self, model, name):
+        instances = self._instances[model]
+        start = self._loaded.get((model, name), 0)
+        self._loaded[(model, name)] = len(instances)
+        pending = [i for i in instances[start:] if not self._is_cached(i, name)]
+        prefetch_related_objects(pending, self._get_lookup(model, name))
+
+    def _get_lookup(self, model, name):
+        related_model = model._meta.get_field(name).related_model
+        # Tags are not permission-restricted and taggit rejects custom prefetch querysets
+        if name == 'tags' or not hasattr(related_model.objects, 'restrict'):
+            return name
+        return Prefetch(name, queryset=related_model.objects.restrict(self.user, 'view'))
+
+    @staticmethod
+    def _is_cached(instance, name):
+        return (
+            name in instance._state.fields_cache
+            or name in getattr(instance, '_prefetched_objects_cache', {})
+        )
+
+
+def get_loader(info):
+    """Return the RelationLoader bound to the current GraphQL request."""
+    request = info.context
+    loader = getattr(request, '_netbox_bgp_loader', None)
+    if loader is None:
+        loader = request._netbox_bgp_loader = RelationLoader(request.user)
+    return loader
+
+
+def batched(name):
+    """Return a resolver which loads relation ``name`` through the request's loader."""
+    def resolver(root, info, **kwargs):
+        return get_loader(info).load(root, name)
+    return resolver
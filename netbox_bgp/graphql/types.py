@@ -0,0 +1,195 @@
+import graphene
+from graphene.types.generic import GenericScalar
+
+from netbox.graphql.types import NetBoxObjectType
+
+from netbox_bgp import models, filters
+from .loaders import batched, get_loader
+
+
+class BGPObjectType(NetBoxObjectType):
+    """
+    Base type for plugin objects. Related objects are resolved through the
+    request's RelationLoader rather than one query per object.
+    """
+    class Meta:
+        abstract = True
+
+    resolve_tags = batched('tags')
+
+
+class CommunityType(BGPObjectType):
+    site = graphene.Field('dcim.graphql.types.SiteType')
+    tenant = graphene.Field('tenancy.graphql.types.TenantType')
+    role = graphene.Field('ipam.graphql.types.RoleType')
+
+    class Meta:
+        model = models.Community
+        fields = '__all__'
+        filterset_class = filters.CommunityFilterSet
+
+    resolve_site = batched('site')
+    resolve_tenant = batched('tenant')
+    resolve_role = batched('role')
+
+
+class BgpSessionType(BGPObjectType):
+    site = graphene.Field('dcim.graphql.types.SiteType')
+    tenant = graphene.Field('tenancy.graphql.types.TenantType')
+    device = graphene.Field('dcim.graphql.types.DeviceType')
+    local_address = graphene.Field('ipam.graphql.types.IPAddressType', required=True)
+    remote_address = graphene.Field('ipam.graphql.types.IPAddressType', required=True)
+    local_as = graphene.Field('ipam.graphql.types.ASNType', required=True)
+    remote_as = graphene.Field('ipam.graphql.types.ASNType', required=True)
+    peer_group = graphene.Field('netbox_bgp.graphql.types.PeerGroupType')
+    import_policies = graphene.List(
+        graphene.NonNull('netbox_bgp.graphql.types.RoutingPolicyType'),
+        required=True
+    )
+    export_policies = graphene.List(
+        graphene.NonNull('netbox_bgp.graphql.types.RoutingPolicyType'),
+        required=True
+    )
+
+    class Meta:
+        model = models.BGPSession
+        fields = '__all__'
+        filterset_class = filters.BGPSessionFilterSet
+
+    resolve_site = batched('site')
+    resolve_tenant = batched('tenant')
+    resolve_device = batched('device')
+    resolve_local_address = batched('local_address')
+    resolve_remote_address = batched('remote_address')
+    resolve_local_as = batched('local_as')
+    resolve_remote_as = batched('remote_as')
+    resolve_peer_group = batched('peer_group')
+    resolve_import_policies = batched('import_policies')
+    resolve_export_policies = batched('export_policies')
+
+
+class PeerGroupType(BGPObjectType):
+    import_policies = graphene.List(
+        graphene.NonNull('netbox_bgp.graphql.types.RoutingPolicyType'),
+        required=True
+    )
+    export_policies = graphene.List(
+        graphene.NonNull('netbox_bgp.graphql.types.RoutingPolicyType'),
+        required=True
+    )
+
+    class Meta:
+        model = models.BGPPeerGroup
+        fields = '__all__'
+        filterset_class = filters.BGPPeerGroupFilterSet
+
+    resolve_import_policies = batched('import_policies')
+    resolve_export_policies = batched('export_policies')
+
+
+class RoutingPolicyType(BGPObjectType):
+    group_import_policies = graphene.List(
+        graphene.NonNull('netbox_bgp.graphql.types.PeerGroupType'),
+        required=True
+    )
+    group_export_policies = graphene.List(
+        graphene.NonNull('netbox_bgp.graphql.types.PeerGroupType'),
+        required=True
+    )
+    session_import_policies = graphene.List(
+        graphene.NonNull('netbox_bgp.graphql.types.BgpSessionType'),
+        required=True
+    )
+    session_export_policies = graphene.List(
+        graphene.NonNull('netbox_bgp.graphql.types.BgpSessionType'),
+        required=True
+    )
+    rules = graphene.List(
+        graphene.NonNull('netbox_bgp.graphql.types.RoutingPolicyRuleType'),
+        required=True
+    )
+
+    class Meta:
+        model = models.RoutingPolicy
+        fields = '__all__'
+        filterset_class = filters.RoutingPolicyFilterSet
+
+    resolve_group_import_policies = batched('group_import_policies')
+    resolve_group_export_policies = batched('group_export_policies')
+    resolve_session_import_policies = batched('session_import_policies')
+    resolve_session_export_policies = batched('session_export_policies')
+    resolve_rules = batched('rules')
+
+
+class RoutingPolicyRuleType(BGPObjectType):
+    routing_policy = graphene.Field('netbox_bgp.graphql.types.RoutingPolicyType', required=True)
+    match_community = graphene.List(
+        graphene.NonNull('netbox_bgp.graphql.types.CommunityType'),
+        required=True
+    )
+    match_ip_address = graphene.List(
+        graphene.NonNull('netbox_bgp.graphql.types.PrefixListType'),
+        required=True
+    )
+    match_ipv6_address = graphene.List(
+        graphene.NonNull('netbox_bgp.graphql.types.PrefixListType'),
+        required=True
+    )
+    match_statements = GenericScalar()
+    set_statements = GenericScalar()
+
+    class Meta:
+        model = models.RoutingPolicyRule
+        fields = '__all__'
+        filterset_class = filters.RoutingPolicyRuleFilterSet
+
+    resolve_routing_policy = batched('routing_policy')
+    resolve_match_community = batched('match_community')
+    resolve_match_ip_address = batched('match_ip_address')
+    resolve_match_ipv6_address = batched('match_ipv6_address')
+
+    def resolve_match_statements(self, info):
+        loader = get_loader(info)
+        for name in ('match_community', 'match_ip_address', 'match_ipv6_address'):
+            loader.load(self, name)
+        return self.match_statements
+
+    def resolve_set_statements(self, info):
+        return self.set_statements
+
+
+class PrefixListType(BGPObjectType):
+    prefrules = graphene.List(
+        graphene.NonNull('netbox_bgp.graphql.types.PrefixListRuleType'),
+        required=True
+    )
+    plrules = graphene.List(
+        graphene.NonNull('netbox_bgp.graphql.types.RoutingPolicyRuleType'),
+        required=True
+    )
+    plrules6 = graphene.List(
+        graphene.NonNull('netbox_bgp.graphql.types.RoutingPolicyRuleType'),
+        required=True
+    )
+
+    class Meta:
+        model = models.PrefixList
+        fields = '__all__'
+        filterset_class = filters.PrefixListFilterSet
+
+    resolve_prefrules = batched('prefrules')
+    resolve_plrules = batched('plrules')
+    resolve_plrules6 = batched('plrules6')
+
+
+class PrefixListRuleType(BGPObjectType):
+    prefix_list = graphene.Field('netbox_bgp.graphql.types.PrefixListType', required=True)
+    prefix = graphene.Field('ipam.graphql.types.PrefixType')
+
+    class Meta:
+        model = models.PrefixListRule
+        fields = '__all__'
+        filterset_class = filters.PrefixListRuleFilterSet
+
+    resolve_prefix_list = batched('prefix_list')
+    resolve_prefix = batched('prefix')
@@ -0,0 +1,311 @@
+import csv
+import io
+import json
+import uuid
+
+import netaddr
+import yaml
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from dcim.models import Device, Site
+from extras.choices import ObjectChangeActionChoices
+from ipam.models import ASN, IPAddress
+from tenancy.models import Tenant
+
+from .choices import ImportFormatChoices
+from .jobs import JobProgress
+from .models import BGPPeerGroup, BGPSession, RoutingPolicy
+from .pairing import update_pairing
+from .signals import get_changed_versions
+from .utils import bulk_log_changes, get_change_data
+from .versioning import bump_data_version, bump_versions
+
+
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportValidationError(Exception):
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f'{len(errors)} errors')
+
+
+def parse_records(data, format):
+    """Parse CSV, JSON or YAML import data into a list of dicts."""
+    if format == ImportFormatChoices.CSV:
+        records = list(csv.DictReader(io.StringIO(data.strip())))
+    elif format == ImportFormatChoices.JSON:
+        records = json.loads(data)
+    elif format == ImportFormatChoices.YAML:
+        records = yaml.safe_load(data)
+    else:
+        raise ValueError(f'Unknown import format: {format}')
+    if isinstance(records, dict):
+        records = [records]
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise ValueError('Import data must be a list of objects')
+    return records
+
+
+class BGPSessionImporter:
+    """
+    Import BGP sessions in bulk. All referenced devices, sites, tenants, IP addresses, ASNs,
+    peer groups and routing policies are resolved up front with one query per kind;
+    rows are then validated and written with bulk_create() in chunks. Nothing is written
+    if any row is invalid.
+
+    Devices, sites, tenants, peer groups and routing policies are referenced by name,
+    IP addresses by address (with or without mask length) and ASNs by number. Routing
+    policies are given as lists or comma-separated strings.
+    """
+    fields = (
+        'name', 'description', 'status', 'device', 'site', 'tenant', 'local_address', 'remote_address',
+        'local_as', 'remote_as', 'peer_group', 'import_policies', 'export_policies',
+    )
+    required_fields = ('local_address', 'remote_address', 'local_as', 'remote_as')
+    policy_fields = ('import_policies', 'export_policies')
+
+    def __init__(self, user, chunk_size=1000, progress=None):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.errors = []
+
+    def _queryset(self, model):
+        return model.objects.restrict(self.user, 'view')
+
+    @staticmethod
+    def _values(records, field):
+        return {record[field] for record in records if record.get(field) not in (None, '')}
+
+    @staticmethod
+    def _index(objects, key):
+        index = {}
+        for obj in objects:
+            index.setdefault(key(obj), []).append(obj)
+        return index
+
+    @staticmethod
+    def _host(value):
+        return str(netaddr.IPNetwork(str(value)).ip)
+
+    def _normalize(self, records):
+        normalized = []
+        for record in records:
+            record = {
+                field: value.strip() if isinstance(value, str) else value
+                for field, value in record.items() if field in self.fields
+            }
+            for field in self.policy_fields:
+                value = record.get(field)
+                if isinstance(value, str):
+                    record[field] = [name.strip() for name in value.split(',') if name.strip()]
+                elif not value:
+                    record[field] = []
+            normalized.append(record)
+        return normalized
+
+    def resolve(self, records):
+        """Fetch every referenced object with a single query per kind."""
+        hosts = set()
+        for field in ('local_address', 'remote_address'):
+            for value in self._values(records, field):
+                try:
+                    hosts.add(self._host(value))
+                except (netaddr.AddrFormatError, ValueError):
+                    pass
+        asns = set()
+        for field in ('local_as', 'remote_as'):
+            for value in self._values(records, field):
+                try:
+                    asns.add(int(value))
+                except ValueError:
+                    pass
+        policies = {name for record in records for field in self.policy_fields for name in record[field]}
+
+        self.lookups = {
+            'device': self._index(
+                self._queryset(Device).filter(name__in=self._values(records, 'device')).select_related('site'),
+                lambda o: o.name
+            ),
+            'site': self._index(
+                self._queryset(Site).filter(name__in=self._values(records, 'site')), lambda o: o.name
+            ),
+            'tenant': self._index(
+                self._queryset(Tenant).filter(name__in=self._values(records, 'tenant')), lambda o: o.name
+            ),
+            'peer_group': self._index(
+                self._queryset(BGPPeerGroup).filter(name__in=self._values(records, 'peer_group')),
+                lambda o: o.name
+            ),
+            'address': self._index(
+                self._queryset(IPAddress).filter(address__net_in=list(hosts)) if hosts else [],
+                lambda o: str(o.address.ip)
+            ),
+            'asn': self._index(self._queryset(ASN).filter(asn__in=asns), lambda o: o.asn),
+            'policy': self._index(self._queryset(RoutingPolicy).filter(name__in=policies), lambda o: o.name),
+        }
+        devices = [objs[0] for objs in self.lookups['device'].values()]
+        self.existing = set(
+            BGPSession.objects.filter(device__in=devices).values_list(
+                'device_id', 'local_address_id', 'local_as_id', 'remote_address_id', 'remote_as_id'
+            )
+        )
+
+    def _lookup(self, kind, key, label):
+        objects = self.lookups[kind].get(key)
+        if not objects:
+            raise ValidationError(f'{label} "{key}" not found')
+        if len(objects) > 1:
+            raise ValidationError(f'{label} "{key}" is ambiguous ({len(objects)} matches)')
+        return objects[0]
+
+    def build(self, record):
+        """Return a validated BGPSession and its policies for a record, or raise a dict of errors."""
+        errors = {}
+        values = {}
+        for field in self.required_fields:
+            if record.get(field) in (None, ''):
+                errors[field] = 'This field is required'
+
+        for field, kind, label in (
+            ('device', 'device', 'Device'), ('site', 'site', 'Site'),
+            ('tenant', 'tenant', 'Tenant'), ('peer_group', 'peer_group', 'Peer group'),
+        ):
+            if record.get(field) not in (None, ''):
+                try:
+                    values[field] = self._lookup(kind, record[field], label)
+                except ValidationError as e:
+                    errors[field] = e.message
+        for field in ('local_address', 'remote_address'):
+            if field not in errors:
+                try:
+                    values[field] = self._lookup('address', self._host(record[field]), 'IP address')
+                except (netaddr.AddrFormatError, ValueError):
+                    errors[field] = f'Invalid IP address "{record[field]}"'
+                except ValidationError as e:
+                    errors[field] = e.message
+        for field in ('local_as', 'remote_as'):
+            if field not in errors:
+                try:
+                    values[field] = self._lookup('asn', int(record[field]), 'ASN')
+                except ValueError:
+                    errors[field] = f'Invalid ASN "{record[field]}"'
+                except ValidationError as e:
+                    errors[field] = e.message
+        policies = {}
+        for field in self.policy_fields:
+            try:
+                policies[field] = [self._lookup('policy', name, 'Routing policy') for name in record[field]]
+            except ValidationError as e:
+                errors[field] = e.message
+
+        session = BGPSession(
+            name=record.get('name') or None,
+            description=record.get('description') or '',
+            **values
+        )
+        if record.get('status'):
+            session.status = record['status']
+        if session.site is None and session.device is not None:
+            session.site = session.device.site
+        try:
+            # Related objects are validated by the lookups above
+            session.clean_fields(exclude=[
+                'device', 'site', 'tenant', 'local_address', 'remote_address', 'local_as', 'remote_as',
+                'peer_group',
+            ])
+        except ValidationError as e:
+            errors.update({field: ' '.join(messages) for field, messages in e.message_dict.items()})
+
+        if not errors and session.device_id is not None:
+            key = (
+                session.device_id, session.local_address_id, session.local_as_id,
+                session.remote_address_id, session.remote_as_id,
+            )
+            if key in self.existing:
+                errors['__all__'] = 'A BGP session with this device, addresses and ASNs already exists'
+            self.existing.add(key)
+        if errors:
+            raise ValidationError(errors)
+        return session, policies
+
+    def write(self, sessions, policies):
+        BGPSession.objects.bulk_create(sessions)
+        for field in self.policy_fields:
+            through = getattr(BGPSession, field).through
+            through.objects.bulk_create([
+                through(bgpsession_id=session.pk, routingpolicy_id=policy.pk)
+                for session, session_policies in zip(sessions, policies)
+                for policy in session_policies[field]
+            ])
+
+    def run(self, records):
+        records = self._normalize(records)
+        self.resolve(records)
+        created = []
+        with transaction.atomic():
+            for start in range(0, len(records), self.chunk_size):
+                sessions, policies = [], []
+                for row, record in enumerate(records[start:start + self.chunk_size], start=start + 1):
+                    try:
+                        session, session_policies = self.build(record)
+                    except ValidationError as e:
+                        for field, messages in e.message_dict.items():
+                            self.errors.append(f'Row {row}: {field}: {" ".join(messages)}')
+                        continue
+                    sessions.append(session)
+                    policies.append(session_policies)
+                # Keep validating after an error to report every invalid row, but stop writing
+                if not self.errors:
+                    self.write(sessions, policies)
+                    created.extend(zip(sessions, policies))
+                if self.progress is not None:
+                    self.progress.advance(min(self.chunk_size, len(records) - start))
+            if self.errors:
+                raise ImportValidationError(self.errors[:MAX_REPORTED_ERRORS])
+
+            pks = [session.pk for session, _ in created]
+            if BGPSession.objects.restrict(self.user, 'add').filter(pk__in=pks).count() != len(pks):
+                raise ImportValidationError(['Object-level permissions prevent creating some of the sessions'])
+
+            bulk_log_changes(
+                [session for session, _ in created], ObjectChangeActionChoices.ACTION_CREATE, self.user,
+                uuid.uuid4(), postchange={
+                    session.pk: get_change_data(session, extra={
+                        # Imported sessions have no tags
+                        'tags': [],
+                        **{field: [policy.pk for policy in session_policies[field]] for field in self.policy_fields},
+                    })
+                    for session, session_policies in created
+                }
+            )
+            update_pairing(pks)
+        bump_data_version()
+        sessions = [session for session, _ in created]
+        bump_versions(get_changed_versions(BGPSession, sessions))
+        return sessions
+
+
+def import_sessions(job_id, user_id, data, format):
+    """Background job: import BGP sessions from CSV, JSON or YAML data."""
+    progress = JobProgress.get(job_id)
+    user = get_user_model().objects.get(pk=user_id)
+    try:
+        records = parse_records(data, format)
+    except (ValueError, csv.Error, yaml.YAMLError) as e:
+        progress.fail(f'Unable to parse the import data: {e}')
+        return
+    progress.start(total=len(records))
+    try:
+        sessions = BGPSessionImporter(user, progress=progress).run(records)
+    except ImportValidationError as e:
+        progress.fail('Validation failed; no sessions were imported', errors=e.errors)
+        return
+    except Exception as e:
+        progress.fail(f'Import failed: {e}')
+        raise
+    progress.complete(f'Imported {len(sessions)} BGP sessions')
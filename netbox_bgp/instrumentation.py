@@ -0,0 +1,154 @@
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+try:
+    from prometheus_client import Histogram
+except ImportError:
+    Histogram = None
+
+
+_current = ContextVar('netbox_bgp_metrics', default=None)
+
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+ROW_BUCKETS = (0, 1, 10, 25, 50, 100, 250, 500, 1000)
+
+if Histogram is not None:
+    REQUEST_SECONDS = Histogram(
+        'netbox_bgp_request_duration_seconds', 'Duration of BGP plugin requests', ['endpoint']
+    )
+    REQUEST_QUERIES = Histogram(
+        'netbox_bgp_request_queries', 'Database queries per BGP plugin request', ['endpoint'],
+        buckets=QUERY_BUCKETS
+    )
+    SQL_SECONDS = Histogram(
+        'netbox_bgp_sql_duration_seconds', 'Time spent in the database per BGP plugin request', ['endpoint']
+    )
+    SERIALIZATION_SECONDS = Histogram(
+        'netbox_bgp_serialization_duration_seconds',
+        'Time spent serializing or rendering BGP objects per request (excluding SQL)', ['endpoint']
+    )
+    ROWS = Histogram(
+        'netbox_bgp_rows', 'BGP objects returned per request', ['endpoint'], buckets=ROW_BUCKETS
+    )
+
+
+class RequestMetrics:
+    """Counters of a single instrumented request."""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.duration = None
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serialization_time = 0.0
+        self.rows = None
+        self.touched = False
+        self._serialization_start = None
+
+    def __call__(self, execute, sql, params, many, context):
+        # Database execute wrapper
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - start
+
+    def start_serialization(self):
+        if self._serialization_start is None:
+            self._serialization_start = (time.perf_counter(), self.sql_time)
+
+    def end_serialization(self):
+        if self._serialization_start is not None:
+            start, sql_time = self._serialization_start
+            self.serialization_time += time.perf_counter() - start - (self.sql_time - sql_time)
+            self._serialization_start = None
+
+    def finish(self):
+        self.end_serialization()
+        self.duration = time.perf_counter() - self.start
+
+    def as_header(self):
+        values = [
+            f'queries={self.queries}',
+            f'sql={self.sql_time * 1000:.2f}ms',
+            f'serialization={self.serialization_time * 1000:.2f}ms',
+            f'total={self.duration * 1000:.2f}ms',
+        ]
+        if self.rows is not None:
+            values.append(f'rows={self.rows}')
+        return '; '.join(values)
+
+    def observe(self, endpoint):
+        if Histogram is None:
+            return
+        REQUEST_SECONDS.labels(endpoint).observe(self.duration)
+        REQUEST_QUERIES.labels(endpoint).observe(self.queries)
+        SQL_SECONDS.labels(endpoint).observe(self.sql_time)
+        SERIALIZATION_SECONDS.labels(endpoint).observe(self.serialization_time)
+        if self.rows is not None:
+            ROWS.labels(endpoint).observe(self.rows)
+
+
+def get_metrics():
+    """Return the metrics of the current request, or None when instrumentation is off."""
+    return _current.get()
+
+
+@contextmanager
+def instrument():
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            yield metrics
+    finally:
+        metrics.finish()
+        _current.reset(token)
+
+
+@contextmanager
+def serialization():
+    """Account the enclosed block (minus its SQL time) as serialization of the current request."""
+    metrics = get_metrics()
+    if metrics is None:
+        yield
+        return
+    metrics.touched = True
+    metrics.start_serialization()
+    try:
+        yield
+    finally:
+        metrics.end_serialization()
+
+
+class InstrumentedViewSetMixin:
+    """
+    Split API requests into database, filtering and serialization time: everything after
+    the page or object has been fetched is accounted as serialization.
+    """
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        metrics = get_metrics()
+        if metrics is not None:
+            metrics.rows = len(page) if page is not None else None
+            metrics.start_serialization()
+        return page
+
+    def get_object(self):
+        obj = super().get_object()
+        metrics = get_metrics()
+        if metrics is not None:
+            metrics.rows = 1
+            metrics.start_serialization()
+        return obj
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        metrics = get_metrics()
+        if metrics is not None:
+            metrics.end_serialization()
+        return super().finalize_response(request, response, *args, **kwargs)
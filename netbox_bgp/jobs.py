@@ -0,0 +1,90 @@
+import uuid
+
+from django.core.cache import cache
+from django.utils import timezone
+from django_rq import get_queue
+
+
+JOB_KEY = 'netbox_bgp:job:{}'
+JOB_TIMEOUT = 24 * 60 * 60
+
+
+class JobStatus:
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+
+class JobProgress:
+    """
+    Progress of a background job, kept in the cache so the web UI can poll it while an
+    RQ worker runs the job.
+    """
+    def __init__(self, job_id, data):
+        self.job_id = job_id
+        self.data = data
+
+    @classmethod
+    def create(cls, name, user, return_url=None):
+        progress = cls(str(uuid.uuid4()), {
+            'name': name,
+            'user': user.pk,
+            'status': JobStatus.PENDING,
+            'created': timezone.now().isoformat(),
+            'done': 0,
+            'total': None,
+            'errors': [],
+            'message': '',
+            'return_url': return_url,
+        })
+        progress.save()
+        return progress
+
+    @classmethod
+    def get(cls, job_id):
+        data = cache.get(JOB_KEY.format(job_id))
+        return None if data is None else cls(job_id, data)
+
+    def save(self):
+        cache.set(JOB_KEY.format(self.job_id), self.data, JOB_TIMEOUT)
+
+    def update(self, **kwargs):
+        self.data.update(kwargs)
+        self.save()
+
+    def start(self, total=None):
+        self.update(status=JobStatus.RUNNING, total=total, started=timezone.now().isoformat())
+
+    def advance(self, count):
+        self.update(done=self.data['done'] + count)
+
+    def complete(self, message=''):
+        self.update(status=JobStatus.COMPLETED, message=message, completed=timezone.now().isoformat())
+
+    def fail(self, message, errors=None):
+        self.update(
+            status=JobStatus.FAILED, message=message, errors=errors or [], completed=timezone.now().isoformat()
+        )
+
+    @property
+    def finished(self):
+        return self.data['status'] in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    @property
+    def percent(self):
+        if not self.data['total']:
+            return 100 if self.data['status'] == JobStatus.COMPLETED else 0
+        return min(int(self.data['done'] * 100 / self.data['total']), 100)
+
+
+def enqueue_job(func, name, user, *args, return_url=None, **kwargs):
+    """
+    Create the progress record of a job and enqueue ``func(job_id, user_id, *args, **kwargs)``
+    on the default RQ queue. Returns the progress record.
+    """
+    progress = JobProgress.create(name, user, return_url=return_url)
+    get_queue('default').enqueue(
+        func, progress.job_id, user.pk, *args, job_id=progress.job_id, job_timeout=JOB_TIMEOUT, **kwargs
+    )
+    return progress
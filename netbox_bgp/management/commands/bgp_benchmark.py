@@ -0,0 +1,182 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from netbox_bgp.models import BGPSession, PrefixList, RoutingPolicy
+
+from .bgp_generate_data import DatasetGenerator
+
+
+def get_dataset_options(sessions):
+    """Scale the other object counts of a generated dataset with its number of sessions."""
+    return {
+        'sessions': sessions,
+        'sites': max(sessions // 10000, 1),
+        'devices': max(sessions // 100, 1),
+        'remote_asns': max(sessions // 20, 1),
+        'peer_groups': max(sessions // 2000, 1),
+        'policies': max(sessions // 500, 1),
+        'prefix_lists': max(sessions // 200, 1),
+        'communities': max(sessions // 50, 1),
+    }
+
+
+def get_scenarios():
+    """Return (name, method, url, body) for the benchmarked requests against the current dataset."""
+    session = BGPSession.objects.exclude(peer_group=None).order_by('pk').first()
+    policy = RoutingPolicy.objects.filter(group_import_policies__isnull=False).order_by('pk').first()
+    prefix_list = PrefixList.objects.filter(plrules__isnull=False).order_by('pk').first()
+    api = 'plugins-api:netbox_bgp-api'
+    graphql_query = (
+        '{bgp_session_list{id name status device{name} local_address{address} remote_address{address} '
+        'remote_as{asn} peer_group{name import_policies{name}} tags{name}}}'
+    )
+    return [
+        ('api_session_list', 'get', reverse(f'{api}:session-list') + '?limit=100', None),
+        ('api_session_detail', 'get', reverse(f'{api}:session-detail', kwargs={'pk': session.pk}), None),
+        ('api_routing_policy_list', 'get', reverse(f'{api}:routingpolicy-list') + '?limit=100', None),
+        ('api_routing_policy_rule_list', 'get', reverse(f'{api}:routingpolicyrule-list') + '?limit=100', None),
+        ('api_prefix_list_rule_list', 'get', reverse(f'{api}:prefixlistrule-list') + '?limit=100', None),
+        ('graphql_session_list', 'post', reverse('graphql'), {'query': graphql_query}),
+        ('view_session_list', 'get', reverse('plugins:netbox_bgp:bgpsession_list') + '?per_page=100', None),
+        ('view_session', 'get', reverse('plugins:netbox_bgp:bgpsession', kwargs={'pk': session.pk}), None),
+        ('view_routing_policy', 'get', reverse('plugins:netbox_bgp:routingpolicy', kwargs={'pk': policy.pk}), None),
+        ('view_prefix_list', 'get', reverse('plugins:netbox_bgp:prefixlist', kwargs={'pk': prefix_list.pk}), None),
+        ('view_device_panel', 'get', reverse('dcim:device', kwargs={'pk': session.device_id}), None),
+    ]
+
+
+class Benchmark:
+    """Run the scenarios with a superuser client and record wall time, queries and peak memory."""
+    def __init__(self, repeat=3):
+        self.repeat = repeat
+        self.client = Client()
+        user, _ = get_user_model().objects.get_or_create(
+            username='netbox_bgp_benchmark', defaults={'is_superuser': True, 'is_staff': True}
+        )
+        self.client.force_login(user)
+
+    def request(self, method, url, body):
+        if body is None:
+            response = getattr(self.client, method)(url)
+        else:
+            response = getattr(self.client, method)(url, json.dumps(body), content_type='application/json')
+        if response.status_code != 200:
+            raise CommandError(f'{method.upper()} {url} returned {response.status_code}')
+        return response
+
+    def measure(self, method, url, body):
+        # Warm up URL resolution, templates and caches outside the measurements
+        self.request(method, url, body)
+        timings = []
+        for _ in range(self.repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                self.request(method, url, body)
+                timings.append(time.perf_counter() - start)
+        # tracemalloc slows execution down, so memory is measured in a separate run
+        tracemalloc.start()
+        try:
+            self.request(method, url, body)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return {
+            'time_ms': round(statistics.median(timings) * 1000, 2),
+            'queries': len(queries),
+            'peak_kb': round(peak / 1024, 1),
+        }
+
+
+def find_regressions(results, baseline, tolerance):
+    """Compare results with a baseline; query counts must not grow, time and memory within tolerance."""
+    regressions = []
+    for size, scenarios in results.items():
+        for name, result in scenarios.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            if result['queries'] > previous['queries']:
+                regressions.append(f'{name}@{size}: {result["queries"]} queries (was {previous["queries"]})')
+            for metric in ('time_ms', 'peak_kb'):
+                if result[metric] > previous[metric] * (1 + tolerance):
+                    regressions.append(f'{name}@{size}: {metric} {result[metric]} (was {previous[metric]})')
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the plugin API, GraphQL and views against generated datasets of several '
+        'sizes, recording wall time, query count and peak memory. Datasets are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='100,1000,10000',
+            help='Comma-separated numbers of sessions of the generated datasets'
+        )
+        parser.add_argument('--repeat', type=int, default=3, help='Measured runs per scenario')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the generated datasets')
+        parser.add_argument('--baseline', help='JSON file with previous results to check for regressions')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed relative increase of time and memory over the baseline')
+        parser.add_argument('--output', help='Write the results to this JSON file (e.g. a new baseline)')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers')
+
+        # Measure uncached GraphQL and REST execution; the large datasets also exceed the default cost limit
+        plugins_config = {
+            **settings.PLUGINS_CONFIG,
+            'netbox_bgp': {
+                **settings.PLUGINS_CONFIG.get('netbox_bgp', {}),
+                'graphql_max_cost': None,
+                'graphql_cache_timeout': 0,
+                'api_cache_timeout': 0,
+            },
+        }
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['*'], PLUGINS_CONFIG=plugins_config):
+            for size in sizes:
+                results[str(size)] = self.run_size(size, options)
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+
+        if options['baseline']:
+            with open(options['baseline']) as fh:
+                baseline = json.load(fh)
+            regressions = find_regressions(results, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError('Performance regressions:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    def run_size(self, size, options):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{size} sessions'))
+        results = {}
+        with transaction.atomic():
+            DatasetGenerator(
+                prefix=f'bgp-benchmark-{size}', seed=options['seed'], **get_dataset_options(size)
+            ).generate()
+            benchmark = Benchmark(repeat=options['repeat'])
+            for name, method, url, body in get_scenarios():
+                results[name] = benchmark.measure(method, url, body)
+                self.stdout.write(
+                    f'  {name:<30} {results[name]["time_ms"]:>10.2f} ms {results[name]["queries"]:>5} queries '
+                    f'{results[name]["peak_kb"]:>10.1f} KiB'
+                )
+            transaction.set_rollback(True)
+        return results
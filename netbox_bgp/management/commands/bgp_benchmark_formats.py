@@ -0,0 +1,109 @@
+import io
+import json
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from netbox_bgp.api.renderers import MessagePackParser, MessagePackRenderer, msgpack
+from netbox_bgp.api.serializers import BGPSessionSerializer, PrefixListRuleSerializer
+from netbox_bgp.api.views import BGPSessionViewSet, PrefixListRuleViewSet
+from netbox_bgp.utils import join_related
+
+from .bgp_benchmark import get_dataset_options
+from .bgp_generate_data import DatasetGenerator
+
+
+FORMATS = (
+    ('json', JSONRenderer, JSONParser),
+    ('msgpack', MessagePackRenderer, MessagePackParser),
+)
+
+
+def get_pages(count, user):
+    """Serialize API pages of ``count`` sessions and prefix list rules, as their list endpoints do."""
+    request = Request(RequestFactory().get('/', SERVER_NAME='localhost'))
+    request.user = user
+    pages = {}
+    for name, serializer_class, viewset in (
+        ('session', BGPSessionSerializer, BGPSessionViewSet),
+        ('prefix_list_rule', PrefixListRuleSerializer, PrefixListRuleViewSet),
+    ):
+        lookups = [lookup for lookups in viewset.related_fields.values() for lookup in lookups]
+        queryset = join_related(viewset.queryset.order_by('pk'), lookups)[:count]
+        results = serializer_class(queryset, many=True, context={'request': request}).data
+        pages[name] = {'count': len(results), 'next': None, 'previous': None, 'results': results}
+    return pages
+
+
+def measure(page, renderer_class, parser_class, repeat):
+    """Return the payload size and the median encode and decode times of a page."""
+    renderer, parser = renderer_class(), parser_class()
+    encode, decode = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = renderer.render(page, renderer_class.media_type)
+        encode.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        parser.parse(io.BytesIO(payload), parser_class.media_type)
+        decode.append(time.perf_counter() - start)
+    return {
+        'bytes': len(payload),
+        'encode_ms': round(statistics.median(encode) * 1000, 2),
+        'decode_ms': round(statistics.median(decode) * 1000, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the payload size and encode/decode time of JSON and MessagePack for API pages of '
+        'sessions and prefix list rules. Uses a generated dataset, rolled back, unless --existing.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help='Objects per page')
+        parser.add_argument('--repeat', type=int, default=5, help='Measured runs per format')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the generated dataset')
+        parser.add_argument('--existing', action='store_true', help='Use the existing objects instead')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        if msgpack is None:
+            raise CommandError('The msgpack package is not installed')
+        count = options['count']
+        user, _ = get_user_model().objects.get_or_create(
+            username='netbox_bgp_benchmark', defaults={'is_superuser': True, 'is_staff': True}
+        )
+        with transaction.atomic():
+            if not options['existing']:
+                dataset_options = get_dataset_options(count)
+                # Enough prefix list rules for a full page
+                dataset_options['prefix_lists'] = max(count // 20, 1)
+                DatasetGenerator(
+                    prefix='bgp-benchmark-formats', seed=options['seed'], **dataset_options
+                ).generate()
+            pages = get_pages(count, user)
+            transaction.set_rollback(not options['existing'])
+
+        results = {}
+        for name, page in pages.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{page["count"]} {name} objects'))
+            results[name] = {}
+            for format_name, renderer_class, parser_class in FORMATS:
+                result = results[name][format_name] = measure(page, renderer_class, parser_class, options['repeat'])
+                self.stdout.write(
+                    f'  {format_name:<10} {result["bytes"] / 1024:>10.1f} KiB {result["encode_ms"]:>10.2f} ms encode '
+                    f'{result["decode_ms"]:>10.2f} ms decode'
+                )
+            json_size, msgpack_size = results[name]['json']['bytes'], results[name]['msgpack']['bytes']
+            self.stdout.write(f'  MessagePack is {msgpack_size / json_size:.0%} of the JSON size')
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
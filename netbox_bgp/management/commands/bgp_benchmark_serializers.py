@@ -0,0 +1,77 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from netbox_bgp.api.serializers import BGPPeerGroupSerializer, NestedRoutingPolicySerializer
+from netbox_bgp.models import BGPPeerGroup, RoutingPolicy
+
+
+def measure(function, count, repeat):
+    """Return the median time of ``function`` per serialized reference, in microseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) / count * 1e6, 2)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the cost per reference of serializing nested routing policies with a serializer '
+        'per value and with the field\'s reused nested serializer. The dataset is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000, help='Routing policies of the peer group')
+        parser.add_argument('--repeat', type=int, default=5, help='Measured runs per method')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        count, repeat = options['count'], options['repeat']
+        user, _ = get_user_model().objects.get_or_create(
+            username='netbox_bgp_benchmark', defaults={'is_superuser': True, 'is_staff': True}
+        )
+        request = Request(RequestFactory().get('/', SERVER_NAME='localhost'))
+        request.user = user
+        context = {'request': request}
+
+        with transaction.atomic():
+            peer_group = BGPPeerGroup.objects.create(name='bgp-benchmark-serializers')
+            policies = RoutingPolicy.objects.bulk_create(
+                RoutingPolicy(name=f'bgp-benchmark-serializers-{i}') for i in range(count)
+            )
+            peer_group.import_policies.set(policies)
+            peer_group = BGPPeerGroup.objects.prefetch_related('import_policies').get(pk=peer_group.pk)
+
+            field = BGPPeerGroupSerializer(context=context).fields['import_policies'].child_relation
+            results = {
+                'per_value_us': measure(
+                    lambda: [NestedRoutingPolicySerializer(policy, context=context).data for policy in policies],
+                    count, repeat
+                ),
+                'reused_us': measure(lambda: [field.to_representation(policy) for policy in policies], count, repeat),
+                'peer_group_us': measure(
+                    lambda: BGPPeerGroupSerializer(peer_group, context=context).data, count, repeat
+                ),
+            }
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{count} nested routing policies'))
+        for name, label in (
+            ('per_value_us', 'serializer per value'),
+            ('reused_us', 'reused nested serializer'),
+            ('peer_group_us', 'peer group serializer'),
+        ):
+            self.stdout.write(f'  {label:<30} {results[name]:>10.2f} us per reference')
+        self.stdout.write(f'  Reusing the nested serializer costs {results["reused_us"] / results["per_value_us"]:.0%}')
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
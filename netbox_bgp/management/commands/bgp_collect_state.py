@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+
+from netbox_bgp.collectors import (
+    FileCollector, JSONFeedCollector, SessionIndex, acollect_states, get_collectors, store_states
+)
+from netbox_bgp.drift import record_observations, update_drift
+from netbox_bgp.poller import DEFAULT_PORT, DevicePollerCollector, FakeDeviceServer
+
+
+class Command(BaseCommand):
+    help = (
+        'Collect the operational state of BGP sessions from the collectors of the state_collectors '
+        'setting (or those given as options) and store it. With --interval, keep collecting.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', action='append', default=[], help='Directory of JSON state files to read')
+        parser.add_argument('--feed', action='append', default=[], help='HOST:PORT of a JSON state feed')
+        parser.add_argument('--remove', action='store_true', help='Remove state files once read')
+        parser.add_argument('--poll', action='store_true', help='Poll every device with BGP sessions')
+        parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to poll devices on')
+        parser.add_argument('--concurrency', type=int, default=100, help='Devices polled at a time')
+        parser.add_argument(
+            '--fake', action='store_true',
+            help='Poll a local fake device server serving the sessions in the database (for benchmarks)'
+        )
+        parser.add_argument('--fake-latency', type=float, default=0.05, help='Response delay of the fake devices')
+        parser.add_argument('--interval', type=int, default=0, help='Seconds between collections (default: once)')
+
+    def get_collectors(self, options, fake_port=None):
+        collectors = [FileCollector(path, remove=options['remove']) for path in options['file']]
+        for feed in options['feed']:
+            host, _, port = feed.rpartition(':')
+            if not host or not port.isdigit():
+                raise CommandError(f'Invalid feed "{feed}", expected HOST:PORT')
+            collectors.append(JSONFeedCollector(host, port))
+        if options['poll'] or fake_port is not None:
+            collectors.append(DevicePollerCollector(
+                port=fake_port or options['port'],
+                host='127.0.0.1' if fake_port is not None else None,
+                concurrency=options['concurrency'],
+            ))
+        return collectors or get_collectors()
+
+    def store(self, records, errors, elapsed):
+        index = SessionIndex()
+        changed, unresolved = set(), []
+        for source, source_records in records.items():
+            source_changed, source_unresolved = store_states(source_records, source=source, index=index)
+            changed |= source_changed
+            unresolved.extend(source_unresolved)
+        # Neighbors reported by device, including those without a session, feed the drift
+        changed_devices = record_observations(
+            [record for source_records in records.values() for record in source_records]
+        )
+        drift_devices = update_drift(changed_devices)
+        for error in errors[:100]:
+            self.stderr.write(error)
+        if len(errors) > 100:
+            self.stderr.write(f'... and {len(errors) - 100} more errors')
+        self.stdout.write(
+            f'Collected {sum(len(r) for r in records.values())} session states in {elapsed:.2f}s: '
+            f'{len(changed)} changed, {len(unresolved)} unknown sessions, '
+            f'drift recomputed on {drift_devices} devices'
+        )
+
+    async def run(self, options):
+        server = None
+        if options['fake']:
+            server = await sync_to_async(FakeDeviceServer.from_sessions)(latency=options['fake_latency'])
+            fake_port = await server.start()
+            self.stdout.write(f'Serving {len(server.devices)} fake devices on port {fake_port}')
+        else:
+            fake_port = None
+        # The collectors live as long as the event loop, so pollers reuse their connections
+        collectors = await sync_to_async(self.get_collectors)(options, fake_port)
+        if not collectors:
+            raise CommandError('No collectors: configure state_collectors or pass --file/--feed/--poll')
+        try:
+            while True:
+                start = time.monotonic()
+                records, errors = await acollect_states(collectors)
+                await sync_to_async(self.store)(records, errors, time.monotonic() - start)
+                if not options['interval']:
+                    break
+                await asyncio.sleep(max(options['interval'] - (time.monotonic() - start), 0))
+        finally:
+            for collector in collectors:
+                if isinstance(collector, DevicePollerCollector):
+                    collector.poller.close()
+            if server is not None:
+                await server.stop()
+
+    def handle(self, *args, **options):
+        asyncio.run(self.run(options))
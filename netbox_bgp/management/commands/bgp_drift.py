@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dcim.models import Device
+
+from netbox_bgp.choices import DriftKindChoices
+from netbox_bgp.drift import get_drift_report, update_drift
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the drift between BGP sessions and the neighbors observed by bgp_collect_state '
+        'for the devices whose sessions changed, and print the drift report.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute the drift of every device')
+        parser.add_argument('--device', action='append', default=[], help='Only report these devices (by name)')
+        parser.add_argument(
+            '--kind', action='append', default=[], choices=DriftKindChoices.values(), help='Only report this kind'
+        )
+        parser.add_argument('--limit', type=int, default=100, help='Entries to print (default: 100)')
+
+    def handle(self, *args, **options):
+        if options['limit'] < 0:
+            raise CommandError('--limit must be positive')
+        count = update_drift(full=options['full'])
+        report = get_drift_report(
+            devices=Device.objects.filter(name__in=options['device']) if options['device'] else None,
+            kinds=options['kind'],
+            limit=options['limit'],
+        )
+        for entry in report['entries']:
+            details = ', '.join(
+                f'{field}: {value["intended"]} != {value["observed"]}' if isinstance(value, dict)
+                else f'{field}: {value}'
+                for field, value in entry['details'].items()
+            )
+            self.stdout.write(f'{entry["device"]["name"]} {entry["remote_address"]} {entry["kind"]} {details}'.rstrip())
+        self.stdout.write(
+            f'Drift recomputed on {count} devices: '
+            + ', '.join(f'{report["kinds"][kind]} {kind}' for kind in DriftKindChoices.values())
+        )
@@ -0,0 +1,106 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from netbox_bgp.choices import SessionStatusChoices
+from netbox_bgp.models import BGPSession, Community, PrefixList, PrefixListRule
+
+
+def get_queries():
+    """
+    Return the hot lookups of the plugin's filtersets and views as a name -> queryset
+    mapping. Lookup values are sampled from existing rows.
+    """
+    session = BGPSession.objects.exclude(peer_group=None).first() or BGPSession.objects.first()
+    community = Community.objects.exclude(tenant=None).first() or Community.objects.first()
+    rule = PrefixListRule.objects.exclude(prefix_custom=None).first()
+    queries = {}
+    if session is not None:
+        queries.update({
+            'session_by_device_status': BGPSession.objects.filter(
+                device_id=session.device_id, status=SessionStatusChoices.STATUS_ACTIVE
+            ),
+            'session_by_remote_as': BGPSession.objects.filter(remote_as_id=session.remote_as_id),
+            'session_by_site_status': BGPSession.objects.filter(
+                site_id=session.site_id, status=SessionStatusChoices.STATUS_ACTIVE
+            ),
+            'session_by_peer_group': BGPSession.objects.filter(peer_group_id=session.peer_group_id),
+            'session_not_active': BGPSession.objects.filter(
+                status__in=[SessionStatusChoices.STATUS_FAILED, SessionStatusChoices.STATUS_OFFLINE]
+            ),
+        })
+    if community is not None:
+        queries['community_by_status_tenant'] = Community.objects.filter(
+            status=community.status, tenant_id=community.tenant_id
+        )
+    if rule is not None:
+        queries['prefix_list_rule_contains'] = PrefixListRule.objects.filter(
+            prefix_custom__net_contains_or_equals=str(rule.prefix_custom)
+        )
+        queries['prefix_list_name_search'] = PrefixList.objects.filter(
+            name__icontains=rule.prefix_list.name[:4]
+        )
+    return queries
+
+
+def summarize(plan):
+    """Return the node types and the estimated total cost of an EXPLAIN (FORMAT JSON) plan."""
+    nodes = []
+
+    def walk(node):
+        name = node['Node Type']
+        if 'Index Name' in node:
+            name = f'{name} using {node["Index Name"]}'
+        elif 'Relation Name' in node:
+            name = f'{name} on {node["Relation Name"]}'
+        nodes.append(name)
+        for child in node.get('Plans', ()):
+            walk(child)
+
+    walk(plan['Plan'])
+    return {'nodes': nodes, 'cost': plan['Plan']['Total Cost']}
+
+
+class Command(BaseCommand):
+    help = (
+        'Print the query plans of the hot netbox_bgp lookups. Save them with --output before '
+        'a schema change and pass that file to --compare afterwards to see the difference.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*', help='Names of the queries to explain (default: all)')
+        parser.add_argument('--analyze', action='store_true', help='Execute the queries (EXPLAIN ANALYZE)')
+        parser.add_argument('--output', help='Write the plans to this JSON file')
+        parser.add_argument('--compare', help='Compare the plans with those of a previous --output file')
+
+    def handle(self, *args, **options):
+        queries = get_queries()
+        if not queries:
+            raise CommandError('No BGP data to sample lookup values from')
+        if options['queries']:
+            unknown = set(options['queries']) - set(queries)
+            if unknown:
+                raise CommandError(f'Unknown queries: {", ".join(sorted(unknown))}')
+            queries = {name: queries[name] for name in options['queries']}
+
+        baseline = {}
+        if options['compare']:
+            with open(options['compare']) as fh:
+                baseline = json.load(fh)
+
+        plans = {}
+        for name, queryset in queries.items():
+            explain_options = {'analyze': True} if options['analyze'] else {}
+            plans[name] = json.loads(queryset.explain(format='json', **explain_options))[0]
+            summary = summarize(plans[name])
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(f'  cost {summary["cost"]}: {" > ".join(summary["nodes"])}')
+            if name in baseline:
+                before = summarize(baseline[name])
+                self.stdout.write(f'  was  {before["cost"]}: {" > ".join(before["nodes"])}')
+            if options['analyze']:
+                self.stdout.write(f'  execution time {plans[name]["Execution Time"]} ms')
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(plans, fh, indent=2)
@@ -0,0 +1,37 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from netbox_bgp.export import DEFAULT_BATCH_SIZE, EXPORT_FORMATS, EXPORT_TABLES, pyarrow, write_export
+
+
+class Command(BaseCommand):
+    help = (
+        'Export BGP sessions, communities and routing policy and prefix list rules as Parquet or '
+        'Arrow files, one per table, with foreign keys as id columns. Requires pyarrow.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Directory to write the files to')
+        parser.add_argument(
+            '--table', action='append', choices=list(EXPORT_TABLES), help='Table to export (default: all)'
+        )
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='parquet', help='File format')
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Rows per record batch (and Parquet row group); bounds the memory used'
+        )
+
+    def handle(self, *args, **options):
+        if pyarrow is None:
+            raise CommandError('The pyarrow package is not installed')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        os.makedirs(options['output'], exist_ok=True)
+        extension = 'parquet' if options['format'] == 'parquet' else 'arrow'
+        for table in options['table'] or EXPORT_TABLES:
+            path = os.path.join(options['output'], f'{table}.{extension}')
+            start = time.monotonic()
+            rows = write_export(table, path, options['format'], batch_size=options['batch_size'])
+            self.stdout.write(f'{table}: {rows} rows written to {path} in {time.monotonic() - start:.2f}s')
@@ -0,0 +1,278 @@
+import ipaddress
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from dcim.models import Device, DeviceRole, DeviceType, Manufacturer, Site
+from ipam.models import ASN, IPAddress, RIR
+
+from netbox_bgp.choices import ActionChoices, CommunityStatusChoices, SessionStatusChoices
+from netbox_bgp.models import (
+    BGPPeerGroup, BGPSession, Community, PrefixList, PrefixListRule, RoutingPolicy, RoutingPolicyRule,
+)
+from netbox_bgp.pairing import update_pairing
+from netbox_bgp.signals import LIBRARY_VERSION, device_version, model_version
+from netbox_bgp.versioning import bump_data_version, bump_versions
+
+
+LOCAL_NETWORK = ipaddress.ip_network('10.0.0.0/8')
+REMOTE_NETWORK = ipaddress.ip_network('100.64.0.0/10')
+LOCAL_ASN_BASE = 64512
+REMOTE_ASN_BASE = 4200000000
+
+SESSION_STATUS_WEIGHTS = {
+    SessionStatusChoices.STATUS_ACTIVE: 85,
+    SessionStatusChoices.STATUS_PLANNED: 5,
+    SessionStatusChoices.STATUS_OFFLINE: 5,
+    SessionStatusChoices.STATUS_FAILED: 5,
+}
+
+
+class DatasetGenerator:
+    """
+    Bulk-create a synthetic BGP dataset. The same options and seed always produce the
+    same objects; all names start with ``prefix`` so several datasets can coexist.
+    """
+    def __init__(self, prefix='bgp-scale', seed=0, sites=10, devices=1000, sessions=100000,
+                 remote_asns=5000, peer_groups=50, policies=200, rules_per_policy=10,
+                 prefix_lists=500, rules_per_list=20, communities=2000, batch_size=5000, log=None):
+        if sessions > REMOTE_NETWORK.num_addresses:
+            raise ValueError(f'At most {REMOTE_NETWORK.num_addresses} sessions are supported')
+        if devices > LOCAL_NETWORK.num_addresses:
+            raise ValueError(f'At most {LOCAL_NETWORK.num_addresses} devices are supported')
+        self.prefix = prefix
+        self.random = random.Random(seed)
+        self.counts = {
+            'sites': max(sites, 1),
+            'devices': max(devices, 1),
+            'sessions': sessions,
+            'remote_asns': max(remote_asns, 1),
+            'peer_groups': peer_groups,
+            'policies': policies,
+            'rules_per_policy': rules_per_policy,
+            'prefix_lists': prefix_lists,
+            'rules_per_list': rules_per_list,
+            'communities': communities,
+        }
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        # Models written with bulk_create(), which sends no signals
+        self.created_models = set()
+
+    def _bulk_create(self, model, objects):
+        start = time.monotonic()
+        created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.created_models.add(model)
+        self.log(f'{model._meta.verbose_name_plural}: {len(created)} in {time.monotonic() - start:.1f}s')
+        return created
+
+    def _batched(self, objects):
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _next_asn(base, limit=None):
+        # Continue after the ASNs of previously generated datasets
+        asns = ASN.objects.filter(asn__gte=base)
+        if limit is not None:
+            asns = asns.filter(asn__lt=limit)
+        last = asns.aggregate(last=Max('asn'))['last']
+        return base if last is None else last + 1
+
+    def generate(self):
+        if Site.objects.filter(slug__startswith=f'{self.prefix}-').exists():
+            raise CommandError(f'A dataset with the prefix "{self.prefix}" already exists')
+        with transaction.atomic():
+            self.create_dcim()
+            self.create_ipam()
+            self.create_policies()
+            self.create_sessions()
+        bump_data_version()
+        versions = {LIBRARY_VERSION}
+        versions.update(model_version(model._meta.label_lower) for model in self.created_models)
+        versions.update(device_version(device.pk) for device in self.devices)
+        bump_versions(versions)
+
+    def create_dcim(self):
+        prefix = self.prefix
+        manufacturer = Manufacturer.objects.create(name=f'{prefix}-manufacturer', slug=f'{prefix}-manufacturer')
+        device_type = DeviceType.objects.create(
+            manufacturer=manufacturer, model=f'{prefix}-router', slug=f'{prefix}-router'
+        )
+        role = DeviceRole.objects.create(name=f'{prefix}-router', slug=f'{prefix}-router')
+        # NetBox 3.6 renamed Device.device_role to Device.role
+        role_field = 'role' if any(f.name == 'role' for f in Device._meta.get_fields()) else 'device_role'
+        self.sites = self._bulk_create(Site, (
+            Site(name=f'{prefix}-site{i}', slug=f'{prefix}-site{i}') for i in range(self.counts['sites'])
+        ))
+        self.devices = self._bulk_create(Device, (
+            Device(
+                name=f'{prefix}-router{i}', device_type=device_type, site=self.sites[i % len(self.sites)],
+                **{role_field: role}
+            )
+            for i in range(self.counts['devices'])
+        ))
+
+    def create_ipam(self):
+        prefix = self.prefix
+        rir = RIR.objects.create(name=f'{prefix}-rir', slug=f'{prefix}-rir', is_private=True)
+        local_base = self._next_asn(LOCAL_ASN_BASE, REMOTE_ASN_BASE)
+        self.local_asns = self._bulk_create(ASN, (
+            ASN(asn=local_base + i, rir=rir) for i in range(len(self.sites))
+        ))
+        remote_base = self._next_asn(REMOTE_ASN_BASE)
+        self.remote_asns = self._bulk_create(ASN, (
+            ASN(asn=remote_base + i, rir=rir) for i in range(self.counts['remote_asns'])
+        ))
+        base = int(LOCAL_NETWORK.network_address)
+        self.local_addresses = self._bulk_create(IPAddress, (
+            IPAddress(address=f'{ipaddress.ip_address(base + i + 1)}/32', description=prefix)
+            for i in range(len(self.devices))
+        ))
+
+    def create_policies(self):
+        prefix, rnd = self.prefix, self.random
+        actions = ActionChoices.values()
+        statuses = CommunityStatusChoices.values()
+        self.communities = self._bulk_create(Community, (
+            Community(
+                value=f'{LOCAL_ASN_BASE + i % 1000}:{i}', status=rnd.choice(statuses),
+                site=rnd.choice(self.sites), description=prefix
+            )
+            for i in range(self.counts['communities'])
+        ))
+
+        self.prefix_lists = self._bulk_create(PrefixList, (
+            PrefixList(name=f'{prefix}-pl{i}', family='ipv4') for i in range(self.counts['prefix_lists'])
+        ))
+        self._bulk_create(PrefixListRule, (
+            PrefixListRule(
+                prefix_list=prefix_list, index=(j + 1) * 10, action=rnd.choice(actions),
+                prefix_custom=f'{ipaddress.ip_address(rnd.getrandbits(8) << 24)}/8'
+                if j == 0 else f'{ipaddress.ip_address(rnd.getrandbits(16) << 16)}/16',
+                le=rnd.choice((None, 24, 32)),
+            )
+            for prefix_list in self.prefix_lists
+            for j in range(self.counts['rules_per_list'])
+        ))
+
+        self.policies = self._bulk_create(RoutingPolicy, (
+            RoutingPolicy(name=f'{prefix}-policy{i}') for i in range(self.counts['policies'])
+        ))
+        rules = self._bulk_create(RoutingPolicyRule, (
+            RoutingPolicyRule(
+                routing_policy=policy, index=(j + 1) * 10, action=rnd.choice(actions),
+                set_actions={'local-preference': rnd.choice((100, 150, 200))},
+            )
+            for policy in self.policies
+            for j in range(self.counts['rules_per_policy'])
+        ))
+        if self.prefix_lists:
+            through = RoutingPolicyRule.match_ip_address.through
+            self._bulk_create(through, (
+                through(routingpolicyrule_id=rule.pk, prefixlist_id=rnd.choice(self.prefix_lists).pk)
+                for rule in rules
+            ))
+        if self.communities:
+            through = RoutingPolicyRule.match_community.through
+            self._bulk_create(through, (
+                through(routingpolicyrule_id=rule.pk, community_id=rnd.choice(self.communities).pk)
+                for rule in rules if rnd.random() < 0.5
+            ))
+
+        self.peer_groups = self._bulk_create(BGPPeerGroup, (
+            BGPPeerGroup(name=f'{prefix}-group{i}') for i in range(self.counts['peer_groups'])
+        ))
+        if self.policies:
+            for name in ('import_policies', 'export_policies'):
+                through = getattr(BGPPeerGroup, name).through
+                self._bulk_create(through, (
+                    through(bgppeergroup_id=group.pk, routingpolicy_id=rnd.choice(self.policies).pk)
+                    for group in self.peer_groups
+                ))
+
+    def create_sessions(self):
+        rnd = self.random
+        statuses = list(SESSION_STATUS_WEIGHTS)
+        weights = list(SESSION_STATUS_WEIGHTS.values())
+        base = int(REMOTE_NETWORK.network_address)
+        start = time.monotonic()
+        created = 0
+        for batch in self._batched(range(self.counts['sessions'])):
+            remote_addresses = IPAddress.objects.bulk_create([
+                IPAddress(address=f'{ipaddress.ip_address(base + i + 1)}/32', description=self.prefix)
+                for i in batch
+            ])
+            sessions = []
+            for i, remote_address in zip(batch, remote_addresses):
+                device_index = i % len(self.devices)
+                device = self.devices[device_index]
+                sessions.append(BGPSession(
+                    name=f'session{i}',
+                    device=device,
+                    site_id=device.site_id,
+                    local_address=self.local_addresses[device_index],
+                    local_as=self.local_asns[device_index % len(self.sites)],
+                    remote_address=remote_address,
+                    remote_as=rnd.choice(self.remote_asns),
+                    status=rnd.choices(statuses, weights)[0],
+                    peer_group=rnd.choice(self.peer_groups) if self.peer_groups and rnd.random() < 0.7 else None,
+                ))
+            BGPSession.objects.bulk_create(sessions)
+            update_pairing([session.pk for session in sessions])
+            self.created_models.update((IPAddress, BGPSession))
+            created += len(sessions)
+            self.log(f'BGP sessions: {created}/{self.counts["sessions"]}')
+        self.log(f'BGP sessions: {created} in {time.monotonic() - start:.1f}s')
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generate a synthetic BGP dataset for scale and performance testing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bgp-scale', help='Name prefix of the generated objects')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--sites', type=int, default=10)
+        parser.add_argument('--devices', type=int, default=1000)
+        parser.add_argument('--sessions', type=int, default=100000)
+        parser.add_argument('--remote-asns', type=int, default=5000)
+        parser.add_argument('--peer-groups', type=int, default=50)
+        parser.add_argument('--policies', type=int, default=200)
+        parser.add_argument('--rules-per-policy', type=int, default=10)
+        parser.add_argument('--prefix-lists', type=int, default=500)
+        parser.add_argument('--rules-per-list', type=int, default=20)
+        parser.add_argument('--communities', type=int, default=2000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            generator = DatasetGenerator(
+                prefix=options['prefix'],
+                seed=options['seed'],
+                sites=options['sites'],
+                devices=options['devices'],
+                sessions=options['sessions'],
+                remote_asns=options['remote_asns'],
+                peer_groups=options['peer_groups'],
+                policies=options['policies'],
+                rules_per_policy=options['rules_per_policy'],
+                prefix_lists=options['prefix_lists'],
+                rules_per_list=options['rules_per_list'],
+                communities=options['communities'],
+                batch_size=options['batch_size'],
+                log=self.stdout.write if options['verbosity'] else None,
+            )
+        except ValueError as e:
+            raise CommandError(e)
+        start = time.monotonic()
+        generator.generate()
+        self.stdout.write(self.style.SUCCESS(f'Dataset generated in {time.monotonic() - start:.1f}s'))
@@ -0,0 +1,235 @@
+import hashlib
+import json
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from graphql import (
+    FieldNode, FragmentDefinitionNode, GraphQLError, InlineFragmentNode, OperationDefinitionNode,
+    parse, print_ast,
+)
+from rest_framework.exceptions import AuthenticationFailed
+
+from netbox.api.authentication import TokenAuthentication
+from netbox.config import get_config
+
+from .instrumentation import get_metrics, instrument
+from .signals import PERMISSIONS_VERSION, RELATED_MODELS
+from .versioning import get_data_version, get_versions
+
+
+class InstrumentationMiddleware:
+    """
+    Record query count, SQL time, serialization time and row count of requests to the
+    plugin (and of pages rendering its template extensions) when ``instrumentation`` is
+    enabled. Metrics are exported as Prometheus histograms and, with
+    ``instrumentation_header``, in an ``X-BGP-Metrics`` response header.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.plugin_settings = settings.PLUGINS_CONFIG.get('netbox_bgp', {})
+        self._paths = None
+
+    def __call__(self, request):
+        if not self.plugin_settings.get('instrumentation'):
+            return self.get_response(request)
+
+        with instrument() as metrics:
+            response = self.get_response(request)
+        if not metrics.touched and not request.path.startswith(self.paths):
+            return response
+
+        match = request.resolver_match
+        metrics.observe(match.view_name if match else request.path)
+        if self.plugin_settings.get('instrumentation_header'):
+            response['X-BGP-Metrics'] = metrics.as_header()
+        return response
+
+    @property
+    def paths(self):
+        if self._paths is None:
+            base_url = apps.get_app_config('netbox_bgp').base_url
+            self._paths = (
+                f'/{settings.BASE_PATH}plugins/{base_url}/',
+                f'/{settings.BASE_PATH}api/plugins/{base_url}/',
+            )
+        return self._paths
+
+
+class GraphQLQueryMiddleware:
+    """
+    Guard GraphQL queries against the plugin's root fields.
+
+    Queries whose estimated cost exceeds the ``graphql_max_cost`` setting are rejected
+    before execution. Queries touching only plugin fields, and only plugin models and the
+    core models whose writes change the BGP data version, are answered from a cache keyed
+    by the normalized query, its variables, the user, the BGP data version and the
+    permissions version when ``graphql_cache_timeout`` is set.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.plugin_settings = settings.PLUGINS_CONFIG.get('netbox_bgp', {})
+        self._graphql_path = None
+        self._schema = None
+        self._root_fields = None
+
+    def __call__(self, request):
+        if request.method not in ('GET', 'POST') or request.path != self.graphql_path:
+            return self.get_response(request)
+        if not get_config().GRAPHQL_ENABLED:
+            return self.get_response(request)
+
+        params = self._get_params(request)
+        if not params or not params.get('query'):
+            return self.get_response(request)
+        try:
+            document = parse(params['query'])
+        except GraphQLError:
+            # Let the view report syntax errors
+            return self.get_response(request)
+
+        root_fields = self._get_root_fields(document)
+        if not root_fields & self.root_fields:
+            return self.get_response(request)
+        metrics = get_metrics()
+        if metrics is not None:
+            metrics.touched = True
+
+        try:
+            self._authenticate(request)
+        except AuthenticationFailed:
+            # The view rejects invalid tokens
+            return self.get_response(request)
+
+        max_cost = self.plugin_settings.get('graphql_max_cost')
+        if max_cost:
+            from .graphql.cost import QueryCostAnalyzer
+            analyzer = QueryCostAnalyzer(
+                self.schema, self.root_fields, request,
+                default_fan_out=self.plugin_settings.get('graphql_default_fan_out', 10)
+            )
+            cost = analyzer.estimate(document, params.get('variables'))
+            if cost > max_cost:
+                return JsonResponse(
+                    {'errors': [{
+                        'message': f'Query cost {cost} exceeds the limit of {max_cost} for BGP objects',
+                    }]},
+                    status=400
+                )
+
+        timeout = self.plugin_settings.get('graphql_cache_timeout')
+        if not timeout or not request.user.is_authenticated or not root_fields <= self.root_fields:
+            return self.get_response(request)
+        if not self._is_tracked(document, params):
+            return self.get_response(request)
+
+        cache_key = self._get_cache_key(request, document, params)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            response = HttpResponse(cached, content_type='application/json')
+            response['X-BGP-Cache'] = 'HIT'
+            return response
+
+        response = self.get_response(request)
+        if response.status_code == 200 and b'"errors"' not in response.content:
+            cache.set(cache_key, response.content, timeout)
+            response['X-BGP-Cache'] = 'MISS'
+        return response
+
+    @property
+    def graphql_path(self):
+        if self._graphql_path is None:
+            self._graphql_path = reverse('graphql')
+        return self._graphql_path
+
+    @property
+    def schema(self):
+        if self._schema is None:
+            from netbox.graphql.schema import schema
+            self._schema = schema.graphql_schema
+        return self._schema
+
+    @property
+    def root_fields(self):
+        if self._root_fields is None:
+            from .graphql import BGPQuery
+            self._root_fields = set(BGPQuery._meta.fields)
+        return self._root_fields
+
+    @staticmethod
+    def _get_params(request):
+        if request.method == 'GET':
+            params = request.GET.dict()
+        elif request.content_type == 'application/json':
+            try:
+                params = json.loads(request.body)
+            except ValueError:
+                return None
+        elif request.content_type == 'application/graphql':
+            params = {'query': request.body.decode()}
+        else:
+            params = request.POST.dict()
+        if not isinstance(params, dict):
+            return None
+        variables = params.get('variables')
+        if isinstance(variables, str):
+            try:
+                params['variables'] = json.loads(variables)
+            except ValueError:
+                params['variables'] = None
+        return params
+
+    @staticmethod
+    def _get_root_fields(document):
+        fragments = {
+            d.name.value: d for d in document.definitions if isinstance(d, FragmentDefinitionNode)
+        }
+
+        def collect(selection_set, seen):
+            for selection in selection_set.selections:
+                if isinstance(selection, FieldNode):
+                    yield selection.name.value
+                elif isinstance(selection, InlineFragmentNode):
+                    yield from collect(selection.selection_set, seen)
+                elif selection.name.value not in seen and selection.name.value in fragments:
+                    seen.add(selection.name.value)
+                    yield from collect(fragments[selection.name.value].selection_set, seen)
+
+        fields = set()
+        for definition in document.definitions:
+            if isinstance(definition, OperationDefinitionNode):
+                fields.update(collect(definition.selection_set, set()))
+        return fields
+
+    @staticmethod
+    def _authenticate(request):
+        # Mirror the token authentication performed by NetBox's GraphQL view
+        if not request.user.is_authenticated:
+            auth_info = TokenAuthentication().authenticate(request)
+            if auth_info is not None:
+                request.user = auth_info[0]
+
+    def _is_tracked(self, document, params):
+        # Only the writes to plugin models and RELATED_MODELS change the data version
+        from .graphql.cost import get_selected_models
+
+        models = get_selected_models(self.schema, document, self.root_fields, params.get('variables'))
+        return models is not None and all(
+            model._meta.app_label == 'netbox_bgp' or model._meta.label_lower in RELATED_MODELS
+            for model in models
+        )
+
+    @staticmethod
+    def _get_cache_key(request, document, params):
+        key = json.dumps([
+            print_ast(document),
+            params.get('variables'),
+            params.get('operationName'),
+            request.user.pk,
+            get_data_version(),
+            # Object permissions decide which objects the user may see
+            get_versions([PERMISSIONS_VERSION])[PERMISSIONS_VERSION],
+        ], sort_keys=True, default=str)
+        return f'netbox_bgp:graphql:{hashlib.sha256(key.encode()).hexdigest()}'
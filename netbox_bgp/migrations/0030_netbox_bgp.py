@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:12
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_bgp', '0029_netbox_bgp'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='prefixlistrule',
+            index=models.Index(fields=['action', 'prefix_list', 'index'], name='netbox_bgp_plrule_action'),
+        ),
+        migrations.AddIndex(
+            model_name='prefixlistrule',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['prefix_custom'], name='netbox_bgp_plrule_prefix', opclasses=['inet_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='routingpolicyrule',
+            index=models.Index(fields=['action', 'routing_policy', 'index'], name='netbox_bgp_rprule_action'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:40
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_bgp', '0030_netbox_bgp'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='prefixlist',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='netbox_bgp_pl_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='prefixlistrule',
+            index=models.Index(fields=['index'], name='netbox_bgp_plrule_index'),
+        ),
+    ]
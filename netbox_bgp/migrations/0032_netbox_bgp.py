@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_bgp', '0031_netbox_bgp'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='community',
+            index=models.Index(fields=['status', 'tenant'], name='netbox_bgp_comm_status_tenant'),
+        ),
+        migrations.AddIndex(
+            model_name='bgpsession',
+            index=models.Index(fields=['device', 'status'], name='netbox_bgp_sess_dev_status'),
+        ),
+        migrations.AddIndex(
+            model_name='bgpsession',
+            index=models.Index(fields=['remote_as', 'status'], name='netbox_bgp_sess_ras_status'),
+        ),
+        migrations.AddIndex(
+            model_name='bgpsession',
+            index=models.Index(fields=['site', 'status'], name='netbox_bgp_sess_site_status'),
+        ),
+        migrations.AddIndex(
+            model_name='bgpsession',
+            index=models.Index(condition=models.Q(('peer_group__isnull', False)), fields=['peer_group'], name='netbox_bgp_sess_peer_group'),
+        ),
+        migrations.AddIndex(
+            model_name='bgpsession',
+            index=models.Index(condition=models.Q(('status', 'active'), _negated=True), fields=['status'], name='netbox_bgp_sess_not_active'),
+        ),
+        migrations.AlterField(
+            model_name='bgpsession',
+            name='device',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, to='dcim.device'),
+        ),
+        migrations.AlterField(
+            model_name='bgpsession',
+            name='peer_group',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='netbox_bgp.bgppeergroup'),
+        ),
+        migrations.AlterField(
+            model_name='bgpsession',
+            name='remote_as',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='remote_as', to='ipam.asn'),
+        ),
+        migrations.AlterField(
+            model_name='bgpsession',
+            name='site',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='dcim.site'),
+        ),
+    ]
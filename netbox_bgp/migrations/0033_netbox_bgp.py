@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_bgp', '0032_netbox_bgp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BGPSessionState',
+            fields=[
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='state', serialize=False, to='netbox_bgp.bgpsession')),
+                ('state', models.CharField(max_length=20)),
+                ('prefixes_received', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('prefixes_sent', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('source', models.CharField(blank=True, max_length=100)),
+                ('last_change', models.DateTimeField(blank=True, null=True)),
+                ('updated', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'BGP Session State',
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dcim', '0153_created_datetimefield'),
+        ('netbox_bgp', '0033_netbox_bgp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BGPDeviceState',
+            fields=[
+                ('device', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='bgp_state', serialize=False, to='dcim.device')),
+                ('neighbors', models.JSONField(default=list)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('updated', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'BGP Device State',
+            },
+        ),
+        migrations.CreateModel(
+            name='BGPDrift',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=20)),
+                ('remote_address', models.CharField(max_length=64)),
+                ('details', models.JSONField(default=dict)),
+                ('detected', models.DateTimeField()),
+                ('device', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bgp_drift', to='dcim.device')),
+                ('session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='drift', to='netbox_bgp.bgpsession')),
+            ],
+            options={
+                'verbose_name': 'BGP Drift',
+                'ordering': ('device', 'remote_address'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='bgpdrift',
+            index=models.Index(fields=['kind'], name='netbox_bgp_drift_kind'),
+        ),
+    ]
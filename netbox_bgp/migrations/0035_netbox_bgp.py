@@ -0,0 +1,76 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def compute_pairing(apps, schema_editor):
+    """
+    Pair the existing sessions with a hash join on their swapped addresses and ASNs.
+    Self-contained so later changes to netbox_bgp.pairing do not alter this migration.
+    """
+    BGPSession = apps.get_model('netbox_bgp', 'BGPSession')
+    BGPSessionPairing = apps.get_model('netbox_bgp', 'BGPSessionPairing')
+
+    keys = {}
+    by_key = {}
+    by_addresses = {}
+    for pk, local_address, remote_address, local_as, remote_as in BGPSession.objects.values_list(
+        'pk', 'local_address__address', 'remote_address__address', 'local_as__asn', 'remote_as__asn'
+    ).iterator(chunk_size=10000):
+        # Addresses without their mask length
+        key = (str(local_address).split('/')[0], str(remote_address).split('/')[0], local_as, remote_as)
+        keys[pk] = key
+        by_key.setdefault(key, []).append(pk)
+        by_addresses.setdefault(key[:2], []).append(pk)
+
+    def pairing(pk, local_ip, remote_ip, local_as, remote_as):
+        peer_id = None
+        candidates = [other for other in by_key.get((remote_ip, local_ip, remote_as, local_as), ()) if other != pk]
+        if len(candidates) == 1:
+            peer_id, status = candidates[0], 'paired'
+        elif candidates:
+            status = 'ambiguous'
+        elif any(other != pk for other in by_addresses.get((remote_ip, local_ip), ())):
+            status = 'mismatched'
+        else:
+            status = 'unpaired'
+        return BGPSessionPairing(
+            session_id=pk, peer_id=peer_id, status=status,
+            local_ip=local_ip, remote_ip=remote_ip, local_as=local_as, remote_as=remote_as,
+        )
+
+    BGPSessionPairing.objects.bulk_create(
+        (pairing(pk, *key) for pk, key in keys.items()),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netbox_bgp', '0034_netbox_bgp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BGPSessionPairing',
+            fields=[
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pairing', serialize=False, to='netbox_bgp.bgpsession')),
+                ('status', models.CharField(max_length=20)),
+                ('local_ip', models.GenericIPAddressField()),
+                ('remote_ip', models.GenericIPAddressField()),
+                ('local_as', models.PositiveBigIntegerField()),
+                ('remote_as', models.PositiveBigIntegerField()),
+                ('peer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='netbox_bgp.bgpsession')),
+            ],
+            options={
+                'verbose_name': 'BGP Session Pairing',
+                'indexes': [models.Index(fields=['local_ip', 'remote_ip'], name='netbox_bgp_pairing_addresses'), models.Index(fields=['status'], name='netbox_bgp_pairing_status')],
+            },
+        ),
+        migrations.RunPython(
+            code=compute_pairing,
+            reverse_code=migrations.RunPython.noop,
+        ),
+    ]
@@ -1,12 +1,17 @@
 from django.urls import reverse
 from django.db import models
+from django.db.models.functions import Upper
 from django.core.validators import MaxValueValidator, MinValueValidator, RegexValidator
 from django.core.exceptions import ValidationError
+from django.contrib.postgres.indexes import GinIndex, GistIndex, OpClass
 
 from netbox.models import NetBoxModel
 from ipam.fields import IPNetworkField
 
-from .choices import IPAddressFamilyChoices, SessionStatusChoices, ActionChoices, CommunityStatusChoices
+from .choices import (
+    IPAddressFamilyChoices, SessionStatusChoices, ActionChoices, CommunityStatusChoices, SessionStateChoices,
+    DriftKindChoices, PairingStatusChoices,
+)
 
 
 class RoutingPolicy(NetBoxModel):
@@ -109,6 +114,9 @@ class Community(BGPBase):
 
     class Meta:
         verbose_name_plural = 'Communities'
+        indexes = [
+            models.Index(fields=['status', 'tenant'], name='netbox_bgp_comm_status_tenant'),
+        ]
 
     def __str__(self):
         return self.value
@@ -130,7 +138,8 @@ class BGPSession(NetBoxModel):
         to='dcim.Site',
         on_delete=models.SET_NULL,
         blank=True,
-        null=True
+        null=True,
+        db_index=False
     )
     tenant = models.ForeignKey(
         to='tenancy.Tenant',
@@ -143,6 +152,7 @@ class BGPSession(NetBoxModel):
         on_delete=models.PROTECT,
         null=True,
         blank=True,
+        db_index=False
     )
     local_address = models.ForeignKey(
         to='ipam.IPAddress',
@@ -162,7 +172,8 @@ class BGPSession(NetBoxModel):
     remote_as = models.ForeignKey(
         to='ipam.ASN',
         on_delete=models.PROTECT,
-        related_name='remote_as'
+        related_name='remote_as',
+        db_index=False
     )
     status = models.CharField(
         max_length=50,
@@ -177,7 +188,8 @@ class BGPSession(NetBoxModel):
         BGPPeerGroup,
         on_delete=models.SET_NULL,
         blank=True,
-        null=True
+        null=True,
+        db_index=False
     )
     import_policies = models.ManyToManyField(
         RoutingPolicy,
@@ -195,6 +207,19 @@ class BGPSession(NetBoxModel):
     class Meta:
         verbose_name_plural = 'BGP Sessions'
         unique_together = ['device', 'local_address', 'local_as', 'remote_address', 'remote_as']
+        indexes = [
+            models.Index(fields=['device', 'status'], name='netbox_bgp_sess_dev_status'),
+            models.Index(fields=['remote_as', 'status'], name='netbox_bgp_sess_ras_status'),
+            models.Index(fields=['site', 'status'], name='netbox_bgp_sess_site_status'),
+            models.Index(
+                fields=['peer_group'], condition=models.Q(peer_group__isnull=False),
+                name='netbox_bgp_sess_peer_group'
+            ),
+            models.Index(
+                fields=['status'], condition=~models.Q(status=SessionStatusChoices.STATUS_ACTIVE),
+                name='netbox_bgp_sess_not_active'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.device}:{self.name}'
@@ -206,6 +231,157 @@ class BGPSession(NetBoxModel):
         return reverse('plugins:netbox_bgp:bgpsession', args=[self.pk])
 
 
+class BGPSessionState(models.Model):
+    """
+    Operational state of a BGP session as last reported by a state collector. Kept apart
+    from BGPSession so that frequent refreshes touch neither the sessions nor the change log.
+    """
+    session = models.OneToOneField(
+        BGPSession,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='state'
+    )
+    state = models.CharField(
+        max_length=20,
+        choices=SessionStateChoices
+    )
+    prefixes_received = models.PositiveBigIntegerField(
+        blank=True,
+        null=True
+    )
+    prefixes_sent = models.PositiveBigIntegerField(
+        blank=True,
+        null=True
+    )
+    source = models.CharField(
+        max_length=100,
+        blank=True
+    )
+    last_change = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+    updated = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'BGP Session State'
+
+    def __str__(self):
+        return f'{self.session_id}: {self.state}'
+
+    def get_state_color(self):
+        return SessionStateChoices.colors.get(self.state)
+
+
+class BGPSessionPairing(models.Model):
+    """
+    Reciprocal session and pairing status of a BGP session, maintained by
+    pairing.update_pairing() on writes to sessions, IP addresses and ASNs. The session's
+    addresses (without their mask length) and ASNs are kept to find the sessions sharing
+    its address pair.
+    """
+    session = models.OneToOneField(
+        BGPSession,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='pairing'
+    )
+    peer = models.ForeignKey(
+        BGPSession,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=PairingStatusChoices
+    )
+    local_ip = models.GenericIPAddressField()
+    remote_ip = models.GenericIPAddressField()
+    local_as = models.PositiveBigIntegerField()
+    remote_as = models.PositiveBigIntegerField()
+
+    class Meta:
+        verbose_name = 'BGP Session Pairing'
+        indexes = [
+            models.Index(fields=['local_ip', 'remote_ip'], name='netbox_bgp_pairing_addresses'),
+            models.Index(fields=['status'], name='netbox_bgp_pairing_status'),
+        ]
+
+    def __str__(self):
+        return f'{self.session_id}: {self.status}'
+
+
+class BGPDeviceState(models.Model):
+    """
+    BGP neighbors last observed on a device by the state collectors, compared with the
+    device's sessions for drift detection.
+    """
+    device = models.OneToOneField(
+        to='dcim.Device',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='bgp_state'
+    )
+    neighbors = models.JSONField(
+        default=list
+    )
+    fingerprint = models.CharField(
+        max_length=64
+    )
+    updated = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'BGP Device State'
+
+    def __str__(self):
+        return f'{self.device_id}: {len(self.neighbors)} neighbors'
+
+
+class BGPDrift(models.Model):
+    """
+    Difference between the intended BGP sessions of a device and its observed neighbors.
+    """
+    device = models.ForeignKey(
+        to='dcim.Device',
+        on_delete=models.CASCADE,
+        related_name='bgp_drift'
+    )
+    session = models.ForeignKey(
+        BGPSession,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='drift'
+    )
+    kind = models.CharField(
+        max_length=20,
+        choices=DriftKindChoices
+    )
+    remote_address = models.CharField(
+        max_length=64
+    )
+    details = models.JSONField(
+        default=dict
+    )
+    detected = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'BGP Drift'
+        ordering = ('device', 'remote_address')
+        indexes = [
+            models.Index(fields=['kind'], name='netbox_bgp_drift_kind'),
+        ]
+
+    def __str__(self):
+        return f'{self.device_id} {self.remote_address}: {self.kind}'
+
+    def get_kind_color(self):
+        return DriftKindChoices.colors.get(self.kind)
+
+
 class PrefixList(NetBoxModel):
     """
     """
@@ -224,6 +400,10 @@ class PrefixList(NetBoxModel):
     class Meta:
         verbose_name_plural = 'Prefix Lists'
         unique_together = ['name', 'description', 'family']
+        indexes = [
+            # icontains compiles to UPPER("name"::text) LIKE UPPER(...) on PostgreSQL
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='netbox_bgp_pl_name_trgm'),
+        ]
 
     def __str__(self):
         return self.name
@@ -270,6 +450,11 @@ class PrefixListRule(NetBoxModel):
     class Meta:
         ordering = ('prefix_list', 'index')
         unique_together = ('prefix_list', 'index')
+        indexes = [
+            models.Index(fields=['action', 'prefix_list', 'index'], name='netbox_bgp_plrule_action'),
+            GistIndex(fields=['prefix_custom'], opclasses=['inet_ops'], name='netbox_bgp_plrule_prefix'),
+            models.Index(fields=['index'], name='netbox_bgp_plrule_index'),
+        ]
 
     @property
     def network(self):
@@ -344,6 +529,9 @@ class RoutingPolicyRule(NetBoxModel):
     class Meta:
         ordering = ('routing_policy', 'index')
         unique_together = ('routing_policy', 'index')
+        indexes = [
+            models.Index(fields=['action', 'routing_policy', 'index'], name='netbox_bgp_rprule_action'),
+        ]
 
     def __str__(self):
         return f'{self.routing_policy}: Rule {self.index}'
@@ -365,14 +553,15 @@ class RoutingPolicyRule(NetBoxModel):
     def match_statements(self):
         result = {}
         # add communities
+        # iterate over .all() so prefetched relations are reused
         result.update(
-            {'community': list(self.match_community.all().values_list('value', flat=True))}
+            {'community': [community.value for community in self.match_community.all()]}
         )
         result.update(
-            {'ip address': [str(prefix_list) for prefix_list in self.match_ip_address.all().values_list('name', flat=True)]}
+            {'ip address': [prefix_list.name for prefix_list in self.match_ip_address.all()]}
         )
         result.update(
-            {'ipv6 address': [str(prefix_list) for prefix_list in self.match_ipv6_address.all().values_list('name', flat=True)]}
+            {'ipv6 address': [prefix_list.name for prefix_list in self.match_ipv6_address.all()]}
         )
 
         custom_match = self.get_match_custom()
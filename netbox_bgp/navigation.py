@@ -31,6 +31,20 @@ _menu_items = (
                 color=ButtonColorChoices.GREEN,
                 permissions=['netbox_bgp.add_bgpsession'],
             ),
+            PluginMenuButton(
+                link='plugins:netbox_bgp:bgpsession_import',
+                title='Import',
+                icon_class='mdi mdi-upload',
+                color=ButtonColorChoices.CYAN,
+                permissions=['netbox_bgp.add_bgpsession'],
+            ),
+            PluginMenuButton(
+                link='plugins:netbox_bgp:bgpsession_summary',
+                title='Summary',
+                icon_class='mdi mdi-chart-bar',
+                color=ButtonColorChoices.BLUE,
+                permissions=['netbox_bgp.view_bgpsession'],
+            ),
         ),
     ),
     PluginMenuItem(
@@ -0,0 +1,169 @@
+import operator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import reduce
+
+from django.db.models import Q
+
+from ipam.models import IPAddress
+
+from .choices import PairingStatusChoices
+from .models import BGPSession, BGPSessionPairing
+
+
+PAIRING_BATCH_SIZE = 500
+
+_deferred = ContextVar('netbox_bgp_deferred_pairing', default=None)
+
+
+def _batches(items):
+    items = list(items)
+    for start in range(0, len(items), PAIRING_BATCH_SIZE):
+        yield items[start:start + PAIRING_BATCH_SIZE]
+
+
+def pair_sessions(keys):
+    """
+    Pair sessions given as {session id: (local ip, remote ip, local AS, remote AS)}, with
+    addresses without their mask length, with a hash join. The reciprocal session of a
+    session is the one whose addresses and ASNs are its swapped addresses and ASNs, so
+    ``keys`` must hold every session of the reversed address pairs of its sessions.
+    Returns {session id: (reciprocal session id or None, PairingStatusChoices value)}.
+    """
+    by_key = {}
+    by_addresses = {}
+    for pk, key in keys.items():
+        by_key.setdefault(key, []).append(pk)
+        by_addresses.setdefault(key[:2], []).append(pk)
+
+    pairs = {}
+    for pk, (local_ip, remote_ip, local_as, remote_as) in keys.items():
+        candidates = [other for other in by_key.get((remote_ip, local_ip, remote_as, local_as), ()) if other != pk]
+        if len(candidates) == 1:
+            pairs[pk] = (candidates[0], PairingStatusChoices.STATUS_PAIRED)
+        elif candidates:
+            pairs[pk] = (None, PairingStatusChoices.STATUS_AMBIGUOUS)
+        elif any(other != pk for other in by_addresses.get((remote_ip, local_ip), ())):
+            # The other side exists, but with different ASNs
+            pairs[pk] = (None, PairingStatusChoices.STATUS_MISMATCHED)
+        else:
+            pairs[pk] = (None, PairingStatusChoices.STATUS_UNPAIRED)
+    return pairs
+
+
+def update_pairing(session_ids=(), address_ids=(), ip_address_ids=(), asn_ids=()):
+    """
+    Recompute the pairing of the given sessions, of their previous and new reciprocal
+    sessions and of the sessions sharing their address pairs, in BGPSessionPairing.
+    ``address_ids`` adds the (local, remote) IP address ids of deleted sessions, and
+    ``ip_address_ids`` and ``asn_ids`` the sessions using edited IP addresses and ASNs.
+    Only the sessions of the affected address pairs are read, through the indexed
+    addresses of BGPSessionPairing, so a write costs a few queries whatever the number
+    of sessions.
+    """
+    pending = _deferred.get()
+    if pending is not None:
+        for ids, new_ids in zip(pending, (session_ids, address_ids, ip_address_ids, asn_ids)):
+            ids.update(new_ids)
+        return
+
+    session_ids = set(session_ids)
+    for batch in _batches(set(ip_address_ids)):
+        session_ids.update(BGPSession.objects.filter(
+            Q(local_address__in=batch) | Q(remote_address__in=batch)
+        ).values_list('pk', flat=True))
+    for batch in _batches(set(asn_ids)):
+        session_ids.update(BGPSession.objects.filter(
+            Q(local_as__in=batch) | Q(remote_as__in=batch)
+        ).values_list('pk', flat=True))
+
+    keys = {}
+    address_pairs = set()
+    for batch in _batches(session_ids):
+        for pk, local_address, remote_address, local_as, remote_as in BGPSession.objects.filter(
+            pk__in=batch
+        ).values_list(
+            'pk', 'local_address__address', 'remote_address__address', 'local_as__asn', 'remote_as__asn'
+        ):
+            keys[pk] = (str(local_address.ip), str(remote_address.ip), local_as, remote_as)
+        # Address pairs the sessions had before the write
+        address_pairs.update(
+            BGPSessionPairing.objects.filter(session_id__in=batch).values_list('local_ip', 'remote_ip')
+        )
+    address_ids = set(address_ids)
+    if address_ids:
+        addresses = {
+            pk: str(address.ip) for pk, address in IPAddress.objects.filter(
+                pk__in={pk for pair in address_ids for pk in pair}
+            ).values_list('pk', 'address')
+        }
+        address_pairs.update(
+            (addresses[local], addresses[remote]) for local, remote in address_ids
+            if local in addresses and remote in addresses
+        )
+    address_pairs.update(key[:2] for key in keys.values())
+    address_pairs |= {(remote_ip, local_ip) for local_ip, remote_ip in address_pairs}
+    if not address_pairs:
+        return
+
+    # The other sessions of the address pairs were not written, so their stored keys are current
+    for batch in _batches(address_pairs):
+        for pk, local_ip, remote_ip, local_as, remote_as in BGPSessionPairing.objects.filter(
+            reduce(operator.or_, (Q(local_ip=local_ip, remote_ip=remote_ip) for local_ip, remote_ip in batch))
+        ).values_list('session_id', 'local_ip', 'remote_ip', 'local_as', 'remote_as'):
+            keys.setdefault(pk, (local_ip, remote_ip, local_as, remote_as))
+
+    pairs = pair_sessions(keys)
+    BGPSessionPairing.objects.bulk_create(
+        [
+            BGPSessionPairing(
+                session_id=pk, peer_id=pairs[pk][0], status=pairs[pk][1],
+                local_ip=local_ip, remote_ip=remote_ip, local_as=local_as, remote_as=remote_as,
+            )
+            for pk, (local_ip, remote_ip, local_as, remote_as) in keys.items()
+        ],
+        batch_size=PAIRING_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['session'],
+        update_fields=['peer', 'status', 'local_ip', 'remote_ip', 'local_as', 'remote_as'],
+    )
+
+
+@contextmanager
+def deferred_pairing():
+    """Collapse all pairing updates within the block (e.g. a bulk job) into one at its end."""
+    if _deferred.get() is not None:
+        yield
+        return
+    pending = (set(), set(), set(), set())
+    token = _deferred.set(pending)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+        if any(pending):
+            update_pairing(*pending)
+
+
+def get_pairing(session):
+    """Return the BGPSessionPairing of a session, or None if not computed yet."""
+    try:
+        return session.pairing
+    except BGPSessionPairing.DoesNotExist:
+        return None
+
+
+def get_peer_sessions(sessions, user=None):
+    """Return {session id: reciprocal session} for the given sessions with a single query."""
+    peer_ids = {}
+    for session in sessions:
+        pairing = get_pairing(session)
+        if pairing is not None and pairing.peer_id is not None:
+            peer_ids[session.pk] = pairing.peer_id
+    if not peer_ids:
+        return {}
+    queryset = BGPSession.objects.select_related('device')
+    if user is not None:
+        queryset = queryset.restrict(user, 'view')
+    peers = queryset.in_bulk(peer_ids.values())
+    return {pk: peers[peer_id] for pk, peer_id in peer_ids.items() if peer_id in peers}
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import random
+from collections import Counter, namedtuple
+
+from dcim.models import Device
+
+from .choices import SessionStateChoices
+from .collectors import StateCollector, parse_states
+from .models import BGPSession
+
+
+DEFAULT_PORT = 50051
+NEIGHBORS_COMMAND = 'bgp-neighbors'
+
+# Device to poll and where to reach it
+Target = namedtuple('Target', ('device', 'host', 'port'))
+
+
+class PollError(Exception):
+    pass
+
+
+def get_device_targets(port=DEFAULT_PORT, host=None):
+    """
+    Return a Target for every device with BGP sessions, reached on its primary IP address
+    or, when given, on ``host``. Devices without a primary IP are returned separately.
+    """
+    targets, unreachable = [], []
+    devices = Device.objects.filter(
+        pk__in=BGPSession.objects.order_by().values('device_id')
+    ).values_list('name', 'primary_ip4__address', 'primary_ip6__address')
+    for name, ip4, ip6 in devices:
+        address = ip4 or ip6
+        if host is None and address is None:
+            unreachable.append(name)
+        else:
+            targets.append(Target(name, host or str(address.ip), port))
+    return targets, unreachable
+
+
+class DevicePoller:
+    """
+    Poll the BGP neighbors of many devices concurrently from a single event loop.
+
+    At most ``concurrency`` devices are queried at a time. One connection per device is
+    opened lazily and reused across polls until it fails. Failed queries are retried up to
+    ``retries`` times with exponential backoff and jitter; devices still failing are
+    skipped for a backoff period growing with their consecutive failures.
+
+    The bundled transport speaks newline-delimited JSON: a ``{"device", "command"}`` request
+    answered by ``{"neighbors": [...]}``, as served by FakeDeviceServer or a gNMI/NETCONF
+    gateway. Other transports override query().
+    """
+    def __init__(self, targets, concurrency=100, timeout=10, retries=2, backoff=1.0, max_backoff=300):
+        self.targets = targets
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.connections = {}
+        self.failures = {}
+        self.stats = Counter()
+        self._semaphore = None
+
+    async def connect(self, target):
+        connection = self.connections.get(target.device)
+        if connection is None or connection[1].is_closing():
+            connection = await asyncio.open_connection(target.host, target.port, limit=2 ** 24)
+            self.connections[target.device] = connection
+            self.stats['connections'] += 1
+        return connection
+
+    def disconnect(self, target):
+        connection = self.connections.pop(target.device, None)
+        if connection is not None:
+            connection[1].close()
+
+    async def query(self, target):
+        """Return the list of neighbor dicts reported by a device."""
+        reader, writer = await self.connect(target)
+        writer.write(json.dumps({'device': target.device, 'command': NEIGHBORS_COMMAND}).encode() + b'\n')
+        await writer.drain()
+        line = await reader.readline()
+        if not line:
+            raise PollError('Connection closed')
+        response = json.loads(line)
+        if 'error' in response:
+            raise PollError(response['error'])
+        return response['neighbors']
+
+    def _delay(self, attempt):
+        return min(self.backoff * 2 ** attempt, self.max_backoff) * random.uniform(0.5, 1.5)
+
+    async def poll_device(self, target):
+        """Return (target, neighbors, error) for one device."""
+        loop = asyncio.get_running_loop()
+        failures, retry_after = self.failures.get(target.device, (0, 0))
+        if retry_after > loop.time():
+            self.stats['skipped'] += 1
+            return target, None, PollError(f'Backing off after {failures} failed polls')
+
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats['retries'] += 1
+                # Sleep outside of the semaphore so waiting devices do not hold a slot
+                await asyncio.sleep(self._delay(attempt - 1))
+            async with self._semaphore:
+                try:
+                    neighbors = await asyncio.wait_for(self.query(target), self.timeout)
+                except (OSError, asyncio.TimeoutError, ValueError, KeyError, PollError) as e:
+                    # The connection may hold a partial response: never reuse it
+                    self.disconnect(target)
+                    error = e
+                    continue
+            self.failures.pop(target.device, None)
+            self.stats['polled'] += 1
+            return target, neighbors, None
+
+        self.failures[target.device] = (failures + 1, loop.time() + self._delay(failures + 1))
+        self.stats['failed'] += 1
+        return target, None, error
+
+    async def poll(self):
+        """Poll every target; returns a list of (target, neighbors, error)."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*(self.poll_device(target) for target in self.targets))
+
+    def close(self):
+        for target in list(self.connections):
+            self.connections.pop(target)[1].close()
+
+
+class DevicePollerCollector(StateCollector):
+    """
+    Collect session state by polling every device with BGP sessions, see DevicePoller.
+    Keep the collector for successive collections within one event loop to reuse the
+    connections.
+    """
+    name = 'poller'
+
+    def __init__(self, port=DEFAULT_PORT, host=None, concurrency=100, timeout=10, retries=2, backoff=1.0,
+                 **kwargs):
+        super().__init__(**kwargs)
+        targets, self.unreachable = get_device_targets(port=port, host=host)
+        self.poller = DevicePoller(
+            targets, concurrency=concurrency, timeout=timeout, retries=retries, backoff=backoff
+        )
+
+    async def collect(self):
+        self.errors.extend(f'{device}: no primary IP address' for device in self.unreachable)
+        records = []
+        for target, neighbors, error in await self.poller.poll():
+            if error is not None:
+                self.errors.append(f'{target.device}: {error!r}')
+                continue
+            records.extend(parse_states(
+                [dict(neighbor, device=target.device) for neighbor in neighbors], self.errors
+            ))
+        return records
+
+
+class FakeDeviceServer:
+    """
+    Serve the BGP neighbors of fake devices over DevicePoller's protocol, for testing and
+    benchmarking the poller offline. ``devices`` maps device names to lists of neighbor
+    dicts. Each response is delayed by ``latency`` seconds and a ``failure_rate`` share of
+    the requests drop the connection.
+    """
+    def __init__(self, devices, latency=0.0, failure_rate=0.0, seed=None):
+        self.devices = devices
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.stats = Counter()
+        self.server = None
+        self.handlers = {}
+
+    @classmethod
+    def from_sessions(cls, queryset=None, seed=None, established=0.9, **kwargs):
+        """Fake the devices of BGP sessions, with a share of ``established`` sessions."""
+        rng = random.Random(seed)
+        states = [state for state in SessionStateChoices.values() if state != SessionStateChoices.STATE_ESTABLISHED]
+        devices = {}
+        queryset = BGPSession.objects.all() if queryset is None else queryset
+        for device, remote_address, remote_as in queryset.exclude(device=None).order_by('pk').values_list(
+            'device__name', 'remote_address__address', 'remote_as__asn'
+        ).iterator(chunk_size=10000):
+            is_established = rng.random() < established
+            devices.setdefault(device, []).append({
+                'remote_address': str(remote_address.ip),
+                'remote_as': remote_as,
+                'state': SessionStateChoices.STATE_ESTABLISHED if is_established else rng.choice(states),
+                'prefixes_received': rng.randint(1, 1000) if is_established else 0,
+                'prefixes_sent': rng.randint(1, 100) if is_established else 0,
+            })
+        return cls(devices, seed=seed, **kwargs)
+
+    async def handle(self, reader, writer):
+        self.stats['connections'] += 1
+        self.handlers[asyncio.current_task()] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.stats['requests'] += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if self.random.random() < self.failure_rate:
+                    self.stats['dropped'] += 1
+                    break
+                try:
+                    request = json.loads(line)
+                    response = {'device': request['device'], 'neighbors': self.devices[request['device']]}
+                except (ValueError, KeyError) as e:
+                    response = {'error': f'Invalid request: {e!r}'}
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            self.handlers.pop(asyncio.current_task(), None)
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Start listening; returns the port."""
+        self.server = await asyncio.start_server(self.handle, host, port, limit=2 ** 24)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        for writer in list(self.handlers.values()):
+            writer.close()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        await self.server.wait_closed()
@@ -0,0 +1,161 @@
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .versioning import bump_data_version, bump_versions
+
+
+# Core models whose attributes are rendered alongside BGP objects
+RELATED_MODELS = (
+    'dcim.device', 'dcim.site', 'ipam.asn', 'ipam.ipaddress',
+    'ipam.prefix', 'ipam.role', 'tenancy.tenant', 'extras.tag',
+)
+
+
+# Operational state and drift, refreshed by collectors, and the pairing derived from the
+# sessions: not part of the cached data
+UNTRACKED_MODELS = (
+    'netbox_bgp.bgpsessionstate', 'netbox_bgp.bgpsessionpairing', 'netbox_bgp.bgpdevicestate', 'netbox_bgp.bgpdrift',
+)
+
+# Models deciding which objects users may view: object permissions, groups and users
+# (superuser status and group membership)
+PERMISSION_MODELS = ('users.objectpermission', 'auth.group', 'users.group', 'auth.user', 'users.user')
+
+# Version of the permissions, part of the ETags and cached pages of restricted querysets
+PERMISSIONS_VERSION = 'permissions'
+
+# Version of the BGP data shared between devices (policies, prefix lists, communities,
+# peer groups and the core objects they render), see get_changed_versions(). It is
+# deliberately global: a write to shared data invalidates every device snapshot rather
+# than resolving, on the write path, which devices reference the object
+LIBRARY_VERSION = 'library'
+
+
+def _is_tracked(model):
+    if model._meta.label_lower in UNTRACKED_MODELS:
+        return False
+    return model._meta.app_label == 'netbox_bgp' or model._meta.label_lower in RELATED_MODELS
+
+
+def device_version(device_id):
+    return f'device:{device_id}'
+
+
+def model_version(label):
+    return f'model:{label}'
+
+
+def get_changed_versions(model, instances):
+    """
+    Return the names of the versions changed by a write to ``instances`` of ``model``:
+    the version of the model, the versions of the devices whose sessions changed and the
+    library version for data shared between devices, as applicable.
+    """
+    label = model._meta.label_lower
+    return {model_version(label)} | _get_changed_device_versions(label, instances)
+
+
+def _get_changed_device_versions(label, instances):
+    from .models import BGPSession
+
+    if label == 'netbox_bgp.bgpsession':
+        device_ids = set()
+        for instance in instances:
+            device_ids.add(instance.device_id)
+            # Sessions moved to another device also change their previous device
+            device_ids.add((getattr(instance, '_prechange_snapshot', None) or {}).get('device'))
+    elif label == 'dcim.device':
+        device_ids = {instance.pk for instance in instances}
+    elif label == 'netbox_bgp.bgppeergroup':
+        # Sessions carry their peer group's name; its policies are shared data
+        device_ids = set(
+            BGPSession.objects.filter(peer_group__in=[instance.pk for instance in instances])
+            .order_by().values_list('device_id', flat=True).distinct()
+        )
+        return {LIBRARY_VERSION} | {device_version(device_id) for device_id in device_ids if device_id is not None}
+    elif label in ('ipam.ipaddress', 'ipam.asn'):
+        pks = [instance.pk for instance in instances]
+        if label == 'ipam.ipaddress':
+            condition = Q(local_address__in=pks) | Q(remote_address__in=pks)
+        else:
+            condition = Q(local_as__in=pks) | Q(remote_as__in=pks)
+        device_ids = set(
+            BGPSession.objects.filter(condition).order_by().values_list('device_id', flat=True).distinct()
+        )
+    else:
+        return {LIBRARY_VERSION}
+    return {device_version(device_id) for device_id in device_ids if device_id is not None}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_version_on_change(sender, instance, **kwargs):
+    if _is_tracked(sender):
+        bump_data_version()
+        bump_versions(get_changed_versions(sender, [instance]))
+
+
+@receiver(pre_delete, sender='netbox_bgp.BGPPeerGroup')
+def bump_version_on_peer_group_delete(sender, instance, **kwargs):
+    # Deleting a peer group clears the peer group of its sessions without signals
+    bump_versions(get_changed_versions(sender, [instance]))
+
+
+@receiver(m2m_changed)
+def bump_version_on_m2m_change(sender, instance, action, model, pk_set, **kwargs):
+    if action.startswith('post_') and _is_tracked(type(instance)):
+        bump_data_version()
+        bump_versions(get_changed_versions(type(instance), [instance]))
+        # Changes made from the other side of the relation, e.g. policy.session_import_policies
+        if pk_set and model._meta.label_lower == 'netbox_bgp.bgpsession':
+            bump_versions(get_changed_versions(model, model.objects.filter(pk__in=pk_set).only('device_id')))
+
+
+@receiver(post_save, sender='netbox_bgp.BGPSession')
+def update_pairing_on_session_save(sender, instance, **kwargs):
+    from .pairing import update_pairing
+
+    update_pairing([instance.pk])
+
+
+@receiver(post_delete, sender='netbox_bgp.BGPSession')
+def update_pairing_on_session_delete(sender, instance, **kwargs):
+    from .pairing import update_pairing
+
+    update_pairing(address_ids=[(instance.local_address_id, instance.remote_address_id)])
+
+
+@receiver(post_save, sender='ipam.IPAddress')
+@receiver(post_save, sender='ipam.ASN')
+def update_pairing_on_related_change(sender, instance, created=False, update_fields=None, **kwargs):
+    from .pairing import update_pairing
+
+    # New objects have no sessions yet, and only the address or the number decides the
+    # pairing; within deferred_pairing() the sessions are looked up once at its end
+    if created:
+        return
+    if sender._meta.label_lower == 'ipam.ipaddress':
+        if update_fields is None or 'address' in update_fields:
+            update_pairing(ip_address_ids=[instance.pk])
+    elif update_fields is None or 'asn' in update_fields:
+        update_pairing(asn_ids=[instance.pk])
+
+
+def _is_permission_model(model):
+    return model._meta.label_lower in PERMISSION_MODELS
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_permissions_version_on_change(sender, instance, update_fields=None, **kwargs):
+    # Logins only update users' last_login
+    if _is_permission_model(sender) and set(update_fields or ()) != {'last_login'}:
+        bump_versions([PERMISSIONS_VERSION])
+
+
+@receiver(m2m_changed)
+def bump_permissions_version_on_m2m_change(sender, instance, action, model, **kwargs):
+    # Memberships and permission assignments, changed from either side
+    if action.startswith('post_') and (_is_permission_model(type(instance)) or _is_permission_model(model)):
+        bump_versions([PERMISSIONS_VERSION])
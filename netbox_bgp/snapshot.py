@@ -0,0 +1,76 @@
+import hashlib
+import operator
+from functools import reduce
+
+from django.db.models import Q
+
+from .models import (
+    BGPPeerGroup, BGPSession, Community, PrefixList, PrefixListRule, RoutingPolicy, RoutingPolicyRule
+)
+from .signals import LIBRARY_VERSION, PERMISSIONS_VERSION, device_version
+from .version import __version__
+from .versioning import get_versions
+
+
+# Session fields depending on operational state or on other devices' sessions, which
+# the device version does not track
+SESSION_EXCLUDED_FIELDS = ('peer_session', 'pairing_status', 'state')
+
+
+def get_device_etag(device_id, user, format='json'):
+    """
+    Return the strong ETag of a device's BGP snapshot rendered in ``format`` for a user,
+    derived from the version of the device, the version of the data shared between
+    devices, the user's permission scope and the permissions version. Costs no database
+    query. Any write to shared data changes the ETags of all devices, including those
+    which do not reference the written object.
+    """
+    names = (device_version(device_id), LIBRARY_VERSION, PERMISSIONS_VERSION)
+    versions = get_versions(names)
+    scope = 'all' if user.is_superuser else f'user:{user.pk}'
+    value = ':'.join([__version__, str(device_id), *(str(versions[name]) for name in names), scope, format])
+    return '"{}"'.format(hashlib.sha256(value.encode()).hexdigest()[:32])
+
+
+def get_device_snapshot(device, user):
+    """
+    Return querysets of everything BGP-related for a device which the user may view: its
+    sessions, their peer groups, the routing policies of both with their rules, and the
+    prefix lists (with their rules) and communities matched by the rules.
+    """
+    sessions = BGPSession.objects.restrict(user, 'view').filter(device=device)
+    peer_groups = BGPPeerGroup.objects.restrict(user, 'view').filter(
+        pk__in=sessions.order_by().values('peer_group_id')
+    )
+    policy_ids = [
+        getattr(model, field).through.objects.filter(
+            **{f'{model._meta.model_name}__in': objects}
+        ).values('routingpolicy_id')
+        for model, objects in ((BGPSession, sessions), (BGPPeerGroup, peer_groups))
+        for field in ('import_policies', 'export_policies')
+    ]
+    policies = RoutingPolicy.objects.restrict(user, 'view').filter(
+        reduce(operator.or_, (Q(pk__in=ids) for ids in policy_ids))
+    )
+    rules = RoutingPolicyRule.objects.restrict(user, 'view').filter(routing_policy__in=policies)
+    prefix_lists = PrefixList.objects.restrict(user, 'view').filter(
+        Q(pk__in=RoutingPolicyRule.match_ip_address.through.objects.filter(
+            routingpolicyrule__in=rules
+        ).values('prefixlist_id'))
+        | Q(pk__in=RoutingPolicyRule.match_ipv6_address.through.objects.filter(
+            routingpolicyrule__in=rules
+        ).values('prefixlist_id'))
+    )
+    return {
+        'sessions': sessions,
+        'peer_groups': peer_groups,
+        'routing_policies': policies,
+        'routing_policy_rules': rules,
+        'prefix_lists': prefix_lists,
+        'prefix_list_rules': PrefixListRule.objects.restrict(user, 'view').filter(prefix_list__in=prefix_lists),
+        'communities': Community.objects.restrict(user, 'view').filter(
+            pk__in=RoutingPolicyRule.match_community.through.objects.filter(
+                routingpolicyrule__in=rules
+            ).values('community_id')
+        ),
+    }
@@ -0,0 +1,114 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.http import QueryDict
+
+from .choices import SessionStatusChoices
+from .filters import BGPSessionFilterSet
+from .models import BGPSession
+from .signals import PERMISSIONS_VERSION
+from .versioning import get_data_version, get_versions
+
+
+SUMMARY_KEY = 'netbox_bgp:session_summary:{}:{}:{}'
+SUMMARY_TIMEOUT = 24 * 60 * 60
+DEFAULT_TOP = 20
+MAX_TOP = 1000
+
+# Group name, grouped field, label field, session list filter
+SUMMARY_GROUPS = (
+    ('site', 'site_id', 'site__name', 'site_id'),
+    ('tenant', 'tenant_id', 'tenant__name', 'tenant'),
+    ('remote_as', 'remote_as_id', 'remote_as__asn', 'remote_as_id'),
+    ('peer_group', 'peer_group_id', 'peer_group__name', 'peer_group'),
+)
+
+
+def _status_counts():
+    return {
+        f'status_{status}': Count('pk', filter=Q(status=status)) for status in SessionStatusChoices.values()
+    }
+
+
+def _statuses(row):
+    return {status: row[f'status_{status}'] for status in SessionStatusChoices.values()}
+
+
+def summarize_sessions(queryset, top=DEFAULT_TOP):
+    """
+    Count sessions in total, by status and by site, tenant, remote AS and peer group, each
+    split by status. Every grouping is a single GROUP BY query; groups keep their ``top``
+    largest entries and add up the rest under ``other``.
+    """
+    queryset = queryset.order_by()
+    totals = queryset.aggregate(
+        total=Count('pk'),
+        **{f'{name}_count': Count(field, distinct=True) for name, field, _, _ in SUMMARY_GROUPS},
+        **_status_counts()
+    )
+    summary = {
+        'total': totals['total'],
+        'status': _statuses(totals),
+        'groups': {},
+    }
+    for name, field, label_field, filter_name in SUMMARY_GROUPS:
+        rows = queryset.values(field, label_field).annotate(
+            total=Count('pk'), **_status_counts()
+        ).order_by('-total', field)[:top]
+        entries = [
+            {
+                'id': row[field],
+                'label': None if row[field] is None else str(row[label_field]),
+                'total': row['total'],
+                'status': _statuses(row),
+            }
+            for row in rows
+        ]
+        summary['groups'][name] = {
+            'count': totals[f'{name}_count'],
+            'filter': filter_name,
+            'entries': entries,
+            'other': summary['total'] - sum(entry['total'] for entry in entries),
+        }
+    return summary
+
+
+def get_session_summary(user, params=None, top=DEFAULT_TOP):
+    """
+    Return the summary of the sessions visible to the user and matching the
+    BGPSessionFilterSet parameters, cached per BGP data version, and per user and
+    permissions version when restricted by object permissions.
+
+    Raises ValueError with the filter errors for invalid parameters.
+    """
+    queryset = BGPSession.objects.restrict(user, 'view')
+    filter_params = params.copy() if params is not None else QueryDict(mutable=True)
+    for name in ('top', 'per_page', 'page', 'limit', 'offset', 'format'):
+        filter_params.pop(name, None)
+    if filter_params:
+        filterset = BGPSessionFilterSet(filter_params, queryset)
+        if not filterset.is_valid():
+            raise ValueError(filterset.errors)
+        queryset = filterset.qs
+
+    scope = 'all'
+    if not user.is_superuser:
+        # Restricted by object permissions
+        scope = f'{user.pk}:{get_versions([PERMISSIONS_VERSION])[PERMISSIONS_VERSION]}'
+    query = hashlib.sha256(f'{top}?{urlencode(sorted(filter_params.lists()), doseq=True)}'.encode()).hexdigest()
+    cache_key = SUMMARY_KEY.format(get_data_version(), scope, query)
+    summary = cache.get(cache_key)
+    if summary is None:
+        summary = summarize_sessions(queryset, top=top)
+        cache.set(cache_key, summary, SUMMARY_TIMEOUT)
+    return summary
+
+
+def get_top(value):
+    """Parse the ``top`` parameter, falling back to the default for invalid values."""
+    try:
+        return max(1, min(int(value), MAX_TOP))
+    except (TypeError, ValueError):
+        return DEFAULT_TOP
@@ -1,11 +1,16 @@
 import django_tables2 as tables
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
+from django.db.models.constants import LOOKUP_SEP
 from django.utils.safestring import mark_safe
+from django_tables2.data import TableQuerysetData
 from django_tables2.utils import A
 
 from netbox.tables import NetBoxTable
 from netbox.tables.columns import ChoiceFieldColumn, TagColumn
 
 from .models import Community, BGPSession, RoutingPolicy, BGPPeerGroup, RoutingPolicyRule, PrefixList, PrefixListRule
+from .utils import join_related
 
 AVAILABLE_LABEL = mark_safe('<span class="label label-success">Available</span>')
 COL_TENANT = """
@@ -25,7 +30,63 @@ POLICIES = """
 """
 
 
-class CommunityTable(NetBoxTable):
+class BGPBaseTable(NetBoxTable):
+    """
+    Join the related objects rendered by the visible columns onto the table's
+    queryset: single-valued relations with select_related(), the rest with
+    prefetch_related(). Columns whose accessor is not a model relation can
+    declare their lookups in ``column_lookups``. The joins follow the columns
+    selected by configure() from the user's preferences.
+    """
+    column_lookups = {}
+
+    def __init__(self, data=None, *args, **kwargs):
+        # NetBoxTable prefetches the relations of the default columns onto the queryset
+        # it is given, so keep the queryset from before for the joins of other columns
+        self._unjoined_queryset = data if isinstance(data, QuerySet) else None
+        super().__init__(data, *args, **kwargs)
+        if isinstance(self.data, TableQuerysetData):
+            self._join_related()
+
+    def _set_columns(self, selected_columns):
+        super()._set_columns(selected_columns)
+        self._join_related()
+
+    def _join_related(self):
+        queryset = getattr(self, '_unjoined_queryset', None)
+        if queryset is None:
+            return
+        # Keep any ordering applied since
+        order_by = self.data.data.query.order_by
+        if order_by:
+            queryset = queryset.order_by(*order_by)
+        self.data.data = join_related(queryset, self.get_related_lookups())
+
+    def get_related_lookups(self):
+        lookups = []
+        for column in self.columns:
+            if not column.visible:
+                continue
+            if column.name in self.column_lookups:
+                lookups.extend(self.column_lookups[column.name])
+                continue
+            model = self._meta.model
+            path = []
+            for name in str(column.accessor).replace(LOOKUP_SEP, '.').split('.'):
+                try:
+                    field = model._meta.get_field(name)
+                except FieldDoesNotExist:
+                    break
+                if not field.is_relation or field.related_model is None:
+                    break
+                path.append(name)
+                model = field.related_model
+            if path:
+                lookups.append(LOOKUP_SEP.join(path))
+        return lookups
+
+
+class CommunityTable(BGPBaseTable):
     value = tables.LinkColumn()
     status = ChoiceFieldColumn(
         default=AVAILABLE_LABEL
@@ -45,7 +106,7 @@ class CommunityTable(NetBoxTable):
         )
 
 
-class BGPSessionTable(NetBoxTable):
+class BGPSessionTable(BGPBaseTable):
     name = tables.LinkColumn()
     device = tables.LinkColumn()
     local_address = tables.LinkColumn()
@@ -75,7 +136,7 @@ class BGPSessionTable(NetBoxTable):
         )
 
 
-class RoutingPolicyTable(NetBoxTable):
+class RoutingPolicyTable(BGPBaseTable):
     name = tables.LinkColumn()
 
     class Meta(NetBoxTable.Meta):
@@ -83,7 +144,7 @@ class RoutingPolicyTable(NetBoxTable):
         fields = ('pk', 'name', 'description')
 
 
-class BGPPeerGroupTable(NetBoxTable):
+class BGPPeerGroupTable(BGPBaseTable):
     name = tables.LinkColumn()
     import_policies = tables.TemplateColumn(
         template_code=POLICIES,
@@ -108,7 +169,7 @@ class BGPPeerGroupTable(NetBoxTable):
         )
 
 
-class RoutingPolicyRuleTable(NetBoxTable):
+class RoutingPolicyRuleTable(BGPBaseTable):
     routing_policy = tables.Column(
         linkify=True
     )
@@ -116,6 +177,9 @@ class RoutingPolicyRuleTable(NetBoxTable):
         linkify=True
     )
     action = ChoiceFieldColumn()
+    column_lookups = {
+        'match_statements': ('match_community', 'match_ip_address', 'match_ipv6_address'),
+    }
 
     class Meta(NetBoxTable.Meta):
         model = RoutingPolicyRule
@@ -125,7 +189,7 @@ class RoutingPolicyRuleTable(NetBoxTable):
         )
 
 
-class PrefixListTable(NetBoxTable):
+class PrefixListTable(BGPBaseTable):
     name = tables.LinkColumn()
 
     class Meta(NetBoxTable.Meta):
@@ -133,7 +197,7 @@ class PrefixListTable(NetBoxTable):
         fields = ('pk', 'name', 'description')
 
 
-class PrefixListRuleTable(NetBoxTable):
+class PrefixListRuleTable(BGPBaseTable):
     prefix_list = tables.Column(
         linkify=True
     )
@@ -145,6 +209,9 @@ class PrefixListRuleTable(NetBoxTable):
         verbose_name='Prefix',
         linkify=True,
     )
+    column_lookups = {
+        'network': ('prefix',),
+    }
 
     class Meta(NetBoxTable.Meta):
         model = PrefixListRule
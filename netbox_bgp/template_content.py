@@ -1,5 +1,6 @@
 from extras.plugins import PluginTemplateExtension
 
+from .instrumentation import serialization
 from .models import BGPSession
 from .tables import BGPSessionTable
 
@@ -24,14 +25,15 @@ class DeviceBGPSession(PluginTemplateExtension):
 
     def x_page(self):
         obj = self.context['object']
-        sess = BGPSession.objects.filter(device=obj)
-        sess_table = BGPSessionTable(sess)
-        return self.render(
-            'netbox_bgp/device_extend.html',
-            extra_context={
-                'related_session_table': sess_table
-            }
-        )
+        with serialization():
+            sess = BGPSession.objects.filter(device=obj)
+            sess_table = BGPSessionTable(sess)
+            return self.render(
+                'netbox_bgp/device_extend.html',
+                extra_context={
+                    'related_session_table': sess_table
+                }
+            )
 
 
 template_extensions = [DeviceBGPSession]
@@ -0,0 +1,43 @@
+from django.test import TestCase
+
+from dcim.models import Site, DeviceRole, DeviceType, Manufacturer, Device
+from ipam.models import IPAddress, ASN, RIR
+
+from netbox_bgp.models import BGPSession
+
+
+class DeviceSessionsTestCase(TestCase):
+    """
+    Base class of the tests on devices and their sessions: setUpTestData() creates the
+    site, device type, device role, RIR and local AS 65000 they share.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = Site.objects.create(name='site1', slug='site1')
+        manufacturer = Manufacturer.objects.create(name='Juniper', slug='juniper')
+        cls.device_role = DeviceRole.objects.create(name='Router', slug='router')
+        cls.device_type = DeviceType.objects.create(slug='mx480', model='MX480', manufacturer=manufacturer)
+        cls.rir = RIR.objects.create(name='rir', slug='rir')
+        cls.local_as = ASN.objects.create(asn=65000, rir=cls.rir)
+
+    def create_device(self, name='device1'):
+        return Device.objects.create(
+            device_type=self.device_type, name=name, device_role=self.device_role, site=self.site,
+        )
+
+    def create_sessions(self, device, count, local_address='10.0.0.1/32', network=1, **kwargs):
+        """
+        Create ``count`` sessions of a device from ``local_address`` to 10.<network>.0.<n>/32
+        in AS 65100 + n - 1, remote ASNs being shared with the other devices.
+        """
+        local_address = IPAddress.objects.create(address=local_address)
+        return [
+            BGPSession.objects.create(
+                device=device, local_address=local_address, local_as=self.local_as,
+                remote_address=IPAddress.objects.create(address=f'10.{network}.0.{i + 1}/32'),
+                remote_as=ASN.objects.get_or_create(asn=65100 + i, rir=self.rir)[0],
+                **kwargs
+            )
+            for i in range(count)
+        ]
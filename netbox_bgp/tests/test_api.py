@@ -1,23 +1,31 @@
 import json
+from unittest import mock, skipIf
 
-from django.contrib.auth.models import User
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
 from django.test import TestCase
 from django.test.client import Client
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
 
-from users.models import Token
+from users.models import ObjectPermission, Token
 
 from tenancy.models import Tenant
 from dcim.models import Site, DeviceRole, DeviceType, Manufacturer, Device, Interface
 from ipam.models import IPAddress, ASN, RIR
 
+from netbox_bgp.api.renderers import msgpack
+from netbox_bgp.choices import PairingStatusChoices
 from netbox_bgp.models import (
-    Community, BGPPeerGroup, BGPSession, 
+    Community, BGPPeerGroup, BGPSession, BGPSessionPairing,
     RoutingPolicy, RoutingPolicyRule, PrefixList, PrefixListRule
 )
+from netbox_bgp.pairing import deferred_pairing
 
 
 class BaseTestCase(TestCase):
@@ -49,6 +57,21 @@ class CommunityTestCase(BaseTestCase):
         self.assertEqual(response.data['value'], self.community1.value)
         self.assertEqual(response.data['description'], self.community1.description)
 
+    @skipIf(msgpack is None, 'msgpack is not installed')
+    def test_community_msgpack(self):
+        url = reverse(f'{self.base_url_lookup}-list')
+        response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(response.content)
+        self.assertEqual(data['results'][0]['value'], '65000:65000')
+
+        response = self.client.post(
+            f'{url}?format=msgpack', msgpack.packb({'value': '65001:65001'}), content_type='application/msgpack'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(msgpack.unpackb(response.content)['value'], '65001:65001')
+
     def test_create_community(self):
         url = reverse(f'{self.base_url_lookup}-list')
         data = {'value': '65001:65001', 'description': 'test_community1'}
@@ -181,6 +204,14 @@ class SessionTestCase(BaseTestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['count'], 1)
 
+    def test_list_session_selected_fields(self):
+        url = reverse(f'{self.base_url_lookup}-list')
+        response = self.client.get(f'{url}?fields=id,name,remote_as,status')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        session = response.data['results'][0]
+        self.assertEqual(set(session), {'id', 'name', 'remote_as', 'status'})
+        self.assertEqual(session['remote_as']['asn'], self.session.remote_as.asn)
+
     def test_get_session(self):
         url = reverse(f'{self.base_url_lookup}-detail', kwargs={'pk': self.session.pk})
         response = self.client.get(url)
@@ -223,6 +254,267 @@ class SessionTestCase(BaseTestCase):
         self.assertEqual(BGPSession.objects.get(pk=response.data['id']).description, 'new_description2')        
 
 
+    def test_session_pairing(self):
+        # Mirror of self.session, with the addresses given with other mask lengths
+        peer = BGPSession.objects.create(
+            name='peer',
+            local_as=self.session.remote_as,
+            remote_as=self.session.local_as,
+            local_address=IPAddress.objects.create(address='2.2.2.2/24'),
+            remote_address=IPAddress.objects.create(address='1.1.1.1/24'),
+        )
+        # Both sides exist, but with inconsistent ASNs
+        mismatched = BGPSession.objects.create(
+            name='mismatched', local_as=self.local_as, remote_as=self.remote_as,
+            local_address=self.local_ip, remote_address=self.remote_ip,
+        )
+        mismatched_peer = BGPSession.objects.create(
+            name='mismatched_peer', local_as=self.remote_as, remote_as=ASN.objects.get(asn=65003),
+            local_address=self.remote_ip, remote_address=self.local_ip,
+        )
+
+        url = reverse(f'{self.base_url_lookup}-detail', kwargs={'pk': self.session.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.data['peer_session']['id'], peer.pk)
+        self.assertEqual(response.data['pairing_status']['value'], 'paired')
+
+        url = reverse(f'{self.base_url_lookup}-list')
+        response = self.client.get(f'{url}?pairing_status=paired')
+        self.assertEqual({s['id'] for s in response.data['results']}, {self.session.pk, peer.pk})
+        self.assertEqual(
+            {s['peer_session']['id'] for s in response.data['results']}, {self.session.pk, peer.pk}
+        )
+        response = self.client.get(f'{url}?pairing_status=mismatched')
+        self.assertEqual(response.data['count'], 2)
+        self.assertIn(mismatched.pk, {s['id'] for s in response.data['results']})
+
+        # Pairs follow writes to the sessions and to their addresses
+        peer.local_address.address = '2.2.2.3/24'
+        peer.local_address.save()
+        response = self.client.get(f'{url}?pairing_status=unpaired')
+        self.assertEqual({s['id'] for s in response.data['results']}, {self.session.pk, peer.pk})
+        peer.delete()
+        response = self.client.get(f'{url}?pairing_status=unpaired')
+        self.assertEqual({s['id'] for s in response.data['results']}, {self.session.pk})
+        mismatched_peer.remote_as = self.local_as
+        mismatched_peer.save()
+        response = self.client.get(f'{url}?pairing_status=paired')
+        self.assertEqual({s['id'] for s in response.data['results']}, {mismatched.pk, mismatched_peer.pk})
+
+    def test_session_pairing_related_changes(self):
+        with mock.patch('netbox_bgp.pairing.update_pairing') as update_pairing:
+            # New addresses and ASNs are not used by any session yet
+            IPAddress.objects.create(address='10.10.10.10/32')
+            ASN.objects.create(asn=65100, rir=self.rir)
+            # Other fields than the address do not decide the pairing
+            self.local_ip.save(update_fields=['description'])
+            update_pairing.assert_not_called()
+            self.local_ip.save()
+            update_pairing.assert_called_once_with(ip_address_ids=[self.local_ip.pk])
+
+        session = BGPSession.objects.create(
+            name='session2', local_as=self.local_as, remote_as=self.remote_as,
+            local_address=self.local_ip, remote_address=self.remote_ip,
+        )
+        peer = BGPSession.objects.create(
+            name='peer', local_as=self.remote_as, remote_as=self.local_as,
+            local_address=IPAddress.objects.create(address='4.4.4.5/32'),
+            remote_address=IPAddress.objects.create(address='3.3.3.4/32'),
+        )
+        self.assertIsNone(BGPSessionPairing.objects.get(pk=peer.pk).peer_id)
+        # Within deferred_pairing(), the sessions of edited addresses are paired at its end
+        with deferred_pairing():
+            self.local_ip.address = '3.3.3.4/32'
+            self.local_ip.save()
+            self.remote_ip.address = '4.4.4.5/32'
+            self.remote_ip.save()
+            self.assertIsNone(BGPSessionPairing.objects.get(pk=peer.pk).peer_id)
+        self.assertEqual(BGPSessionPairing.objects.get(pk=peer.pk).peer_id, session.pk)
+        self.assertEqual(BGPSessionPairing.objects.get(pk=session.pk).status, PairingStatusChoices.STATUS_PAIRED)
+
+    def test_topology(self):
+        BGPSession.objects.create(
+            name='session2', device=self.device, local_as=self.local_as, remote_as=self.session.remote_as,
+            local_address=self.local_ip, remote_address=self.remote_ip, peer_group=self.peer_group,
+        )
+        url = reverse('plugins-api:netbox_bgp-api:topology-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        labels = {(node['kind'], node['label']) for node in response.data['nodes']}
+        self.assertEqual(labels, {
+            ('asn', 'AS65002'), ('asn', 'AS65003'), ('device', 'device1'), ('peer_group', 'peer_group'),
+        })
+        self.assertEqual(len(response.data['edges']), 4)
+
+        response = self.client.get(f'{url}?export=graphml')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b'<data key="label">device1</data>', b''.join(response.streaming_content))
+
+        url = reverse('plugins-api:netbox_bgp-api:topology-neighbors')
+        response = self.client.get(f'{url}?kind=asn&id={self.session.remote_as.pk}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {(node['label'], node['sessions']) for node in response.data['neighbors']},
+            {('AS65002', 1), ('device1', 1)}
+        )
+        response = self.client.get(f'{url}?kind=device&id=0')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(f'{url}?kind=site&id=1')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # A permissions change is not served the cached graph
+        self.user.is_superuser = False
+        self.user.save()
+        permission = ObjectPermission.objects.create(name='view sessions', actions=['view'])
+        permission.object_types.add(ContentType.objects.get_for_model(BGPSession))
+        permission.users.add(self.user)
+        url = reverse('plugins-api:netbox_bgp-api:topology-list')
+        self.assertEqual(len(self.client.get(url).data['edges']), 4)
+        permission.constraints = {'name': 'session2'}
+        permission.save()
+        self.assertEqual(len(self.client.get(url).data['edges']), 2)
+
+    def test_session_summary(self):
+        BGPSession.objects.create(
+            name='session2', device=self.device, site=self.device.site, status='planned',
+            local_as=self.local_as, remote_as=self.remote_as,
+            local_address=self.local_ip, remote_address=self.remote_ip,
+        )
+        url = reverse('plugins-api:netbox_bgp-api:session-summary-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 2)
+        self.assertEqual(response.data['status']['active'], 1)
+        self.assertEqual(response.data['status']['planned'], 1)
+        sites = {entry['label']: entry for entry in response.data['groups']['site']['entries']}
+        self.assertEqual(sites['test']['total'], 1)
+        self.assertEqual(sites['test']['status']['planned'], 1)
+        self.assertEqual(sites[None]['total'], 1)
+        self.assertEqual(response.data['groups']['site']['count'], 1)
+
+        response = self.client.get(f'{url}?status=planned&top=1')
+        self.assertEqual(response.data['total'], 1)
+        self.assertEqual(response.data['groups']['remote_as']['entries'][0]['label'], '65001')
+
+        # A permissions change is not served the cached summary
+        self.user.is_superuser = False
+        self.user.save()
+        permission = ObjectPermission.objects.create(name='view sessions', actions=['view'])
+        permission.object_types.add(ContentType.objects.get_for_model(BGPSession))
+        permission.users.add(self.user)
+        self.assertEqual(self.client.get(url).data['total'], 2)
+        permission.constraints = {'status': 'planned'}
+        permission.save()
+        self.assertEqual(self.client.get(url).data['total'], 1)
+
+    def test_device_snapshot(self):
+        policy = RoutingPolicy.objects.create(name='policy1')
+        prefix_list = PrefixList.objects.create(name='prefix_list1', family='ipv4')
+        rule = RoutingPolicyRule.objects.create(routing_policy=policy, index=10, action='permit')
+        rule.match_ip_address.add(prefix_list)
+        self.peer_group.import_policies.add(policy)
+        session = BGPSession.objects.create(
+            name='session2', device=self.device, local_as=self.local_as, remote_as=self.remote_as,
+            local_address=self.local_ip, remote_address=self.remote_ip, peer_group=self.peer_group,
+        )
+        url = reverse('plugins-api:netbox_bgp-api:device-snapshot-detail', kwargs={'pk': self.device.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([s['id'] for s in response.data['sessions']], [session.pk])
+        self.assertNotIn('state', response.data['sessions'][0])
+        self.assertEqual([p['name'] for p in response.data['routing_policies']], ['policy1'])
+        self.assertEqual([p['name'] for p in response.data['prefix_lists']], ['prefix_list1'])
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        # Only the token authentication hits the database
+        self.assertFalse([query for query in queries if 'netbox_bgp' in query['sql'] or 'dcim_' in query['sql']])
+        if msgpack is not None:
+            # Other representations have other ETags
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT='application/msgpack')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response['ETag'], etag)
+
+        # Changes to the device's sessions and to shared policies change the ETag
+        session.description = 'changed'
+        session.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.session.description = 'other device'
+        self.session.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        prefix_list.description = 'changed'
+        prefix_list.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_list_session_conditional(self):
+        url = reverse(f'{self.base_url_lookup}-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Writes to the model or to the models it renders change the ETag
+        self.session.remote_as.description = 'changed'
+        self.session.remote_as.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        Community.objects.create(value='65000:1')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        plugin_config = {**settings.PLUGINS_CONFIG['netbox_bgp'], 'api_cache_timeout': 60}
+        with override_settings(PLUGINS_CONFIG={**settings.PLUGINS_CONFIG, 'netbox_bgp': plugin_config}):
+            self.assertEqual(self.client.get(url)['X-BGP-Cache'], 'MISS')
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response['X-BGP-Cache'], 'HIT')
+            self.assertEqual(response.data['count'], 1)
+            self.assertFalse([query for query in queries if 'netbox_bgp' in query['sql']])
+            self.session.name = 'renamed'
+            self.session.save()
+            response = self.client.get(url)
+            self.assertEqual(response['X-BGP-Cache'], 'MISS')
+            self.assertEqual(response.data['results'][0]['name'], 'renamed')
+
+    def test_list_session_permissions(self):
+        url = reverse(f'{self.base_url_lookup}-list')
+        self.user.is_superuser = False
+        self.user.save()
+        permission = ObjectPermission.objects.create(name='view sessions', actions=['view'])
+        permission.object_types.add(ContentType.objects.get_for_model(BGPSession))
+        permission.users.add(self.user)
+
+        plugin_config = {**settings.PLUGINS_CONFIG['netbox_bgp'], 'api_cache_timeout': 60}
+        with override_settings(PLUGINS_CONFIG={**settings.PLUGINS_CONFIG, 'netbox_bgp': plugin_config}):
+            response = self.client.get(url)
+            self.assertEqual(response.data['count'], 1)
+            etag = response['ETag']
+            self.assertEqual(self.client.get(url)['X-BGP-Cache'], 'HIT')
+
+            # Revoking the permission changes the ETag and the cached page
+            permission.constraints = {'name': 'other'}
+            permission.save()
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+            response = self.client.get(url)
+            self.assertEqual(response.data['count'], 0)
+            # And so do permissions granted through a group
+            group = Group.objects.create(name='group')
+            permission.groups.add(group)
+            self.user.groups.add(group)
+            constrained = ObjectPermission.objects.create(name='view all sessions', actions=['view'])
+            constrained.object_types.add(ContentType.objects.get_for_model(BGPSession))
+            self.assertEqual(self.client.get(url).data['count'], 0)
+            constrained.groups.add(group)
+            self.assertEqual(self.client.get(url).data['count'], 1)
+
     def test_duplicate_session(self):
         url = reverse(f'{self.base_url_lookup}-list')
         data = {
@@ -283,6 +575,93 @@ class SessionTestCase(BaseTestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_graphql_list_nested_batched(self):
+        url = reverse('graphql')
+        query = (
+            '{bgp_session_list{name device{name} local_address{address} remote_as{asn} '
+            'peer_group{name import_policies{name}} import_policies{name} tags{name}}}'
+        )
+        policy = RoutingPolicy.objects.create(name='rp_batched')
+        self.peer_group.import_policies.add(policy)
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.gql_client.post(
+                    url,
+                    json.dumps({'query': query}),
+                    content_type='application/json'
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('errors', json.loads(response.content))
+            return len(ctx.captured_queries)
+
+        baseline = count_queries()
+        for i in range(5):
+            session = BGPSession.objects.create(
+                name=f'session{i}',
+                local_as=self.local_as,
+                remote_as=self.remote_as,
+                local_address=IPAddress.objects.create(address=f'10.0.0.{i}/32'),
+                remote_address=IPAddress.objects.create(address=f'10.0.1.{i}/32'),
+                device=self.device,
+                peer_group=BGPPeerGroup.objects.create(name=f'peer_group{i}'),
+            )
+            session.peer_group.import_policies.add(policy)
+            session.import_policies.add(policy)
+        self.assertEqual(count_queries(), baseline)
+
+    def test_graphql_cost_limit(self):
+        url = reverse('graphql')
+        query = '{bgp_session_list{name peer_group{name}}}'
+        plugin_config = {**settings.PLUGINS_CONFIG['netbox_bgp'], 'graphql_max_cost': 1}
+        with override_settings(PLUGINS_CONFIG={**settings.PLUGINS_CONFIG, 'netbox_bgp': plugin_config}):
+            client = Client(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+            response = client.post(url, json.dumps({'query': query}), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('exceeds the limit', json.loads(response.content)['errors'][0]['message'])
+
+    def test_graphql_cache(self):
+        url = reverse('graphql')
+        self.user.is_superuser = False
+        self.user.save()
+        permission = ObjectPermission.objects.create(name='view sessions', actions=['view'])
+        permission.object_types.add(ContentType.objects.get_for_model(BGPSession))
+        permission.users.add(self.user)
+        plugin_config = {**settings.PLUGINS_CONFIG['netbox_bgp'], 'graphql_cache_timeout': 60}
+        with override_settings(PLUGINS_CONFIG={**settings.PLUGINS_CONFIG, 'netbox_bgp': plugin_config}):
+            client = Client(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+            def post(query):
+                return client.post(url, json.dumps({'query': query}), content_type='application/json')
+
+            self.assertEqual(post('{bgp_session_list{name}}')['X-BGP-Cache'], 'MISS')
+            self.assertEqual(post('{bgp_session_list{name}}')['X-BGP-Cache'], 'HIT')
+
+            # Revoking the permission misses the cache
+            permission.constraints = {'name': 'other'}
+            permission.save()
+            response = post('{bgp_session_list{name}}')
+            self.assertEqual(response['X-BGP-Cache'], 'MISS')
+            self.assertEqual(json.loads(response.content)['data']['bgp_session_list'], [])
+
+            # Core objects whose writes do not change the BGP data version are not cached
+            self.assertNotIn('X-BGP-Cache', post('{bgp_session_list{name device{device_type{model}}}}'))
+
+    def test_instrumentation_header(self):
+        url = reverse(f'{self.base_url_lookup}-list')
+        plugin_config = {
+            **settings.PLUGINS_CONFIG['netbox_bgp'], 'instrumentation': True, 'instrumentation_header': True
+        }
+        with override_settings(PLUGINS_CONFIG={**settings.PLUGINS_CONFIG, 'netbox_bgp': plugin_config}):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+            response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = dict(item.split('=') for item in response['X-BGP-Metrics'].split('; '))
+        self.assertEqual(metrics['rows'], '1')
+        self.assertGreater(int(metrics['queries']), 0)
+        self.assertNotIn('X-BGP-Metrics', self.client.get(url))
+
 
 class RoutingPolicyTestCase(BaseTestCase):
     def setUp(self):
@@ -341,11 +720,70 @@ class PrefixListTestCase(BaseTestCase):
 
 
 class RoutingPolicyRuleTestCase(BaseTestCase):
-    pass
+    def setUp(self):
+        super().setUp()
+        self.rp = RoutingPolicy.objects.create(name='rp1', description='test_rp')
+        self.pl = PrefixList.objects.create(name='pl1', description='test_pl', family='ipv4')
+        PrefixListRule.objects.create(prefix_list=self.pl, index=10, action='permit', prefix_custom='10.0.0.0/8')
+        self.community = Community.objects.create(value='65000:100')
+        self.rule = RoutingPolicyRule.objects.create(
+            routing_policy=self.rp, index=10, action='permit',
+            set_actions={'local-preference': 200}
+        )
+        self.rule.match_ip_address.add(self.pl)
+        self.rule.match_community.add(self.community)
+
+    def test_graphql_policy_tree(self):
+        url = reverse('graphql')
+        query = (
+            '{routing_policy_list{name rules{index match_statements set_statements '
+            'match_ip_address{name prefrules{index prefix_custom}}}}}'
+        )
+        response = self.gql_client.post(
+            url,
+            json.dumps({'query': query}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rule = json.loads(response.content)['data']['routing_policy_list'][0]['rules'][0]
+        self.assertEqual(rule['index'], 10)
+        self.assertEqual(rule['match_statements'], {'community': ['65000:100'], 'ip address': ['pl1']})
+        self.assertEqual(rule['set_statements'], {'local-preference': 200})
+        self.assertEqual(rule['match_ip_address'][0]['prefrules'][0]['prefix_custom'], '10.0.0.0/8')
 
 
 class PrefixListRuleTestCase(BaseTestCase):
-    pass
+    def setUp(self):
+        super().setUp()
+        self.base_url_lookup = 'plugins-api:netbox_bgp-api:prefixlistrule'
+        self.pl = PrefixList.objects.create(name='pl1', description='test_pl', family='ipv4')
+        PrefixListRule.objects.create(prefix_list=self.pl, index=10, action='permit', prefix_custom='10.0.0.0/8')
+        PrefixListRule.objects.create(prefix_list=self.pl, index=20, action='deny', prefix_custom='192.168.0.0/16')
+
+    def test_filter_action(self):
+        url = reverse(f'{self.base_url_lookup}-list')
+        response = self.client.get(url, {'action': 'deny', 'prefix_list_id': self.pl.pk})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['index'], 20)
+
+    def test_filter_contains(self):
+        url = reverse(f'{self.base_url_lookup}-list')
+        response = self.client.get(url, {'contains': '10.1.0.0/16'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['index'], 10)
+        response = self.client.get(url, {'contains': 'invalid'})
+        self.assertEqual(response.data['count'], 0)
+
+    def test_search(self):
+        url = reverse(f'{self.base_url_lookup}-list')
+        for query, indexes in (
+            ('20', [20]), ('192.168.1.0/24', [20]), ('permit', [10]), ('pl', [10, 20]), ('²', []), ('9' * 12, []),
+        ):
+            response = self.client.get(url, {'q': query})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(sorted(r['index'] for r in response.data['results']), indexes, query)
 
 
 class TestAPISchema(BaseTestCase):
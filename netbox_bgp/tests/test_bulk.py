@@ -0,0 +1,124 @@
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+
+from extras.choices import ObjectChangeActionChoices
+from extras.models import ObjectChange, Tag
+
+from netbox_bgp import bulk
+from netbox_bgp.bulk import bulk_delete, bulk_edit, get_bulk_edit_changes
+from netbox_bgp.choices import CommunityStatusChoices
+from netbox_bgp.forms import CommunityBulkEditForm
+from netbox_bgp.jobs import JobProgress, JobStatus
+from netbox_bgp.models import BGPPeerGroup, Community, RoutingPolicy
+
+
+class BulkJobTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='testuser', is_superuser=True)
+        Community.objects.bulk_create(Community(value=f'65000:{i}') for i in range(25))
+        self.pks = list(Community.objects.values_list('pk', flat=True))
+        self.content_type = ContentType.objects.get_for_model(Community)
+        self.chunk_size = bulk.CHUNK_SIZE
+        bulk.CHUNK_SIZE = 10
+
+    def tearDown(self):
+        bulk.CHUNK_SIZE = self.chunk_size
+
+    def get_changes(self, action):
+        return ObjectChange.objects.filter(changed_object_type=self.content_type, action=action)
+
+    def test_bulk_delete(self):
+        Community.objects.get(pk=self.pks[0]).tags.add(Tag.objects.create(name='tag', slug='tag'))
+        progress = JobProgress.create('Delete communities', self.user)
+        bulk_delete(progress.job_id, self.user.pk, 'netbox_bgp.community', self.pks[:20])
+
+        progress = JobProgress.get(progress.job_id)
+        self.assertEqual(progress.data['status'], JobStatus.COMPLETED)
+        self.assertEqual(progress.data['done'], 20)
+        self.assertEqual(Community.objects.count(), 5)
+        changes = self.get_changes(ObjectChangeActionChoices.ACTION_DELETE)
+        self.assertEqual(changes.count(), 20)
+        self.assertEqual(changes.values('request_id').distinct().count(), 1)
+        self.assertEqual(changes.get(changed_object_id=self.pks[0]).prechange_data['tags'], ['tag'])
+        self.assertEqual(changes.get(changed_object_id=self.pks[1]).prechange_data['tags'], [])
+
+    def test_bulk_edit(self):
+        tag = Tag.objects.create(name='tag', slug='tag')
+        progress = JobProgress.create('Edit communities', self.user)
+        bulk_edit(progress.job_id, self.user.pk, 'netbox_bgp.community', self.pks, {
+            'fields': {'status': CommunityStatusChoices.STATUS_PLANNED, 'description': 'edited'},
+            'custom_fields': {},
+            'add_tags': [tag.pk],
+            'remove_tags': [],
+        })
+
+        progress = JobProgress.get(progress.job_id)
+        self.assertEqual(progress.data['status'], JobStatus.COMPLETED)
+        self.assertEqual(
+            Community.objects.filter(status=CommunityStatusChoices.STATUS_PLANNED, description='edited').count(), 25
+        )
+        self.assertEqual(Community.objects.filter(tags=tag).count(), 25)
+        changes = self.get_changes(ObjectChangeActionChoices.ACTION_UPDATE)
+        self.assertEqual(changes.count(), 25)
+        change = changes.first()
+        self.assertEqual(change.prechange_data['description'], '')
+        self.assertEqual(change.postchange_data['description'], 'edited')
+        self.assertEqual(change.prechange_data['tags'], [])
+        self.assertEqual(change.postchange_data['tags'], ['tag'])
+
+    def test_bulk_edit_nullify(self):
+        Community.objects.update(description='description')
+        form = CommunityBulkEditForm({'pk': self.pks, '_nullify': ['description']})
+        self.assertTrue(form.is_valid(), form.errors)
+        changes = get_bulk_edit_changes(Community, form, ['description'])
+        self.assertEqual(changes['fields']['description'], '')
+
+        progress = JobProgress.create('Edit communities', self.user)
+        bulk_edit(progress.job_id, self.user.pk, 'netbox_bgp.community', self.pks, changes)
+
+        progress = JobProgress.get(progress.job_id)
+        self.assertEqual(progress.data['status'], JobStatus.COMPLETED)
+        self.assertEqual(Community.objects.filter(description='').count(), 25)
+
+    def test_bulk_edit_invalid(self):
+        progress = JobProgress.create('Edit communities', self.user)
+        bulk_edit(progress.job_id, self.user.pk, 'netbox_bgp.community', self.pks, {
+            'fields': {'status': 'invalid'},
+            'custom_fields': {},
+            'add_tags': [],
+            'remove_tags': [],
+        })
+
+        progress = JobProgress.get(progress.job_id)
+        self.assertEqual(progress.data['status'], JobStatus.FAILED)
+        self.assertTrue(progress.data['errors'])
+        self.assertFalse(Community.objects.filter(status='invalid').exists())
+
+    def test_bulk_edit_many_to_many(self):
+        policies = [RoutingPolicy.objects.create(name=f'policy{i}') for i in range(3)]
+        BGPPeerGroup.objects.bulk_create(BGPPeerGroup(name=f'peer_group{i}') for i in range(15))
+        peer_groups = list(BGPPeerGroup.objects.order_by('pk'))
+        peer_groups[0].import_policies.set(policies[:2])
+        peer_groups[0].export_policies.set(policies[2:])
+        pks = [peer_group.pk for peer_group in peer_groups]
+        progress = JobProgress.create('Edit peer groups', self.user)
+        bulk_edit(progress.job_id, self.user.pk, 'netbox_bgp.bgppeergroup', pks, {
+            'fields': {'import_policies': [policies[1].pk, policies[2].pk]},
+            'custom_fields': {},
+            'add_tags': [],
+            'remove_tags': [],
+        })
+
+        progress = JobProgress.get(progress.job_id)
+        self.assertEqual(progress.data['status'], JobStatus.COMPLETED)
+        for peer_group in BGPPeerGroup.objects.prefetch_related('import_policies'):
+            self.assertEqual({policy.pk for policy in peer_group.import_policies.all()}, {policies[1].pk, policies[2].pk})
+        self.assertEqual(list(peer_groups[0].export_policies.all()), policies[2:])
+        change = ObjectChange.objects.get(
+            changed_object_type=ContentType.objects.get_for_model(BGPPeerGroup), changed_object_id=peer_groups[0].pk
+        )
+        self.assertEqual(change.prechange_data['import_policies'], [policies[0].pk, policies[1].pk])
+        self.assertEqual(change.postchange_data['import_policies'], [policies[1].pk, policies[2].pk])
+        self.assertEqual(change.prechange_data['export_policies'], [policies[2].pk])
+        self.assertEqual(change.postchange_data['export_policies'], [policies[2].pk])
@@ -0,0 +1,64 @@
+import asyncio
+import json
+import os
+import tempfile
+
+from netbox_bgp.collectors import (
+    FileCollector, JSONFeedCollector, StateRecord, collect_states, parse_state, store_states
+)
+from netbox_bgp.models import BGPSessionState
+
+from .base import DeviceSessionsTestCase
+
+
+class StateCollectorTestCase(DeviceSessionsTestCase):
+    def setUp(self):
+        self.sessions = self.create_sessions(self.create_device(), 3)
+
+    def test_file_collector(self):
+        with tempfile.TemporaryDirectory() as path:
+            with open(os.path.join(path, 'device1.json'), 'w') as f:
+                json.dump([
+                    {'device': 'device1', 'remote_address': '10.1.0.1', 'state': 'Established', 'prefixes_received': 10},
+                    {'device': 'device1', 'remote_address': '10.1.0.2/32', 'state': 'idle'},
+                    {'device': 'device2', 'remote_address': '10.1.0.3', 'state': 'idle'},
+                    {'device': 'device1', 'state': 'idle'},
+                ], f)
+            with open(os.path.join(path, 'broken.json'), 'w') as f:
+                f.write('{')
+            records, errors = collect_states([FileCollector(path, remove=True)])
+            # Unreadable files are left in place
+            self.assertEqual(os.listdir(path), ['broken.json'])
+
+        self.assertEqual(len(records['file']), 3)
+        self.assertEqual(len(errors), 2)
+        changed, unresolved = store_states(records['file'], source='file')
+        self.assertEqual(changed, {self.sessions[0].pk, self.sessions[1].pk})
+        self.assertEqual(len(unresolved), 1)
+        state = BGPSessionState.objects.get(session=self.sessions[0])
+        self.assertEqual(state.state, 'established')
+        self.assertEqual(state.prefixes_received, 10)
+
+        # Unchanged states keep their last change
+        changed, _ = store_states([parse_state({'session_id': self.sessions[0].pk, 'state': 'established'})])
+        self.assertEqual(changed, set())
+        self.assertEqual(BGPSessionState.objects.get(session=self.sessions[0]).last_change, state.last_change)
+
+    def test_json_feed_collector(self):
+        async def serve(reader, writer):
+            for session in self.sessions:
+                writer.write(json.dumps({'session_id': session.pk, 'state': 'active'}).encode() + b'\n')
+            await writer.drain()
+            writer.close()
+
+        async def collect():
+            server = await asyncio.start_server(serve, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await JSONFeedCollector('127.0.0.1', port, timeout=5).collect()
+
+        records = asyncio.run(collect())
+        self.assertEqual(records, [StateRecord(session_id=s.pk, state='active') for s in self.sessions])
+        changed, _ = store_states(records)
+        self.assertEqual(len(changed), 3)
+        self.assertEqual(BGPSessionState.objects.filter(state='active').count(), 3)
@@ -0,0 +1,39 @@
+from django.core.management import call_command
+from django.test import TestCase
+
+from netbox_bgp.management.commands.bgp_benchmark import find_regressions
+from netbox_bgp.models import BGPSession, PrefixListRule, RoutingPolicyRule
+from netbox_bgp.signals import LIBRARY_VERSION, model_version
+from netbox_bgp.versioning import get_versions
+
+
+class GenerateDataTestCase(TestCase):
+    def test_generate_data(self):
+        names = [model_version('netbox_bgp.bgpsession'), model_version('netbox_bgp.prefixlistrule'), LIBRARY_VERSION]
+        versions = get_versions(names)
+        call_command(
+            'bgp_generate_data', sites=2, devices=4, sessions=50, remote_asns=5, peer_groups=2,
+            policies=3, rules_per_policy=2, prefix_lists=2, rules_per_list=3, communities=5,
+            batch_size=20, verbosity=0
+        )
+        self.assertEqual(BGPSession.objects.count(), 50)
+        self.assertEqual(RoutingPolicyRule.objects.count(), 6)
+        self.assertEqual(PrefixListRule.objects.count(), 6)
+        session = BGPSession.objects.get(name='session5')
+        self.assertEqual(session.site, session.device.site)
+        self.assertEqual(
+            BGPSession.objects.filter(device=session.device).values('local_address').distinct().count(), 1
+        )
+        # bulk_create() sends no signals: the command bumps the versions itself
+        for name, version in get_versions(names).items():
+            self.assertNotEqual(version, versions[name])
+
+
+class BenchmarkTestCase(TestCase):
+    def test_find_regressions(self):
+        baseline = {'100': {'api_session_list': {'time_ms': 10.0, 'queries': 8, 'peak_kb': 500.0}}}
+        results = {'100': {'api_session_list': {'time_ms': 11.0, 'queries': 9, 'peak_kb': 900.0}}}
+        regressions = find_regressions(results, baseline, tolerance=0.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('9 queries', regressions[0])
+        self.assertIn('peak_kb', regressions[1])
@@ -0,0 +1,92 @@
+from django.core.cache import cache
+
+from netbox_bgp.collectors import StateRecord
+from netbox_bgp.drift import get_drift_report, record_observations, update_drift
+from netbox_bgp.models import BGPDrift, BGPPeerGroup
+
+from .base import DeviceSessionsTestCase
+
+
+class DriftTestCase(DeviceSessionsTestCase):
+    def setUp(self):
+        cache.clear()
+        peer_group = BGPPeerGroup.objects.create(name='transit')
+        self.devices = []
+        self.sessions = {}
+        for i in range(2):
+            device = self.create_device(f'device{i}')
+            self.devices.append(device)
+            sessions = self.create_sessions(
+                device, 3, local_address=f'10.0.0.{i + 1}/32', network=i + 1, peer_group=peer_group
+            )
+            for j, session in enumerate(sessions):
+                self.sessions[(i, j)] = session
+
+    def observe(self, device, neighbors):
+        return [
+            StateRecord(device=device, remote_address=address, state=state, remote_as=remote_as, peer_group='transit')
+            for address, state, remote_as in neighbors
+        ]
+
+    def test_drift(self):
+        records = self.observe('device0', [
+            ('10.1.0.1', 'established', 65100),
+            ('10.1.0.2/32', 'active', 65101),
+            ('10.1.0.9', 'established', 65199),
+        ]) + self.observe('device1', [
+            ('10.2.0.1', 'established', 65100),
+            ('10.2.0.2', 'established', 65101),
+            ('10.2.0.3', 'established', 65102),
+        ]) + self.observe('unknown', [('10.3.0.1', 'established', 65100)])
+        changed = record_observations(records)
+        self.assertEqual(changed, {device.pk for device in self.devices})
+        self.assertEqual(update_drift(changed), 2)
+
+        report = get_drift_report()
+        self.assertEqual(report['kinds'], {'missing': 1, 'unexpected': 1, 'mismatched': 1})
+        entries = {(entry['remote_address'], entry['kind']): entry for entry in report['entries']}
+        self.assertEqual(entries[('10.1.0.3', 'missing')]['session'], self.sessions[(0, 2)].pk)
+        self.assertEqual(entries[('10.1.0.9', 'unexpected')]['details']['remote_as'], 65199)
+        self.assertEqual(
+            entries[('10.1.0.2', 'mismatched')]['details'], {'state': {'intended': 'established', 'observed': 'active'}}
+        )
+        detected = BGPDrift.objects.get(kind='missing').detected
+
+        # Unchanged observations of device1 do not recompute it
+        records[4] = records[4]._replace(remote_as=65000)
+        changed = record_observations(records)
+        self.assertEqual(changed, {self.devices[1].pk})
+        self.assertEqual(update_drift(changed), 1)
+        self.assertEqual(get_drift_report()['kinds']['mismatched'], 2)
+        self.assertEqual(
+            get_drift_report(devices=[self.devices[1].pk])['entries'][0]['details'],
+            {'remote_as': {'intended': 65101, 'observed': 65000}}
+        )
+
+        # Updating a session recomputes its device; drift still present keeps its detection time
+        session = self.sessions[(0, 1)]
+        session.status = 'offline'
+        session.save()
+        self.assertEqual(update_drift(), 1)
+        self.assertEqual(get_drift_report(devices=[self.devices[0].pk], kinds=['mismatched'])['count'], 0)
+        self.assertEqual(BGPDrift.objects.get(kind='missing').detected, detected)
+        self.assertEqual(update_drift(), 0)
+
+        # So do deleting a session and editing the ASNs and peer groups of sessions
+        self.sessions[(0, 0)].delete()
+        self.assertEqual(update_drift(), 1)
+        self.assertIn(
+            ('10.1.0.1', 'unexpected'),
+            {(entry['remote_address'], entry['kind']) for entry in get_drift_report()['entries']}
+        )
+        # The ASN of both devices' third session
+        asn = self.sessions[(1, 2)].remote_as
+        asn.asn = 65300
+        asn.save()
+        self.assertEqual(update_drift(), 2)
+        self.assertEqual(get_drift_report(devices=[self.devices[1].pk], kinds=['mismatched'])['count'], 2)
+        peer_group = self.sessions[(1, 0)].peer_group
+        peer_group.name = 'renamed'
+        peer_group.save()
+        self.assertEqual(update_drift(), 2)
+        self.assertEqual(update_drift(full=True), 2)
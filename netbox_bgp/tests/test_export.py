@@ -0,0 +1,63 @@
+import io
+import os
+import tempfile
+from unittest import skipIf
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.models import Token
+
+from netbox_bgp.export import EXPORT_TABLES, pyarrow, write_export
+from netbox_bgp.models import Community, PrefixList, PrefixListRule
+
+from .base import DeviceSessionsTestCase
+
+if pyarrow is not None:
+    import pyarrow.parquet
+
+
+@skipIf(pyarrow is None, 'pyarrow is not installed')
+class ExportTestCase(DeviceSessionsTestCase):
+    def setUp(self):
+        self.device = self.create_device()
+        self.create_sessions(self.device, 5)
+        prefix_list = PrefixList.objects.create(name='prefix_list1', family='ipv4')
+        PrefixListRule.objects.create(prefix_list=prefix_list, index=10, action='permit', prefix_custom='10.0.0.0/8')
+        Community.objects.create(value='65000:1')
+
+    def test_write_export(self):
+        sink = io.BytesIO()
+        self.assertEqual(write_export('session', sink, batch_size=2), 5)
+        table = pyarrow.parquet.read_table(io.BytesIO(sink.getvalue()))
+        self.assertEqual(table.column_names, [column.name for column in EXPORT_TABLES['session'][1]])
+        self.assertEqual(set(table.column('device_id').to_pylist()), {self.device.pk})
+        self.assertEqual(pyarrow.parquet.ParquetFile(io.BytesIO(sink.getvalue())).num_row_groups, 3)
+
+        with tempfile.TemporaryDirectory() as path:
+            call_command('bgp_export', path, format='arrow', stdout=io.StringIO())
+            self.assertEqual(sorted(os.listdir(path)), sorted(f'{table}.arrow' for table in EXPORT_TABLES))
+            table = pyarrow.ipc.open_file(os.path.join(path, 'prefix_list_rule.arrow')).read_all()
+            self.assertEqual(table.column('prefix_custom').to_pylist(), ['10.0.0.0/8'])
+
+    def test_export_api(self):
+        user = User.objects.create(username='testuser', is_superuser=True)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        response = client.get(reverse('plugins-api:netbox_bgp-api:export-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), set(EXPORT_TABLES))
+
+        url = reverse('plugins-api:netbox_bgp-api:export-detail', kwargs={'pk': 'session'})
+        response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        table = pyarrow.parquet.read_table(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(table.num_rows, 5)
+        response = client.get(f'{url}?type=arrow')
+        self.assertEqual(pyarrow.ipc.open_stream(b''.join(response.streaming_content)).read_all().num_rows, 5)
+
+        response = client.get(reverse('plugins-api:netbox_bgp-api:export-detail', kwargs={'pk': 'device'}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,57 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ipam.models import IPAddress, ASN
+
+from netbox_bgp.importers import BGPSessionImporter, ImportValidationError, parse_records
+from netbox_bgp.models import BGPSession, RoutingPolicy
+
+from .base import DeviceSessionsTestCase
+
+
+class BGPSessionImporterTestCase(DeviceSessionsTestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='testuser', is_superuser=True)
+        self.device = self.create_device()
+        ASN.objects.bulk_create(ASN(asn=65100 + i, rir=self.rir) for i in range(100))
+        IPAddress.objects.create(address='10.0.0.1/32')
+        IPAddress.objects.bulk_create(IPAddress(address=f'10.1.0.{i + 1}/32') for i in range(100))
+        RoutingPolicy.objects.create(name='import1')
+        RoutingPolicy.objects.create(name='import2')
+
+    def get_csv(self, count):
+        rows = ['device,local_address,remote_address,local_as,remote_as,status,import_policies']
+        rows += [
+            f'device1,10.0.0.1,10.1.0.{i + 1}/32,65000,{65100 + i},active,"import1,import2"'
+            for i in range(count)
+        ]
+        return '\n'.join(rows)
+
+    def test_import_sessions(self):
+        sessions = BGPSessionImporter(self.user, chunk_size=4).run(parse_records(self.get_csv(10), 'csv'))
+        self.assertEqual(len(sessions), 10)
+        session = BGPSession.objects.get(remote_as__asn=65105)
+        self.assertEqual(session.device, self.device)
+        self.assertEqual(session.site, self.device.site)
+        self.assertEqual(str(session.remote_address.address), '10.1.0.6/32')
+        self.assertEqual(sorted(p.name for p in session.import_policies.all()), ['import1', 'import2'])
+
+    def test_import_queries_constant(self):
+        def count_queries(count):
+            with CaptureQueriesContext(connection) as queries:
+                BGPSessionImporter(self.user, chunk_size=1000).run(parse_records(self.get_csv(count), 'csv'))
+            BGPSession.objects.all().delete()
+            return len(queries)
+
+        self.assertEqual(count_queries(100), count_queries(10))
+
+    def test_import_errors(self):
+        data = self.get_csv(3) + '\ndevice2,10.0.0.1,10.9.9.9,65000,1,active,\n' + self.get_csv(1).split('\n')[1]
+        with self.assertRaises(ImportValidationError) as cm:
+            BGPSessionImporter(self.user).run(parse_records(data, 'csv'))
+        errors = cm.exception.errors
+        self.assertIn('Row 4: device: Device "device2" not found', errors)
+        self.assertTrue(any(e.startswith('Row 4: remote_address') for e in errors))
+        self.assertTrue(any(e.startswith('Row 5: __all__') for e in errors))
+        self.assertFalse(BGPSession.objects.exists())
@@ -1,4 +1,5 @@
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.db.utils import IntegrityError
 from django.test import TestCase
 
@@ -6,7 +7,7 @@ from tenancy.models import Tenant
 from dcim.models import Site, Device, Manufacturer, DeviceRole, DeviceType
 from ipam.models import IPAddress, ASN, RIR
 
-from netbox_bgp.models import BGPSession, Community, RoutingPolicy, BGPPeerGroup
+from netbox_bgp.models import BGPSession, Community, RoutingPolicy, BGPPeerGroup, PrefixList
 
 
 class RoutingPolicyTestCase(TestCase):
@@ -115,6 +116,17 @@ class CommunityTestCase(TestCase):
         self.assertRaises(ValidationError, community.full_clean)
 
 
+class PrefixListTestCase(TestCase):
+    def test_name_search_index(self):
+        PrefixList.objects.bulk_create(PrefixList(name=f'list{i}', family='ipv4') for i in range(10))
+        queryset = PrefixList.objects.filter(name__icontains='IST1')
+        with connection.cursor() as cursor:
+            # Too few rows for the planner to prefer the index by itself
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        self.assertIn('netbox_bgp_pl_name_trgm', queryset.explain())
+        self.assertEqual(queryset.count(), 1)
+
+
 class BGPSessionTestCase(TestCase):
     def setUp(self):
         manufacturer = Manufacturer.objects.create(
@@ -0,0 +1,68 @@
+import asyncio
+
+from netbox_bgp.collectors import store_states
+from netbox_bgp.models import BGPSessionState
+from netbox_bgp.poller import DevicePoller, DevicePollerCollector, FakeDeviceServer, PollError, Target
+
+from .base import DeviceSessionsTestCase
+
+
+class DevicePollerTestCase(DeviceSessionsTestCase):
+    def setUp(self):
+        for i in range(5):
+            self.create_sessions(
+                self.create_device(f'device{i}'), 4, local_address=f'10.0.0.{i + 1}/32', network=i + 1
+            )
+
+    def test_poll_fake_devices(self):
+        server = FakeDeviceServer.from_sessions(seed=1, established=1)
+        collector = DevicePollerCollector(host='127.0.0.1', port=0, concurrency=2)
+
+        async def collect():
+            port = await server.start()
+            collector.poller.targets = [target._replace(port=port) for target in collector.poller.targets]
+            try:
+                first = await collector.collect()
+                second = await collector.collect()
+            finally:
+                collector.poller.close()
+                await server.stop()
+            return first, second
+
+        first, second = asyncio.run(collect())
+        self.assertEqual(len(first), 20)
+        self.assertEqual(first, second)
+        self.assertEqual(collector.errors, [])
+        # One connection per device, reused for the second poll
+        self.assertEqual(collector.poller.stats['connections'], 5)
+        self.assertEqual(server.stats['requests'], 10)
+
+        changed, unresolved = store_states(first, source='poller')
+        self.assertEqual(len(changed), 20)
+        self.assertEqual(unresolved, [])
+        self.assertEqual(BGPSessionState.objects.filter(state='established').count(), 20)
+
+    def test_retries_and_backoff(self):
+        server = FakeDeviceServer({'device0': []}, failure_rate=0.5, seed=3)
+
+        async def poll():
+            port = await server.start()
+            poller = DevicePoller([Target('device0', '127.0.0.1', port)], retries=20, backoff=0.001)
+            results = [await poller.poll() for _ in range(5)]
+            poller.close()
+            await server.stop()
+
+            # A device still failing after its retries is skipped for a while
+            down = DevicePoller([Target('device0', '127.0.0.1', port)], timeout=1, retries=0, backoff=60)
+            results.append(await down.poll())
+            results.append(await down.poll())
+            return results, down
+
+        results, down = asyncio.run(poll())
+        for _, neighbors, error in [result[0] for result in results[:5]]:
+            self.assertIsNone(error)
+            self.assertEqual(neighbors, [])
+        self.assertGreater(server.stats['dropped'], 0)
+        self.assertIsInstance(results[5][0][2], OSError)
+        self.assertIsInstance(results[6][0][2], PollError)
+        self.assertEqual(down.stats['skipped'], 1)
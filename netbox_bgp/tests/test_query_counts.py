@@ -0,0 +1,200 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+
+from extras.models import Tag
+from ipam.models import IPAddress, ASN
+
+from netbox_bgp import urls
+from netbox_bgp.api import urls as api_urls
+from netbox_bgp.models import (
+    Community, BGPPeerGroup, BGPSession,
+    RoutingPolicy, RoutingPolicyRule, PrefixList, PrefixListRule
+)
+from netbox_bgp.tables import BGPSessionTable
+
+from .base import DeviceSessionsTestCase
+
+
+# Views which only accept POST requests
+POST_ONLY_SUFFIXES = ('_bulk_delete', '_bulk_edit')
+
+# Views whose query count legitimately depends on the number of related objects
+EXEMPT = {
+    # The confirmation page lists every cascade-deleted rule, as collected by Django
+    'plugins:netbox_bgp:routingpolicy_delete',
+    'plugins:netbox_bgp:prefixlist_delete',
+    # Requires the node to look up as query parameters
+    'plugins-api:netbox_bgp-api:topology-neighbors',
+    # Takes a device id rather than the pk of its model; covered by test_device_snapshot
+    'plugins-api:netbox_bgp-api:device-snapshot-detail',
+    # Takes a table name and streams it
+    'plugins-api:netbox_bgp-api:export-detail',
+}
+
+
+def iter_patterns(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern
+
+
+def get_view_model(pattern):
+    view = getattr(pattern.callback, 'view_class', None) or getattr(pattern.callback, 'cls', None)
+    queryset = getattr(view, 'queryset', None)
+    if queryset is not None:
+        return queryset.model
+    return pattern.default_args.get('model')
+
+
+def discover_urls():
+    """
+    Yield (url name, model, is list) for every GET-able URL of the plugin's views and REST API.
+    """
+    for namespace, patterns in (
+        ('plugins:netbox_bgp', urls.urlpatterns),
+        ('plugins-api:netbox_bgp-api', api_urls.urlpatterns),
+    ):
+        for pattern in iter_patterns(patterns):
+            converters = pattern.pattern.converters if hasattr(pattern.pattern, 'converters') else {}
+            regex = pattern.pattern.regex.pattern
+            if 'format' in regex or pattern.name.endswith(POST_ONLY_SUFFIXES):
+                continue
+            if set(converters) - {'pk'}:
+                continue
+            has_pk = 'pk' in converters or '(?P<pk>' in regex
+            yield f'{namespace}:{pattern.name}', get_view_model(pattern), has_pk
+
+
+class QueryCountData:
+    """
+    Objects for the query count checks. Every added row of each model hangs off the same
+    hub objects, so both list views and the detail views of the hubs grow with the row count.
+    """
+    def __init__(self, device, rir, local_as):
+        self.device = device
+        self.rir = rir
+        self.local_as = local_as
+        self.local_address = IPAddress.objects.create(address='10.0.0.1/32')
+        self.tag = Tag.objects.create(name='tag', slug='tag')
+        self.policy = RoutingPolicy.objects.create(name='policy')
+        self.prefix_list = PrefixList.objects.create(name='prefix_list', family='ipv4')
+        self.community = Community.objects.create(value='65000:65000')
+        self.peer_group = BGPPeerGroup.objects.create(name='peer_group')
+        self.peer_group.import_policies.add(self.policy)
+        self.peer_group.export_policies.add(self.policy)
+        self.count = 0
+
+    def grow(self, total):
+        for i in range(self.count, total):
+            community = Community.objects.create(value=f'65001:{i}')
+            community.tags.add(self.tag)
+            peer_group = BGPPeerGroup.objects.create(name=f'peer_group{i}')
+            peer_group.import_policies.add(self.policy)
+            RoutingPolicy.objects.create(name=f'policy{i}').tags.add(self.tag)
+            PrefixList.objects.create(name=f'prefix_list{i}', family='ipv4').tags.add(self.tag)
+            rule = RoutingPolicyRule.objects.create(routing_policy=self.policy, index=i + 1, action='permit')
+            rule.match_ip_address.add(self.prefix_list)
+            rule.match_community.add(self.community, community)
+            rule.tags.add(self.tag)
+            PrefixListRule.objects.create(
+                prefix_list=self.prefix_list, index=i + 1, action='permit', prefix_custom=f'10.{i}.0.0/16'
+            ).tags.add(self.tag)
+            session = BGPSession.objects.create(
+                name=f'session{i}',
+                device=self.device,
+                site=self.device.site,
+                local_address=self.local_address,
+                local_as=self.local_as,
+                remote_address=IPAddress.objects.create(address=f'10.1.{i // 250}.{i % 250 + 1}/32'),
+                remote_as=ASN.objects.create(asn=65100 + i, rir=self.rir),
+                peer_group=self.peer_group,
+            )
+            session.import_policies.add(self.policy)
+            session.tags.add(self.tag)
+        self.count = max(self.count, total)
+
+    def get_object(self, model):
+        hubs = {
+            RoutingPolicy: self.policy,
+            PrefixList: self.prefix_list,
+            BGPPeerGroup: self.peer_group,
+            Community: self.community,
+        }
+        return hubs.get(model) or model.objects.order_by('pk').first()
+
+
+class QueryCountTestCase(DeviceSessionsTestCase):
+    """
+    Render every view and REST endpoint of the plugin at two row counts and make sure the
+    number of queries does not grow with the number of rows.
+    """
+    sizes = (10, 100)
+
+    def setUp(self):
+        self.user = User.objects.create(username='testuser', is_superuser=True)
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.data = QueryCountData(self.create_device(), self.rir, self.local_as)
+
+    def get_url(self, name, model, has_pk):
+        if has_pk:
+            return reverse(name, kwargs={'pk': self.data.get_object(model).pk})
+        if name.startswith('plugins-api:'):
+            return f'{reverse(name)}?limit={max(self.sizes)}'
+        return f'{reverse(name)}?per_page={max(self.sizes)}'
+
+    def count_queries(self, url):
+        # Warm up caches populated on first use (content types, user config, etc.)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    def test_query_counts_constant(self):
+        discovered = [
+            (name, model, has_pk) for name, model, has_pk in discover_urls() if name not in EXEMPT
+        ]
+        self.assertTrue(discovered)
+        counts = {}
+        for size in self.sizes:
+            self.data.grow(size)
+            for name, model, has_pk in discovered:
+                counts.setdefault(name, []).append(self.count_queries(self.get_url(name, model, has_pk)))
+
+        for name, name_counts in counts.items():
+            with self.subTest(url=name):
+                self.assertEqual(
+                    name_counts[-1], name_counts[0],
+                    f'{name}: query count grows with the number of rows '
+                    f'({", ".join(f"{size} rows: {count}" for size, count in zip(self.sizes, name_counts))})'
+                )
+
+    def test_query_counts_selected_columns(self):
+        url = self.get_url('plugins:netbox_bgp:bgpsession_list', BGPSession, False)
+        # Columns chosen by the user instead of the default ones: fewer, then all of them
+        for columns, joined in (
+            (['name', 'peer_group', 'remote_as'], False),
+            (list(BGPSessionTable.Meta.fields[1:]), True),
+        ):
+            with self.subTest(columns=columns):
+                self.user.config.set('tables.BGPSessionTable.columns', columns, commit=True)
+                counts = []
+                for size in self.sizes:
+                    self.data.grow(size)
+                    counts.append(self.count_queries(url))
+                self.assertEqual(counts[-1], counts[0])
+
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(url)
+                session_queries = [query['sql'] for query in queries if 'FROM "netbox_bgp_bgpsession"' in query['sql']]
+                self.assertTrue(session_queries)
+                self.assertEqual(bool([sql for sql in session_queries if 'JOIN "dcim_device"' in sql]), joined)
+                # Hidden default columns are neither joined nor prefetched
+                if not joined:
+                    self.assertFalse([query for query in queries if 'FROM "dcim_device"' in query['sql']])
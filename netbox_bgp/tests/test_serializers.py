@@ -0,0 +1,55 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework import relations
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from netbox_bgp.api.serializers import BGPPeerGroupSerializer, NestedRoutingPolicySerializer
+from netbox_bgp.models import BGPPeerGroup, RoutingPolicy
+
+
+class NestedPolicySerializationTestCase(TestCase):
+    policy_count = 200
+
+    def setUp(self):
+        request = APIRequestFactory().get('/')
+        request.user = User.objects.create(username='testuser', is_superuser=True)
+        self.context = {'request': Request(request)}
+        self.peer_group = BGPPeerGroup.objects.create(name='peer_group')
+        RoutingPolicy.objects.bulk_create(
+            RoutingPolicy(name=f'policy{i}') for i in range(self.policy_count)
+        )
+        self.policies = list(RoutingPolicy.objects.all())
+        self.peer_group.import_policies.set(self.policies)
+
+    def test_urls_reversed_once_per_view(self):
+        with mock.patch.object(relations, 'reverse', wraps=relations.reverse) as reverse:
+            data = BGPPeerGroupSerializer(self.peer_group, context=self.context).data
+        self.assertEqual(len(data['import_policies']), self.policy_count)
+        self.assertEqual(reverse.call_count, 1)
+        self.assertEqual(
+            data['import_policies'][0]['url'],
+            NestedRoutingPolicySerializer(self.policies[0], context=self.context).data['url']
+        )
+
+    def test_nested_serializer_built_once(self):
+        self.peer_group.export_policies.set(self.policies[:10])
+        serializer = BGPPeerGroupSerializer(self.peer_group, context=self.context)
+        fields = [serializer.fields[name].child_relation for name in ('import_policies', 'export_policies')]
+        for field in fields:
+            field.serializer = mock.Mock(wraps=NestedRoutingPolicySerializer)
+        data = serializer.data
+
+        self.assertEqual(len(data['import_policies']), self.policy_count)
+        # One nested serializer per field, not per referenced policy
+        for field in fields:
+            self.assertEqual(field.serializer.call_count, 1)
+        self.assertEqual(
+            sorted((dict(d) for d in data['import_policies']), key=lambda d: d['id']),
+            sorted(
+                (dict(NestedRoutingPolicySerializer(policy, context=self.context).data) for policy in self.policies),
+                key=lambda d: d['id']
+            )
+        )
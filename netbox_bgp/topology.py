@@ -0,0 +1,192 @@
+from array import array
+from xml.sax.saxutils import escape
+
+from django.core.cache import cache
+
+from .models import BGPSession
+from .signals import PERMISSIONS_VERSION
+from .versioning import get_data_version, get_versions
+
+
+TOPOLOGY_KEY = 'netbox_bgp:topology:{}:{}'
+TOPOLOGY_TIMEOUT = 24 * 60 * 60
+
+NODE_DEVICE = 'device'
+NODE_ASN = 'asn'
+NODE_PEER_GROUP = 'peer_group'
+NODE_KINDS = (NODE_DEVICE, NODE_ASN, NODE_PEER_GROUP)
+
+
+class TopologyGraph:
+    """
+    Undirected graph of the BGP mesh in compressed sparse row (CSR) form.
+
+    Nodes are devices, ASNs and peer groups. Every session links its device (or its local
+    ASN when it has no device) to its remote ASN and to its peer group; the weight of an
+    edge is the number of sessions behind it. The neighbors of node ``i`` are
+    ``indices[indptr[i]:indptr[i + 1]]`` with the matching ``weights``.
+    """
+    def __init__(self, kinds, object_ids, labels, indptr, indices, weights):
+        self.kinds = kinds
+        self.object_ids = object_ids
+        self.labels = labels
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self._index = None
+
+    def __getstate__(self):
+        # The node index is cheap to rebuild and would double the cached size
+        state = self.__dict__.copy()
+        state['_index'] = None
+        return state
+
+    @classmethod
+    def build(cls, queryset):
+        """Build the graph from a BGPSession queryset with a single query."""
+        index = {}
+        kinds = array('B')
+        object_ids = array('q')
+        labels = []
+
+        def node(kind, object_id, label):
+            key = (kind, object_id)
+            i = index.get(key)
+            if i is None:
+                i = index[key] = len(labels)
+                kinds.append(NODE_KINDS.index(kind))
+                object_ids.append(object_id)
+                labels.append(str(label))
+            return i
+
+        edges = {}
+
+        def link(a, b):
+            key = (a, b) if a <= b else (b, a)
+            edges[key] = edges.get(key, 0) + 1
+
+        rows = queryset.order_by().values_list(
+            'device_id', 'device__name', 'local_as_id', 'local_as__asn',
+            'remote_as_id', 'remote_as__asn', 'peer_group_id', 'peer_group__name',
+        )
+        for device_id, device, local_as_id, local_as, remote_as_id, remote_as, peer_group_id, peer_group in \
+                rows.iterator(chunk_size=10000):
+            if device_id is not None:
+                source = node(NODE_DEVICE, device_id, device or f'Device {device_id}')
+            else:
+                source = node(NODE_ASN, local_as_id, f'AS{local_as}')
+            link(source, node(NODE_ASN, remote_as_id, f'AS{remote_as}'))
+            if peer_group_id is not None:
+                link(source, node(NODE_PEER_GROUP, peer_group_id, peer_group))
+
+        # Counting sort of both directions of every edge into CSR arrays
+        count = len(labels)
+        indptr = array('q', bytes(8 * (count + 1)))
+        for a, b in edges:
+            indptr[a + 1] += 1
+            if a != b:
+                indptr[b + 1] += 1
+        for i in range(count):
+            indptr[i + 1] += indptr[i]
+        indices = array('q', bytes(8 * indptr[count]))
+        weights = array('q', bytes(8 * indptr[count]))
+        position = array('q', indptr[:count])
+        for (a, b), weight in edges.items():
+            for source, target in ((a, b), (b, a)) if a != b else ((a, b),):
+                indices[position[source]] = target
+                weights[position[source]] = weight
+                position[source] += 1
+
+        graph = cls(kinds, object_ids, labels, indptr, indices, weights)
+        graph._index = index
+        return graph
+
+    @property
+    def node_count(self):
+        return len(self.labels)
+
+    @property
+    def edge_count(self):
+        return sum(1 for source, target, _ in self.edges())
+
+    def get_node(self, kind, object_id):
+        if self._index is None:
+            self._index = {
+                (NODE_KINDS[kind_id], object_id): i
+                for i, (kind_id, object_id) in enumerate(zip(self.kinds, self.object_ids))
+            }
+        return self._index.get((kind, object_id))
+
+    def node_data(self, i):
+        return {'id': i, 'kind': NODE_KINDS[self.kinds[i]], 'object_id': self.object_ids[i], 'label': self.labels[i]}
+
+    def neighbors(self, i):
+        """Yield (neighbor, sessions) of node i."""
+        for j in range(self.indptr[i], self.indptr[i + 1]):
+            yield self.indices[j], self.weights[j]
+
+    def edges(self):
+        """Yield every edge once as (source, target, sessions)."""
+        for source in range(self.node_count):
+            for target, weight in self.neighbors(source):
+                if source <= target:
+                    yield source, target, weight
+
+    def as_dict(self):
+        return {
+            'nodes': [self.node_data(i) for i in range(self.node_count)],
+            'edges': [
+                {'source': source, 'target': target, 'sessions': weight}
+                for source, target, weight in self.edges()
+            ],
+        }
+
+    def iter_graphml(self):
+        """Yield the graph as GraphML, in chunks suitable for a streaming response."""
+        yield (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+            '<key id="kind" for="node" attr.name="kind" attr.type="string"/>\n'
+            '<key id="object_id" for="node" attr.name="object_id" attr.type="long"/>\n'
+            '<key id="label" for="node" attr.name="label" attr.type="string"/>\n'
+            '<key id="sessions" for="edge" attr.name="sessions" attr.type="long"/>\n'
+            '<graph id="bgp" edgedefault="undirected">\n'
+        )
+        chunk = []
+        for i in range(self.node_count):
+            chunk.append(
+                f'<node id="n{i}"><data key="kind">{NODE_KINDS[self.kinds[i]]}</data>'
+                f'<data key="object_id">{self.object_ids[i]}</data>'
+                f'<data key="label">{escape(self.labels[i])}</data></node>\n'
+            )
+            if len(chunk) >= 1000:
+                yield ''.join(chunk)
+                chunk = []
+        for source, target, weight in self.edges():
+            chunk.append(
+                f'<edge source="n{source}" target="n{target}"><data key="sessions">{weight}</data></edge>\n'
+            )
+            if len(chunk) >= 1000:
+                yield ''.join(chunk)
+                chunk = []
+        chunk.append('</graph>\n</graphml>\n')
+        yield ''.join(chunk)
+
+
+def get_topology(user=None):
+    """
+    Return the TopologyGraph of the sessions visible to the user, built at most once per
+    BGP data version. Graphs restricted by object permissions are cached per user and
+    permissions version.
+    """
+    queryset = BGPSession.objects.all()
+    scope = 'all'
+    if user is not None and not user.is_superuser:
+        queryset = queryset.restrict(user, 'view')
+        scope = f'{user.pk}:{get_versions([PERMISSIONS_VERSION])[PERMISSIONS_VERSION]}'
+    cache_key = TOPOLOGY_KEY.format(get_data_version(), scope)
+    graph = cache.get(cache_key)
+    if graph is None:
+        graph = TopologyGraph.build(queryset)
+        cache.set(cache_key, graph, TOPOLOGY_TIMEOUT)
+    return graph
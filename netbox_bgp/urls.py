@@ -18,6 +18,8 @@ urlpatterns = [
     # Sessions
     path('session/', views.BGPSessionListView.as_view(), name='bgpsession_list'),
     path('session/add/', views.BGPSessionAddView.as_view(), name='bgpsession_add'),
+    path('session/import/', views.BGPSessionBulkImportView.as_view(), name='bgpsession_import'),
+    path('session/summary/', views.BGPSessionSummaryView.as_view(), name='bgpsession_summary'),
     path('session/delete/', views.BGPSessionBulkDeleteView.as_view(), name='bgpsession_bulk_delete'),
     path('session/<int:pk>/', views.BGPSessionView.as_view(), name='bgpsession'),
     path('session/<int:pk>/edit/', views.BGPSessionEditView.as_view(), name='bgpsession_edit'),
@@ -57,8 +59,11 @@ urlpatterns = [
     # Prefix List Rules
     path('prefix-list-rule/', views.PrefixListRuleListView.as_view(), name='prefixlistrule_list'),
     path('prefix-list-rule/add/', views.PrefixListRuleEditView.as_view(), name='prefixlistrule_add'),
+    path('prefix-list-rule/delete/', views.PrefixListRuleBulkDeleteView.as_view(), name='prefixlistrule_bulk_delete'),
     path('prefix-list-rule/<int:pk>/', views.PrefixListRuleView.as_view(), name='prefixlistrule'),
     path('prefix-list-rule/<int:pk>/edit/', views.PrefixListRuleEditView.as_view(), name='prefixlistrule_edit'),
     path('prefix-list-rule/<int:pk>/delete/', views.PrefixListRuleDeleteView.as_view(), name='prefixlistrule_delete'),
     path('prefix-list-rule/<int:pk>/changelog/', ObjectChangeLogView.as_view(), name='prefixlistrule_changelog', kwargs={'model': PrefixListRule}),
+    # Background jobs
+    path('jobs/<uuid:job_id>/', views.JobView.as_view(), name='job'),
 ]
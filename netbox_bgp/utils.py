@@ -0,0 +1,118 @@
+import json
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import ManyToManyField
+from django.db.models.constants import LOOKUP_SEP
+
+
+def is_single_valued(model, lookup):
+    """Return True if ``lookup`` follows only relations which can be joined with select_related()."""
+    for name in lookup.split(LOOKUP_SEP):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        if not (field.many_to_one or field.one_to_one) or field.related_model is None:
+            return False
+        model = field.related_model
+    return True
+
+
+def join_related(queryset, lookups):
+    """
+    Join the given related lookups onto a queryset: single-valued relations with
+    select_related(), everything else with prefetch_related().
+    """
+    select, prefetch = [], []
+    for lookup in dict.fromkeys(lookups):
+        if is_single_valued(queryset.model, lookup):
+            select.append(lookup)
+        else:
+            prefetch.append(lookup)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+def get_many_to_many_data(model, pks):
+    """
+    Return {pk: {field name: sorted related pks}} of the many-to-many fields of the given
+    objects, other than their tags, with one query per field on its through table.
+    """
+    data = {pk: {} for pk in pks}
+    for field in model._meta.many_to_many:
+        if not isinstance(field, ManyToManyField):
+            continue
+        for values in data.values():
+            values[field.name] = []
+        source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+        for pk, value in field.remote_field.through.objects.filter(
+            **{f'{source}__in': pks}
+        ).order_by(target).values_list(source, target):
+            data[pk][field.name].append(value)
+    return data
+
+
+def set_many_to_many(field, pks, values):
+    """
+    Set a many-to-many field of the given objects to the related pks ``values`` with one
+    delete and one insert on its through table, instead of a set() per object. Like
+    bulk_update(), this sends no m2m_changed signals.
+    """
+    through = field.remote_field.through
+    source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+    through.objects.filter(**{f'{source}__in': pks}).exclude(**{f'{target}__in': values}).delete()
+    through.objects.bulk_create(
+        [through(**{f'{source}_id': pk, f'{target}_id': value}) for pk in pks for value in values],
+        ignore_conflicts=True,
+    )
+
+
+def get_change_data(instance, extra=None):
+    """
+    Return the change log representation of an instance like NetBox's serialize_object(),
+    without its per-object many-to-many queries: tags are read from the instance's
+    prefetched ``tags``. ``extra`` adds fields, e.g. the many-to-many values of
+    get_many_to_many_data().
+    """
+    data = {}
+    for field in instance._meta.concrete_fields:
+        if field.primary_key or field.name == 'custom_field_data':
+            continue
+        data[field.name] = field.value_from_object(instance)
+    data['custom_fields'] = instance.custom_field_data
+    data.update(extra or {})
+    if 'tags' not in data:
+        data['tags'] = sorted(tag.slug for tag in instance.tags.all())
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+
+def bulk_log_changes(instances, action, user, request_id, prechange=None, postchange=None):
+    """
+    Create the ObjectChange records of objects written with bulk operations, which bypass
+    the signals NetBox uses for change logging. ``prechange`` and ``postchange`` map
+    instance primary keys to their serialized data.
+    """
+    from extras.models import ObjectChange
+
+    if not instances:
+        return []
+    content_type = ContentType.objects.get_for_model(instances[0])
+    return ObjectChange.objects.bulk_create([
+        ObjectChange(
+            user=user,
+            user_name=user.username,
+            request_id=request_id,
+            action=action,
+            changed_object_type=content_type,
+            changed_object_id=instance.pk,
+            object_repr=str(instance)[:200],
+            prechange_data=(prechange or {}).get(instance.pk),
+            postchange_data=(postchange or {}).get(instance.pk),
+        )
+        for instance in instances
+    ], batch_size=1000)
@@ -0,0 +1,110 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+
+DATA_VERSION_KEY = 'netbox_bgp:data_version'
+VERSION_KEY = 'netbox_bgp:version:{}'
+MODIFIED_KEY = 'netbox_bgp:modified:{}'
+
+_deferred = ContextVar('netbox_bgp_deferred_bumps', default=None)
+
+
+def _initial_version():
+    # Seed from the clock so a version lost to cache eviction is never reissued
+    return time.time_ns()
+
+
+def _now():
+    # HTTP dates have a one second resolution
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def get_data_version():
+    """Return the current BGP data version, changed on every write to BGP data."""
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(DATA_VERSION_KEY)
+    return version
+
+
+def bump_data_version():
+    pending = _deferred.get()
+    if pending is not None:
+        # None stands for the data version among the deferred version names
+        pending.add(None)
+        return None
+    try:
+        return cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        version = _initial_version()
+        cache.set(DATA_VERSION_KEY, version, timeout=None)
+        return version
+
+
+def get_versions(names):
+    """
+    Return a name -> version mapping of named version counters, each changed by
+    bump_versions(). Counters are created on first use.
+    """
+    keys = {VERSION_KEY.format(name): name for name in names}
+    versions = {keys[key]: version for key, version in cache.get_many(keys).items()}
+    missing = [key for key in keys if keys[key] not in versions]
+    if missing:
+        initial = _initial_version()
+        for key in missing:
+            cache.add(key, initial, timeout=None)
+            cache.add(MODIFIED_KEY.format(keys[key]), _now(), timeout=None)
+        versions.update({keys[key]: version for key, version in cache.get_many(missing).items()})
+    return versions
+
+
+def get_last_modified(names):
+    """Return when the most recently bumped of the named versions changed."""
+    modified = cache.get_many([MODIFIED_KEY.format(name) for name in names])
+    if len(modified) < len(set(names)):
+        # Evicted: treat as just modified
+        return _now()
+    return max(modified.values(), default=None)
+
+
+def bump_versions(names):
+    names = set(names)
+    pending = _deferred.get()
+    if pending is not None:
+        pending.update(names)
+        return
+    for name in names:
+        key = VERSION_KEY.format(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), timeout=None)
+    now = _now()
+    cache.set_many({MODIFIED_KEY.format(name): now for name in names}, timeout=None)
+
+
+@contextmanager
+def deferred_bumps():
+    """
+    Collapse all version bumps within the block (e.g. a bulk job) into one per version
+    at its end.
+    """
+    if _deferred.get() is not None:
+        yield
+        return
+    pending = set()
+    token = _deferred.set(pending)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+        if None in pending:
+            pending.discard(None)
+            bump_data_version()
+        if pending:
+            bump_versions(pending)
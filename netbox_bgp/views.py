@@ -1,10 +1,15 @@
 
 from django.db.models import Q
 from django.contrib import messages
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render, reverse
 from django.utils.text import slugify
+from django.views.generic import View
 
 from netbox.views import generic
+from utilities.forms import restrict_form_fields
 from ipam.models import ASN
 
 from .models import (
@@ -14,6 +19,66 @@ from .models import (
 )
 
 from . import forms, tables, filters
+from .choices import PairingStatusChoices, SessionStatusChoices
+from .bulk import bulk_delete, bulk_edit, get_bulk_edit_changes
+from .importers import BGPSessionImporter, import_sessions
+from .jobs import JobProgress, enqueue_job
+from .pairing import get_pairing, get_peer_sessions
+from .summary import get_session_summary, get_top
+
+
+class BackgroundBulkMixin:
+    """
+    Hand bulk operations on at least ``background_bulk_threshold`` objects over to a
+    background job instead of processing them within the request.
+    """
+    def get_background_threshold(self):
+        return settings.PLUGINS_CONFIG.get('netbox_bgp', {}).get('background_bulk_threshold')
+
+    def get_selected_pks(self, request, action):
+        if request.POST.get('_all'):
+            queryset = self.queryset.restrict(request.user, action)
+            if self.filterset is not None:
+                queryset = self.filterset(request.GET, queryset).qs
+            return list(queryset.values_list('pk', flat=True))
+        return [int(pk) for pk in request.POST.getlist('pk')]
+
+    def enqueue(self, request, func, name, *args):
+        progress = enqueue_job(
+            func, name, request.user, self.queryset.model._meta.label_lower, *args,
+            return_url=self.get_return_url(request)
+        )
+        return redirect('plugins:netbox_bgp:job', job_id=progress.job_id)
+
+
+class BackgroundBulkDeleteView(BackgroundBulkMixin, generic.BulkDeleteView):
+
+    def post(self, request, **kwargs):
+        threshold = self.get_background_threshold()
+        if threshold and '_confirm' in request.POST:
+            pks = self.get_selected_pks(request, 'delete')
+            if len(pks) >= threshold and self.get_form()(request.POST).is_valid():
+                name = f'Delete {len(pks)} {self.queryset.model._meta.verbose_name_plural}'
+                return self.enqueue(request, bulk_delete, name, pks)
+        return super().post(request, **kwargs)
+
+
+class BackgroundBulkEditView(BackgroundBulkMixin, generic.BulkEditView):
+
+    def post(self, request, **kwargs):
+        threshold = self.get_background_threshold()
+        if threshold and '_apply' in request.POST:
+            pks = self.get_selected_pks(request, 'change')
+            if len(pks) >= threshold:
+                form = self.form(request.POST, initial={'pk': pks})
+                restrict_form_fields(form, request.user)
+                if form.is_valid():
+                    nullified = [name for name in request.POST.getlist('_nullify') if name in form.nullable_fields]
+                    name = f'Edit {len(pks)} {self.queryset.model._meta.verbose_name_plural}'
+                    return self.enqueue(request, bulk_edit, name, pks, get_bulk_edit_changes(
+                        self.queryset.model, form, nullified
+                    ))
+        return super().post(request, **kwargs)
 
 
 class CommunityListView(generic.ObjectListView):
@@ -34,12 +99,12 @@ class CommunityEditView(generic.ObjectEditView):
     form = forms.CommunityForm
 
 
-class CommunityBulkDeleteView(generic.BulkDeleteView):
+class CommunityBulkDeleteView(BackgroundBulkDeleteView):
     queryset = Community.objects.all()
     table = tables.CommunityTable
 
 
-class CommunityBulkEditView(generic.BulkEditView):
+class CommunityBulkEditView(BackgroundBulkEditView):
     queryset = Community.objects.all()
     filterset = filters.CommunityFilterSet
     table = tables.CommunityTable
@@ -64,7 +129,7 @@ class BGPSessionListView(generic.ObjectListView):
     filterset = filters.BGPSessionFilterSet
     filterset_form = forms.BGPSessionFilterForm
     table = tables.BGPSessionTable
-    action_buttons = ('add',)
+    action_buttons = ('add', 'import')
 
 
 class BGPSessionEditView(generic.ObjectEditView):
@@ -77,7 +142,92 @@ class BGPSessionAddView(generic.ObjectEditView):
     form = forms.BGPSessionAddForm
 
 
-class BGPSessionBulkDeleteView(generic.BulkDeleteView):
+class BGPSessionBulkImportView(PermissionRequiredMixin, View):
+    """
+    Import BGP sessions in a background job; the user is redirected to the job's progress page.
+    """
+    permission_required = 'netbox_bgp.add_bgpsession'
+    template_name = 'netbox_bgp/bgpsession_import.html'
+
+    def get(self, request):
+        return render(request, self.template_name, {
+            'form': forms.BGPSessionBulkImportForm(),
+            'fields': BGPSessionImporter.fields,
+            'required_fields': BGPSessionImporter.required_fields,
+        })
+
+    def post(self, request):
+        form = forms.BGPSessionBulkImportForm(request.POST, request.FILES)
+        if not form.is_valid():
+            return render(request, self.template_name, {
+                'form': form,
+                'fields': BGPSessionImporter.fields,
+                'required_fields': BGPSessionImporter.required_fields,
+            })
+        progress = enqueue_job(
+            import_sessions, 'Import BGP sessions', request.user,
+            form.cleaned_data['data'], form.cleaned_data['format'],
+            return_url=reverse('plugins:netbox_bgp:bgpsession_list')
+        )
+        return redirect('plugins:netbox_bgp:job', job_id=progress.job_id)
+
+
+class BGPSessionSummaryView(PermissionRequiredMixin, View):
+    """
+    Session counts by status, site, tenant, remote AS and peer group. Accepts the filters
+    of the session list.
+    """
+    permission_required = 'netbox_bgp.view_bgpsession'
+    template_name = 'netbox_bgp/bgpsession_summary.html'
+    # Title and object view of each group
+    groups = {
+        'site': ('Site', 'dcim:site'),
+        'tenant': ('Tenant', 'tenancy:tenant'),
+        'remote_as': ('Remote AS', 'ipam:asn'),
+        'peer_group': ('Peer Group', 'plugins:netbox_bgp:bgppeergroup'),
+    }
+
+    def get(self, request):
+        try:
+            summary = get_session_summary(request.user, request.GET, top=get_top(request.GET.get('top')))
+        except ValueError as e:
+            messages.error(request, f'Invalid filter: {e}')
+            summary = get_session_summary(request.user)
+
+        list_url = reverse('plugins:netbox_bgp:bgpsession_list')
+        statuses = [
+            {
+                'value': value, 'label': label, 'color': SessionStatusChoices.colors.get(value),
+                'count': summary['status'][value], 'url': f'{list_url}?status={value}',
+            }
+            for value, label in SessionStatusChoices
+        ]
+        groups = []
+        for name, group in summary['groups'].items():
+            title, view_name = self.groups[name]
+            groups.append({
+                'title': title,
+                'count': group['count'],
+                'other': group['other'],
+                'entries': [
+                    {
+                        'label': entry['label'],
+                        'total': entry['total'],
+                        'status': [entry['status'][status['value']] for status in statuses],
+                        'url': None if entry['id'] is None else reverse(view_name, args=[entry['id']]),
+                        'list_url': None if entry['id'] is None else f'{list_url}?{group["filter"]}={entry["id"]}',
+                    }
+                    for entry in group['entries']
+                ],
+            })
+        return render(request, self.template_name, {
+            'total': summary['total'],
+            'statuses': statuses,
+            'groups': groups,
+        })
+
+
+class BGPSessionBulkDeleteView(BackgroundBulkDeleteView):
     queryset = BGPSession.objects.all()
     table = tables.BGPSessionTable
 
@@ -103,9 +253,16 @@ class BGPSessionView(generic.ObjectView):
             orderable=False
         )
 
+        pairing = get_pairing(instance)
+
         return {
             'import_policies_table': import_policies_table,
-            'export_policies_table': export_policies_table
+            'export_policies_table': export_policies_table,
+            'peer_session': get_peer_sessions([instance], request.user).get(instance.pk),
+            'pairing_status': pairing and {
+                'label': dict(PairingStatusChoices)[pairing.status],
+                'color': PairingStatusChoices.colors.get(pairing.status),
+            },
         }
 
 
@@ -129,7 +286,7 @@ class RoutingPolicyEditView(generic.ObjectEditView):
     form = forms.RoutingPolicyForm
 
 
-class RoutingPolicyBulkDeleteView(generic.BulkDeleteView):
+class RoutingPolicyBulkDeleteView(BackgroundBulkDeleteView):
     queryset = RoutingPolicy.objects.all()
     table = tables.RoutingPolicyTable
 
@@ -176,7 +333,7 @@ class BGPPeerGroupEditView(generic.ObjectEditView):
     form = forms.BGPPeerGroupForm
 
 
-class BGPPeerGroupBulkDeleteView(generic.BulkDeleteView):
+class BGPPeerGroupBulkDeleteView(BackgroundBulkDeleteView):
     queryset = BGPPeerGroup.objects.all()
     table = tables.BGPPeerGroupTable
 
@@ -244,8 +401,8 @@ class RoutingPolicyRuleView(generic.ObjectView):
 
 class RoutingPolicyRuleListView(generic.ObjectListView):
     queryset = RoutingPolicyRule.objects.all()
-    # filterset = RoutingPolicyRuleFilterSet
-    # filterset_form = RoutingPolicyRuleFilterForm
+    filterset = filters.RoutingPolicyRuleFilterSet
+    filterset_form = forms.RoutingPolicyRuleFilterForm
     table = tables.RoutingPolicyRuleTable
     action_buttons = ('add',)
 
@@ -266,7 +423,7 @@ class PrefixListEditView(generic.ObjectEditView):
     form = forms.PrefixListForm
 
 
-class PrefixListBulkDeleteView(generic.BulkDeleteView):
+class PrefixListBulkDeleteView(BackgroundBulkDeleteView):
     queryset = PrefixList.objects.all()
     table = tables.PrefixListTable
 
@@ -296,8 +453,8 @@ class PrefixListDeleteView(generic.ObjectDeleteView):
 
 class PrefixListRuleListView(generic.ObjectListView):
     queryset = PrefixListRule.objects.all()
-    # filterset = RoutingPolicyRuleFilterSet
-    # filterset_form = RoutingPolicyRuleFilterForm
+    filterset = filters.PrefixListRuleFilterSet
+    filterset_form = forms.PrefixListRuleFilterForm
     table = tables.PrefixListRuleTable
     action_buttons = ('add',)
 
@@ -307,7 +464,7 @@ class PrefixListRuleEditView(generic.ObjectEditView):
     form = forms.PrefixListRuleForm
 
 
-class PrefixListRuleBulkDeleteView(generic.BulkDeleteView):
+class PrefixListRuleBulkDeleteView(BackgroundBulkDeleteView):
     queryset = PrefixListRule.objects.all()
     table = tables.PrefixListRuleTable
 
@@ -320,3 +477,20 @@ class PrefixListRuleDeleteView(generic.ObjectDeleteView):
 class PrefixListRuleView(generic.ObjectView):
     queryset = PrefixListRule.objects.all()
     template_name = 'netbox_bgp/prefixlistrule.html'
+
+
+# Background jobs
+
+
+class JobView(LoginRequiredMixin, View):
+    template_name = 'netbox_bgp/job.html'
+
+    def get(self, request, job_id):
+        progress = JobProgress.get(job_id)
+        if progress is None or (progress.data['user'] != request.user.pk and not request.user.is_superuser):
+            raise Http404
+        if request.GET.get('format') == 'json':
+            return JsonResponse({**progress.data, 'id': progress.job_id, 'percent': progress.percent})
+        return render(request, self.template_name, {
+            'job': progress,
+        })
@@ -33,6 +33,10 @@ setup(
     author='Nikolay Yuzefovich',
     author_email='mgk.kolek@gmail.com',
     install_requires=[],
+    extras_require={
+        'msgpack': ['msgpack>=1.0'],
+        'arrow': ['pyarrow>=10.0'],
+    },
     packages=find_packages(),
     include_package_data=True,
     classifiers=[